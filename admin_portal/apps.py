@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class AdminPortalConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'admin_portal'
+
+    def ready(self):
+        """Import signal handlers when the app is ready"""
+        import admin_portal.signals
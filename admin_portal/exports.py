@@ -0,0 +1,152 @@
+"""
+Streaming exports of admin datasets
+
+Each dataset is a values_list() projection read with iterator(), so rows are
+fetched from the database in chunks (a server-side cursor on PostgreSQL) and
+written out as they arrive. Memory use stays flat however many rows the
+export has.
+"""
+
+import csv
+import io
+import logging
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from doctors.models import Appointment, Doctor, Review, SupportTicket
+
+logger = logging.getLogger(__name__)
+
+EXPORT_DATASETS = {
+    'appointments': {
+        'queryset': lambda: Appointment.objects.all(),
+        'ordering': ('id',),
+        'fields': (
+            'id', 'appointment_id', 'doctor_id', 'doctor__first_name', 'doctor__last_name',
+            'patient_id', 'patient_name', 'patient_email', 'patient_phone',
+            'appointment_date', 'start_time', 'end_time', 'package_type',
+            'status', 'amount', 'transaction_number', 'created_at', 'updated_at',
+        ),
+    },
+    'doctors': {
+        'queryset': lambda: Doctor.objects.all(),
+        'ordering': ('id',),
+        'fields': (
+            'id', 'title', 'first_name', 'last_name', 'email', 'phone',
+            'specialty', 'secondary_specialty', 'license_number', 'license_state',
+            'years_experience', 'clinic_name', 'clinic_city', 'clinic_state', 'country',
+            'subscription_plan', 'status', 'average_rating', 'total_reviews',
+            'created_at', 'updated_at',
+        ),
+    },
+    'reviews': {
+        'queryset': lambda: Review.objects.all(),
+        'ordering': ('id',),
+        'fields': (
+            'id', 'appointment_id', 'doctor_id', 'patient_id', 'rating',
+            'review_text', 'created_at', 'updated_at',
+        ),
+    },
+    'tickets': {
+        'queryset': lambda: SupportTicket.objects.all(),
+        'ordering': ('id',),
+        'fields': (
+            'id', 'ticket_id', 'full_name', 'email', 'subject', 'status', 'user_type',
+            'doctor_id', 'patient_id', 'message', 'response', 'created_at',
+            'updated_at', 'resolved_at',
+        ),
+    },
+}
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def export_rows(dataset, chunk_size=None):
+    """
+    Iterate over the rows of a dataset as tuples
+
+    Args:
+        dataset (str): Key of EXPORT_DATASETS
+        chunk_size (int): Rows fetched from the database per round trip
+
+    Returns:
+        tuple: (field names, row iterator)
+    """
+    spec = EXPORT_DATASETS[dataset]
+    chunk_size = chunk_size or settings.ADMIN_EXPORT_CHUNK_SIZE
+    rows = spec['queryset']().order_by(*spec['ordering']).values_list(
+        *spec['fields']
+    ).iterator(chunk_size=chunk_size)
+    return spec['fields'], rows
+
+
+def _batched(rows, batch_size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def stream_csv(fields, rows, batch_size=1000):
+    """
+    Render rows as CSV, one string per batch of rows
+
+    Yielding a batch at a time rather than per row keeps the per-chunk
+    overhead of the WSGI server out of the throughput.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for batch in _batched(rows, batch_size):
+        writer.writerows(batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def stream_ndjson(fields, rows, batch_size=1000):
+    """Render rows as newline-delimited JSON objects, one string per batch of rows"""
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for batch in _batched(rows, batch_size):
+        yield ''.join(
+            encoder.encode(dict(zip(fields, row))) + '\n'
+            for row in batch
+        )
+
+
+def stream_export(dataset, export_format, chunk_size=None):
+    """
+    Stream a dataset in the given format
+
+    Args:
+        dataset (str): Key of EXPORT_DATASETS
+        export_format (str): Key of EXPORT_FORMATS
+        chunk_size (int): Rows fetched from the database per round trip
+
+    Returns:
+        generator: Encoded output chunks
+    """
+    fields, rows = export_rows(dataset, chunk_size)
+    return encode_chunks(EXPORT_RENDERERS[export_format](fields, rows))
+
+
+def encode_chunks(chunks):
+    """Encode rendered text chunks as UTF-8 for the response"""
+    for chunk in chunks:
+        yield chunk.encode('utf-8')
+
+
+EXPORT_RENDERERS = {
+    'csv': stream_csv,
+    'ndjson': stream_ndjson,
+}
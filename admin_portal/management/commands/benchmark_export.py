@@ -0,0 +1,122 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from datetime import date, time as dt_time, timedelta
+from decimal import Decimal
+import resource
+import time
+import logging
+
+from admin_portal.exports import EXPORT_DATASETS, EXPORT_FORMATS, EXPORT_RENDERERS, encode_chunks, export_rows
+from doctors.models import Appointment, Doctor
+
+logger = logging.getLogger(__name__)
+
+SLOTS_PER_DAY = 24 * 60
+
+
+class RollbackBenchmark(Exception):
+    """Raised to discard the synthetic rows created for the benchmark"""
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (ru_maxrss is KB on Linux)"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Command(BaseCommand):
+    help = 'Measure throughput and peak memory of the streaming admin exports'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dataset',
+            default='appointments',
+            choices=sorted(EXPORT_DATASETS),
+            help='Dataset to export'
+        )
+        parser.add_argument(
+            '--output',
+            default='csv',
+            choices=sorted(EXPORT_FORMATS),
+            help='Output format'
+        )
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=0,
+            help='Synthetic appointments to insert first (rolled back afterwards), e.g. 1000000'
+        )
+        parser.add_argument('--chunk-size', type=int, default=None, help='Rows fetched per database round trip')
+
+    def handle(self, *args, **options):
+        if options['rows'] and options['dataset'] != 'appointments':
+            raise CommandError('--rows only generates appointments')
+
+        try:
+            # Run inside a transaction so the synthetic rows are discarded
+            with transaction.atomic():
+                if options['rows']:
+                    self._seed_appointments(options['rows'])
+                result = self._run(options)
+                raise RollbackBenchmark()
+        except RollbackBenchmark:
+            pass
+
+        rows, size, elapsed, rss_before, rss_after = result
+        rate = rows / elapsed if elapsed else float('inf')
+        self.stdout.write(self.style.SUCCESS(
+            f"Exported {rows} {options['dataset']} as {options['output']}"
+        ))
+        self.stdout.write(f'  {elapsed:8.3f}s  {rate:10.1f} rows/s  {size / 1024 / 1024:8.1f} MB written')
+        self.stdout.write(f'  peak RSS {rss_after:.1f} MB (was {rss_before:.1f} MB before the export)')
+
+    def _seed_appointments(self, count, batch_size=5000):
+        """Insert synthetic appointments, one per minute slot of a benchmark doctor"""
+        self.stdout.write(f'Inserting {count} synthetic appointments...')
+        doctor = Doctor.objects.create(
+            title='Dr.', first_name='Benchmark', last_name='Export',
+            email='benchmark-export@example.com', phone='0', date_of_birth=date(1980, 1, 1),
+            gender='other', address='-', city='-', state='-', zip_code='-', country='-',
+            specialty='-', license_number='-', license_state='-', years_experience='0-5',
+            languages='-', clinic_name='-', clinic_address='-', clinic_city='-',
+            clinic_state='-', clinic_zip='-', clinic_phone='-', medical_school='-',
+            graduation_year=2000, degree='-', about_me='-', services='-'
+        )
+        start_date = date(2000, 1, 1)
+
+        for offset in range(0, count, batch_size):
+            # bulk_create skips the signals, so no chats or rollups are touched
+            Appointment.objects.bulk_create([
+                Appointment(
+                    doctor=doctor,
+                    patient_id=index,
+                    patient_name=f'Patient {index}',
+                    patient_email=f'patient{index}@example.com',
+                    appointment_date=start_date + timedelta(days=index // SLOTS_PER_DAY),
+                    start_time=dt_time(index % SLOTS_PER_DAY // 60, index % 60),
+                    end_time=dt_time(index % SLOTS_PER_DAY // 60, index % 60),
+                    amount=Decimal('50.00'),
+                    problem_description='Benchmark appointment',
+                )
+                for index in range(offset, min(offset + batch_size, count))
+            ], batch_size=batch_size)
+
+    def _run(self, options):
+        """Consume the export stream and return (rows, bytes, seconds, rss before, rss after)"""
+        rss_before = peak_rss_mb()
+        row_count = 0
+        size = 0
+
+        def counted(rows):
+            nonlocal row_count
+            for row in rows:
+                row_count += 1
+                yield row
+
+        start = time.perf_counter()
+        fields, rows = export_rows(options['dataset'], options['chunk_size'])
+        renderer = EXPORT_RENDERERS[options['output']]
+        for chunk in encode_chunks(renderer(fields, counted(rows))):
+            size += len(chunk)
+        elapsed = time.perf_counter() - start
+
+        return row_count, size, elapsed, rss_before, peak_rss_mb()
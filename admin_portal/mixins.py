@@ -0,0 +1,74 @@
+"""
+Reusable behaviour for the admin API viewsets
+"""
+
+from doctors.search import search_queryset
+
+
+def concrete_field_names(model, exclude=()):
+    """
+    Names of a model's own columns, for only() projections that keep every local field
+
+    Args:
+        model: Model class
+        exclude (iterable): Field names to leave out
+
+    Returns:
+        tuple: Field names (foreign keys by field name, e.g. 'doctor')
+    """
+    return tuple(
+        field.name for field in model._meta.concrete_fields
+        if field.name not in exclude
+    )
+
+
+class QueryPlanMixin:
+    """
+    Apply the joins, annotations and column projections each action needs
+
+    Viewsets declare query_plans, mapping an action name to a dict with any of:
+
+        select_related    relations read through a foreign key, joined in
+        prefetch_related  reverse or many-to-many relations, fetched in one extra query
+        annotations       {name: expression} computed in the same query, e.g. Count('documents')
+        only              columns to load, including 'relation__field' for joined models
+
+    The plan under 'default' is used for actions without their own plan. Write
+    actions should avoid 'only' so saved instances are fully loaded. Custom list
+    actions start from self.get_queryset() to pick up their plan.
+    """
+    query_plans = {}
+
+    def get_query_plan(self):
+        return self.query_plans.get(self.action) or self.query_plans.get('default', {})
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        plan = self.get_query_plan()
+
+        if plan.get('select_related'):
+            queryset = queryset.select_related(*plan['select_related'])
+        if plan.get('prefetch_related'):
+            queryset = queryset.prefetch_related(*plan['prefetch_related'])
+        if plan.get('annotations'):
+            queryset = queryset.annotate(**plan['annotations'])
+        if plan.get('only'):
+            queryset = queryset.only(*plan['only'])
+        return queryset
+
+
+class FullTextSearchMixin:
+    """
+    Ranked full-text search with ?q= (see doctors.search)
+
+    Results are ordered best match first and carry search_rank and
+    search_highlight, which FullTextSearchSerializerMixin renders.
+    """
+    full_text_query_param = 'q'
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        query = self.request.query_params.get(self.full_text_query_param, '').strip()
+        if query:
+            queryset = search_queryset(queryset, query)
+        return queryset
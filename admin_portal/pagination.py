@@ -1,7 +1,260 @@
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from django.conf import settings
+from django.core.exceptions import EmptyResultSet, FieldDoesNotExist
+from django.core.paginator import Paginator as DjangoPaginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from mediconnect_project.cache_utils import get_or_build
+import base64
+import hashlib
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Below this many rows the planner estimate isn't worth the inaccuracy
+APPROXIMATE_COUNT_MIN_ROWS = 10000
+
+
+def encode_cursor(values):
+    """
+    Encode the sort key of the last row on a page into an opaque cursor
+
+    Args:
+        values (list): Sort key values; dates and times are stored as ISO strings
+
+    Returns:
+        str: URL-safe cursor
+    """
+    payload = [value.isoformat() if hasattr(value, 'isoformat') else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(payload, default=str).encode()).decode()
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor produced by encode_cursor
+
+    Returns:
+        list: Sort key values as strings/numbers
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError('Invalid cursor') from e
+    if not isinstance(values, list):
+        raise ValueError('Invalid cursor')
+    return values
+
+
+def keyset_filter(fields, values):
+    """
+    Build the filter selecting rows after a cursor position
+
+    For fields (a, b) in descending order this is
+    a < x OR (a = x AND b < y), which an index on (a, b) can seek to
+    instead of scanning the skipped rows like OFFSET does.
+
+    Args:
+        fields (list): Ordering fields, '-' prefixed for descending
+        values (list): Values of those fields on the last row seen
+
+    Returns:
+        Q: Filter for the rows after that position
+    """
+    condition = Q()
+    equal = Q()
+    for field, value in zip(fields, values):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        condition |= equal & Q(**{f'{name}__{lookup}': value})
+        equal &= Q(**{name: value})
+    return condition
+
+
+def parse_cursor_datetime(value):
+    """Parse an ISO datetime stored in a cursor"""
+    parsed = parse_datetime(value) if isinstance(value, str) else None
+    if parsed is None:
+        raise ValueError('Invalid cursor')
+    return parsed
+
+
+def approximate_count(queryset):
+    """
+    Count a queryset without scanning it on every request
+
+    An unfiltered table on PostgreSQL uses the planner's row estimate from
+    pg_class. Anything else is counted once and cached for
+    ADMIN_APPROXIMATE_COUNT_TTL seconds per distinct query.
+
+    Args:
+        queryset (QuerySet): Queryset to count
+
+    Returns:
+        int: Estimated number of rows
+    """
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql' and not queryset.query.where:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [queryset.model._meta.db_table]
+            )
+            row = cursor.fetchone()
+        # reltuples is -1 (or 0) before the table is first analyzed
+        if row and row[0] >= APPROXIMATE_COUNT_MIN_ROWS:
+            return row[0]
+
+    try:
+        sql, params = queryset.order_by().query.sql_with_params()
+    except EmptyResultSet:
+        # .none() (e.g. a search without usable terms) has no SQL and no rows
+        return 0
+    query_hash = hashlib.sha1(f'{sql}|{params}'.encode()).hexdigest()
+    return get_or_build(
+        f'admin_count:{queryset.model._meta.label_lower}',
+        (query_hash,),
+        queryset.count,
+        settings.ADMIN_APPROXIMATE_COUNT_TTL
+    )
+
+
+class ApproximateCountPaginator(DjangoPaginator):
+    """Django paginator whose total comes from approximate_count()"""
+
+    @cached_property
+    def count(self):
+        return approximate_count(self.object_list)
+
 
 class StandardResultsSetPagination(PageNumberPagination):
-    """Standard pagination class for admin views"""
+    """
+    Standard pagination class for admin views
+
+    Page numbers by default. Passing ?cursor= (empty for the first page) or
+    ?pagination=cursor switches to forward-only keyset pagination on the
+    queryset's ordering, with the primary key as tie-breaker; follow the
+    `next` link for further pages. ?count=approximate|exact chooses how the
+    total is reported; cursor mode defaults to approximate and also accepts
+    ?count=none to skip it.
+    """
     page_size = 20
     page_size_query_param = 'page_size'
     max_page_size = 100
+    cursor_query_param = 'cursor'
+    mode_query_param = 'pagination'
+    count_query_param = 'count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.count_mode = request.query_params.get(self.count_query_param)
+        self.ordering = None
+        if self.cursor_query_param in request.query_params or \
+                request.query_params.get(self.mode_query_param) == 'cursor':
+            self.ordering = self.get_keyset_ordering(queryset)
+            if self.ordering is None:
+                logger.warning(f"Cursor pagination unavailable for {queryset.model.__name__} ordering; using pages")
+
+        if self.ordering is None:
+            if self.count_mode == 'approximate':
+                self.django_paginator_class = ApproximateCountPaginator
+            return super().paginate_queryset(queryset, request, view)
+
+        return self.paginate_keyset(queryset, request)
+
+    def get_keyset_ordering(self, queryset):
+        """
+        Ordering fields usable as a cursor, ending with the primary key
+
+        Returns:
+            list: Field names, '-' prefixed for descending, or None if the
+            ordering uses expressions, related or nullable fields
+        """
+        opts = queryset.model._meta
+        ordering = list(queryset.query.order_by or opts.ordering)
+        if not all(isinstance(field, str) and '__' not in field for field in ordering):
+            return None
+
+        pk_name = opts.pk.name
+        fields = []
+        for field in ordering:
+            name = field.lstrip('-')
+            if name == 'pk':
+                field = field.replace('pk', pk_name)
+                name = pk_name
+            try:
+                model_field = opts.get_field(name)
+            except FieldDoesNotExist:
+                return None
+            # NULLs never compare as less or greater, so they would drop out of the pages
+            if model_field.null or model_field.is_relation:
+                return None
+            fields.append(field)
+
+        if not any(field.lstrip('-') == pk_name for field in fields):
+            descending = bool(fields) and fields[-1].startswith('-')
+            fields.append(f"{'-' if descending else ''}{pk_name}")
+        return fields
+
+    def paginate_keyset(self, queryset, request):
+        page_size = self.get_page_size(request)
+        opts = queryset.model._meta
+        queryset = queryset.order_by(*self.ordering)
+
+        if self.count_mode == 'exact':
+            self.total = queryset.count()
+        elif self.count_mode == 'none':
+            self.total = None
+        else:
+            self.total = approximate_count(queryset)
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            try:
+                values = decode_cursor(cursor)
+                if len(values) != len(self.ordering):
+                    raise ValueError('Invalid cursor')
+                values = [
+                    opts.get_field(field.lstrip('-')).to_python(value)
+                    for field, value in zip(self.ordering, values)
+                ]
+            except Exception:
+                raise NotFound('Invalid cursor')
+            queryset = queryset.filter(keyset_filter(self.ordering, values))
+
+        # Fetch one extra row to know whether there is a next page
+        rows = list(queryset[:page_size + 1])
+        self.has_next = len(rows) > page_size
+        self.page_rows = rows[:page_size]
+        return self.page_rows
+
+    def get_next_cursor_link(self):
+        if not self.has_next:
+            return None
+        last = self.page_rows[-1]
+        cursor = encode_cursor([getattr(last, field.lstrip('-')) for field in self.ordering])
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        if self.ordering is None:
+            response = super().get_paginated_response(data)
+            if self.count_mode == 'approximate':
+                response.data['count_is_approximate'] = True
+            return response
+
+        return Response({
+            'count': self.total,
+            'count_is_approximate': self.count_mode not in ('exact', 'none'),
+            'next': self.get_next_cursor_link(),
+            'previous': None,
+            'results': data,
+        })
@@ -2,6 +2,21 @@ from rest_framework import serializers
 from django.contrib.auth.models import User
 from doctors.models import Doctor, DoctorDocument, FAQ, SupportTicket, Review, Appointment
 from doctors.serializers import DoctorSerializer
+from doctors.search import render_highlight
+
+class FullTextSearchSerializerMixin(serializers.Serializer):
+    """Adds the rank and highlighted excerpt of ?q= search results"""
+    search_rank = serializers.SerializerMethodField()
+    search_highlight = serializers.SerializerMethodField()
+    
+    def get_search_rank(self, obj):
+        return getattr(obj, 'search_rank', None)
+    
+    def get_search_highlight(self, obj):
+        if not hasattr(obj, 'search_rank'):
+            return None
+        request = self.context.get('request')
+        return render_highlight(obj, request.query_params.get('q') if request else None)
 
 class AdminUserSerializer(serializers.ModelSerializer):
     """Serializer for Django User model with administrative fields"""
@@ -43,7 +58,9 @@ class AdminDoctorSerializer(DoctorSerializer):
         fields = '__all__'
         
     def get_document_count(self, obj):
-        return obj.documents.count()
+        # Annotated by AdminDoctorViewSet; count directly for other callers
+        count = getattr(obj, 'document_count', None)
+        return count if count is not None else obj.documents.count()
 
 class AdminDoctorListSerializer(serializers.ModelSerializer):
     """Simplified Doctor serializer for list views"""
@@ -63,7 +80,7 @@ class AdminFAQSerializer(serializers.ModelSerializer):
         model = FAQ
         fields = '__all__'
 
-class AdminSupportTicketSerializer(serializers.ModelSerializer):
+class AdminSupportTicketSerializer(FullTextSearchSerializerMixin, serializers.ModelSerializer):
     """SupportTicket serializer with administrative fields"""
     doctor_name = serializers.SerializerMethodField()
     
@@ -74,7 +91,7 @@ class AdminSupportTicketSerializer(serializers.ModelSerializer):
     def get_doctor_name(self, obj):
         return obj.doctor.full_name if obj.doctor else None
 
-class AdminReviewSerializer(serializers.ModelSerializer):
+class AdminReviewSerializer(FullTextSearchSerializerMixin, serializers.ModelSerializer):
     """Review serializer with administrative fields"""
     doctor_name = serializers.CharField(source='doctor.full_name', read_only=True)
     appointment_id_display = serializers.SerializerMethodField()
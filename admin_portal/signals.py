@@ -0,0 +1,52 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.db import transaction
+from doctors.models import Doctor, Appointment, SupportTicket, Review
+from doctors.signals import doctors_approved
+from mediconnect_project.cache_utils import bump_version
+from .models import UserProxy
+from .views import DASHBOARD_CACHE_NAMESPACE, USERS_CACHE_NAMESPACE, user_detail_namespace
+from django.conf import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+@receiver(post_save, sender=Doctor)
+@receiver(post_delete, sender=Doctor)
+@receiver(post_save, sender=Appointment)
+@receiver(post_delete, sender=Appointment)
+@receiver(post_save, sender=SupportTicket)
+@receiver(post_delete, sender=SupportTicket)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_dashboard_stats(sender, **kwargs):
+    """Drop cached dashboard statistics when any counted model changes"""
+    # After commit, so a concurrent request can't re-cache the old numbers
+    transaction.on_commit(lambda: bump_version(DASHBOARD_CACHE_NAMESPACE))
+
+@receiver(doctors_approved)
+def invalidate_dashboard_stats_on_bulk_approval(sender, **kwargs):
+    """Bulk approval uses update(), which sends no post_save; sent after commit"""
+    bump_version(DASHBOARD_CACHE_NAMESPACE)
+
+@receiver(post_save, sender=UserProxy)
+@receiver(post_delete, sender=UserProxy)
+@receiver(post_save, sender=Appointment)
+@receiver(post_delete, sender=Appointment)
+def invalidate_user_summary(sender, **kwargs):
+    """Drop the cached users table summary when users or appointments change"""
+    transaction.on_commit(lambda: bump_version(USERS_CACHE_NAMESPACE))
+
+@receiver(post_save, sender=UserProxy)
+@receiver(post_delete, sender=UserProxy)
+def invalidate_user_details(sender, instance, **kwargs):
+    """Drop a user's cached detail panel when they are edited, toggled or deleted"""
+    namespace = user_detail_namespace(instance.pk)
+    transaction.on_commit(lambda: bump_version(namespace, timeout=settings.ADMIN_USER_DETAIL_VERSION_TTL))
+
+@receiver(post_save, sender=Appointment)
+@receiver(post_delete, sender=Appointment)
+def invalidate_patient_details(sender, instance, **kwargs):
+    """Drop the detail panel of the patient an appointment belongs to"""
+    namespace = user_detail_namespace(instance.patient_id)
+    transaction.on_commit(lambda: bump_version(namespace, timeout=settings.ADMIN_USER_DETAIL_VERSION_TTL))
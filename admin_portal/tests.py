@@ -0,0 +1,317 @@
+import json
+import uuid
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest import mock, skipIf
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from doctors.models import (
+    Appointment, DailyAppointmentStats, Doctor, DoctorDocument, Review, SupportTicket,
+    SupportTicketStatusCounter
+)
+from doctors import sample_payloads
+from doctors.views import RECENT_APPOINTMENTS_QUERY_BUDGET, generate_token
+from doctors.sync import InvalidSyncToken, decode_token, encode_token, next_position, sync_changes
+from mediconnect_project import renderers
+from .pagination import approximate_count
+from .views import generate_admin_token
+
+
+def create_doctor(index, **kwargs):
+    fields = {
+        'title': 'Dr.', 'first_name': f'Doctor{index}', 'last_name': 'Test',
+        'email': f'doctor{index}@example.com', 'phone': '0', 'date_of_birth': date(1980, 1, 1),
+        'gender': 'other', 'address': '-', 'city': '-', 'state': '-', 'zip_code': '-',
+        'country': '-', 'specialty': 'General', 'license_number': '-', 'license_state': '-',
+        'years_experience': '0-5', 'languages': '-', 'clinic_name': '-', 'clinic_address': '-',
+        'clinic_city': '-', 'clinic_state': '-', 'clinic_zip': '-', 'clinic_phone': '-',
+        'medical_school': '-', 'graduation_year': 2000, 'degree': '-', 'about_me': '-',
+        'services': '-',
+    }
+    fields.update(kwargs)
+    return Doctor.objects.create(**fields)
+
+
+class AdminListQueryCountTests(TestCase):
+    """List pages must run a fixed number of queries however many rows they show"""
+
+    # Admin permission check, page count, page rows
+    LIST_QUERIES = 3
+    ROWS = 12
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin', password='x', is_staff=True)
+
+        for index in range(cls.ROWS):
+            doctor = create_doctor(index)
+            DoctorDocument.objects.create(
+                doctor=doctor, document_type='medical_license', file='doctor_documents/license.pdf'
+            )
+            appointment = Appointment.objects.create(
+                doctor=doctor, patient_id=index, patient_name=f'Patient {index}',
+                patient_email=f'patient{index}@example.com', appointment_date=date(2030, 1, 1),
+                start_time=time(9), end_time=time(9, 30), amount=50
+            )
+            Review.objects.create(
+                appointment=appointment, doctor=doctor, patient_id=index,
+                rating=5, review_text='Great'
+            )
+            SupportTicket.objects.create(
+                full_name=f'Patient {index}', email=f'patient{index}@example.com',
+                subject='general', message='Help', doctor=doctor
+            )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {generate_admin_token(self.admin.id)}')
+
+    def assertListQueries(self, url):
+        for page_size in (2, self.ROWS):
+            with self.subTest(url=url, page_size=page_size):
+                with self.assertNumQueries(self.LIST_QUERIES):
+                    response = self.client.get(url, {'page_size': page_size})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.data['results']), page_size)
+
+    def test_doctor_list(self):
+        self.assertListQueries('/api/admin/doctors/')
+
+    def test_pending_doctor_list(self):
+        Doctor.objects.update(status='pending')
+        self.assertListQueries('/api/admin/doctors/pending/')
+
+    def test_ticket_list(self):
+        self.assertListQueries('/api/admin/tickets/')
+
+    def test_open_ticket_list(self):
+        self.assertListQueries('/api/admin/tickets/open/')
+
+    def test_review_list(self):
+        self.assertListQueries('/api/admin/reviews/')
+
+    def test_appointment_list(self):
+        self.assertListQueries('/api/admin/appointments/')
+
+    def test_upcoming_appointment_list(self):
+        self.assertListQueries('/api/admin/appointments/upcoming/')
+
+    def test_doctor_detail_uses_annotated_document_count(self):
+        doctor = Doctor.objects.first()
+        # Admin permission check, doctor with document count, prefetched documents
+        with self.assertNumQueries(3):
+            response = self.client.get(f'/api/admin/doctors/{doctor.pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['document_count'], 1)
+
+    def test_approximate_count_of_empty_queryset(self):
+        self.assertEqual(approximate_count(SupportTicket.objects.none()), 0)
+        response = self.client.get('/api/admin/tickets/', {'q': '"', 'count': 'approximate'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 0)
+
+
+class TicketQueueTests(TestCase):
+    """The ticket queue reads maintained counters instead of counting tickets"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin', password='x', is_staff=True)
+        cls.tickets = [
+            SupportTicket.objects.create(
+                full_name=f'Patient {index}', email=f'patient{index}@example.com',
+                subject='general', message='Help'
+            )
+            for index in range(5)
+        ]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {generate_admin_token(self.admin.id)}')
+
+    def test_counters_follow_writes(self):
+        self.tickets[0].resolve(response='Done')
+        self.tickets[1].status = 'in_progress'
+        self.tickets[1].save()
+        self.tickets[2].delete()
+
+        expected = {'new': 2, 'in_progress': 1, 'resolved': 1, 'closed': 0}
+        self.assertEqual(SupportTicketStatusCounter.counts(), expected)
+        for ticket_status, count in expected.items():
+            self.assertEqual(SupportTicket.objects.filter(status=ticket_status).count(), count)
+
+    def test_queue_pages_oldest_first_in_fixed_queries(self):
+        seen = []
+        cursor = None
+        while True:
+            params = {'limit': 2}
+            if cursor:
+                params['cursor'] = cursor
+            # Admin permission check, tickets, counters
+            with self.assertNumQueries(3):
+                response = self.client.get('/api/admin/tickets/queue/', params)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data['counts']['new'], 5)
+            self.assertEqual(response.data['open'], 5)
+            seen += [ticket['id'] for ticket in response.data['tickets']]
+            cursor = response.data['next_cursor']
+            if not cursor:
+                break
+
+        self.assertEqual(seen, [ticket.id for ticket in self.tickets])
+
+
+class AppointmentRollupTests(TestCase):
+    """Daily rollups move from the stored bucket, not the one seen at load time"""
+
+    def test_stale_instances_move_the_stored_bucket(self):
+        appointment = Appointment.objects.create(
+            doctor=create_doctor(1), patient_id=1, patient_name='Patient', patient_email='p@example.com',
+            appointment_date=date(2030, 1, 1), start_time=time(9), end_time=time(9, 30), amount=50
+        )
+        first = Appointment.objects.get(pk=appointment.pk)
+        second = Appointment.objects.get(pk=appointment.pk)
+        first.status = 'completed'
+        first.save()
+        second.status = 'cancelled'
+        second.save()
+
+        rollups = {
+            row.status: row.appointment_count
+            for row in DailyAppointmentStats.objects.filter(appointment_count__gt=0)
+        }
+        self.assertEqual(rollups, {'cancelled': 1})
+
+        second.delete()
+        self.assertFalse(DailyAppointmentStats.objects.filter(appointment_count__gt=0).exists())
+
+
+@override_settings(QUERY_BUDGET_STRICT=True)
+class RecentAppointmentsSparseFieldsTests(TestCase):
+    """?fields= keeps the columns the keyset cursor needs, within the query budget"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.doctor = create_doctor(1)
+        for hour in (9, 10, 11):
+            Appointment.objects.create(
+                doctor=cls.doctor, patient_id=hour, patient_name=f'Patient {hour}',
+                patient_email=f'patient{hour}@example.com', appointment_date=date(2030, 1, 1),
+                start_time=time(hour), end_time=time(hour, 30), amount=50
+            )
+
+    def test_sparse_pages_stay_within_budget(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {generate_token(self.doctor.id)}')
+        url = '/api/doctors/dashboard/recent-appointments/'
+        seen = []
+        params = {'limit': 2, 'fields': 'id,status'}
+        while True:
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get(url, params)
+            # Strict budgets turn an overflow into a 500
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(queries), RECENT_APPOINTMENTS_QUERY_BUDGET)
+            for appointment in response.data['appointments']:
+                self.assertEqual(set(appointment), {'id', 'status'})
+                seen.append(appointment['id'])
+            if not response.data['next_cursor']:
+                break
+            params['cursor'] = response.data['next_cursor']
+
+        expected = Appointment.objects.order_by('-start_time').values_list('id', flat=True)
+        self.assertEqual(seen, list(expected))
+
+
+class SyncPositionTests(TestCase):
+    """Sync tokens hand out safe positions and only work for their owner"""
+
+    settle_before = datetime(2030, 1, 1, 12, tzinfo=dt_timezone.utc)
+
+    def row(self, seconds, row_id):
+        return SimpleNamespace(updated_at=self.settle_before + timedelta(seconds=seconds), id=row_id)
+
+    def test_next_position(self):
+        settled = (self.settle_before, 0)
+        cases = [
+            # rows, has_more, expected
+            # A complete read moves an idle position forward, so it never ages out
+            ([], False, settled),
+            ([self.row(-60, 3)], False, settled),
+            # A complete batch never moves past settle_before
+            ([self.row(-60, 3), self.row(30, 4)], False, settled),
+            # A partial batch continues right after its last row
+            ([self.row(-60, 3), self.row(30, 4)], True, (self.row(30, 4).updated_at, 4)),
+        ]
+        for rows, has_more, expected in cases:
+            with self.subTest(rows=rows, has_more=has_more):
+                self.assertEqual(next_position(rows, 'updated_at', has_more, self.settle_before), expected)
+
+    def test_idle_sync_keeps_its_deletions_position_current(self):
+        token = sync_changes('patient', 12345)['token']
+        settle_before = decode_token(token, 'patient', 12345)['deleted'][0]
+        later = timezone.now() + timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS - 1)
+        with mock.patch('doctors.sync.timezone.now', return_value=later):
+            result = sync_changes('patient', 12345, token)
+        self.assertFalse(result['reset'])
+        # Moved forward again although nothing was deleted
+        self.assertGreater(decode_token(result['token'], 'patient', 12345)['deleted'][0], settle_before)
+
+    def test_decode_token_rejects_another_owner(self):
+        positions = {'appointments': (self.settle_before, 5)}
+        token = encode_token('doctor', 1, positions)
+        self.assertEqual(decode_token(token, 'doctor', 1), positions)
+        for owner_type, owner_id in (('doctor', 2), ('patient', 1)):
+            with self.subTest(owner_type=owner_type, owner_id=owner_id):
+                with self.assertRaises(InvalidSyncToken):
+                    decode_token(token, owner_type, owner_id)
+        with self.assertRaises(InvalidSyncToken):
+            decode_token(token + 'x', 'doctor', 1)
+
+
+@skipIf(renderers.orjson is None, 'orjson is not installed')
+class ORJSONRendererTests(SimpleTestCase):
+    """ORJSONRenderer matches DRF's output apart from the accepted float differences"""
+
+    def assertSameBytes(self, data):
+        self.assertEqual(renderers.ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_api_payloads_render_identically(self):
+        self.assertSameBytes(sample_payloads.appointments(3))
+        self.assertSameBytes(sample_payloads.revenue_series(3))
+        self.assertSameBytes({
+            'at': datetime(2030, 1, 1, 9, 30, tzinfo=dt_timezone.utc),
+            'day': date(2030, 1, 1),
+            'amount': Decimal('12.50'),
+            'id': uuid.UUID(int=1),
+            'text': 'line\u2028break\u2029',
+        })
+
+    def test_accepted_float_differences(self):
+        # value, DRF bytes, orjson bytes
+        cases = [
+            (1e16, b'[1e+16]', b'[1e16]'),
+            (1e-7, b'[1e-07]', b'[1e-7]'),
+            (2.5e-5, b'[2.5e-05]', b'[0.000025]'),
+        ]
+        for value, drf, rendered in cases:
+            with self.subTest(value=value):
+                self.assertEqual(JSONRenderer().render([value]), drf)
+                self.assertEqual(renderers.ORJSONRenderer().render([value]), rendered)
+                self.assertEqual(json.loads(rendered), json.loads(drf))
+
+    def test_non_finite_floats_render_as_null(self):
+        for value in (float('nan'), float('inf')):
+            with self.subTest(value=value):
+                with self.assertRaises(ValueError):
+                    JSONRenderer().render([value])
+                self.assertEqual(renderers.ORJSONRenderer().render([value]), b'[null]')
@@ -20,6 +20,13 @@ urlpatterns = [
     # Dashboard statistics
     path('dashboard/stats/', views.AdminDashboardStatsView.as_view(), name='admin-dashboard-stats'),
     
+    # Runtime metrics
+    path('metrics/notifications/', views.NotificationMetricsView.as_view(), name='admin-notification-metrics'),
+    path('metrics/firebase/', views.FirebaseRegistryStatsView.as_view(), name='admin-firebase-metrics'),
+    
+    # Streaming dataset exports
+    path('export/<str:dataset>/', views.AdminExportView.as_view(), name='admin-export'),
+    
     # Include router URLs
     path('', include(router.urls)),
 
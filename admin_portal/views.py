@@ -1,14 +1,15 @@
 from django.shortcuts import render, get_object_or_404
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate
-from django.db.models import Count, Avg, Q, Sum
+from django.db.models import Count, Avg, Q, Sum, OuterRef, Subquery, IntegerField
+from django.db.models.functions import TruncMonth, Coalesce
 from django.utils import timezone
 from rest_framework import viewsets, permissions, status, filters
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.decorators import action
-from rest_framework.pagination import PageNumberPagination
-from doctors.models import Doctor, FAQ, SupportTicket, Review, Appointment
+from doctors.models import Doctor, FAQ, SupportTicket, SupportTicketStatusCounter, Review, Appointment, DailyAppointmentStats
+from doctors.approval import bulk_approve_doctors
 from .serializers import (
     AdminUserSerializer,
     AdminDoctorSerializer,
@@ -23,9 +24,16 @@ import jwt
 from datetime import datetime, timedelta
 from django.conf import settings
 from rest_framework.permissions import IsAdminUser
-from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+from rest_framework.parsers import MultiPartParser, FormParser
 from .models import UserProxy
-from django.http import JsonResponse
+from .exports import EXPORT_DATASETS, EXPORT_FORMATS, stream_export
+from .mixins import FullTextSearchMixin, QueryPlanMixin, concrete_field_names
+from .pagination import StandardResultsSetPagination, encode_cursor, decode_cursor, keyset_filter, parse_cursor_datetime
+from chat.notifications import get_notification_dispatcher
+from mediconnect_project.firebase_registry import firebase_registry
+from mediconnect_project.cache_utils import get_or_build
+from mediconnect_project.renderers import ORJSONParser
+from django.http import JsonResponse, StreamingHttpResponse
 from django.views.decorators.http import require_http_methods
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.views.decorators.csrf import csrf_exempt
@@ -132,11 +140,126 @@ class AdminLoginView(APIView):
                 'message': str(e)
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-class StandardResultsSetPagination(PageNumberPagination):
-    """Standard pagination class for admin views"""
-    page_size = 20
-    page_size_query_param = 'page_size'
-    max_page_size = 100
+# Subscription prices per month, adjust as needed
+SUBSCRIPTION_PRICES = {
+    'basic': 29,
+    'professional': 49,
+    'premium': 99
+}
+
+DASHBOARD_CACHE_NAMESPACE = 'admin_dashboard'
+
+
+def _month_starts(today, count):
+    """First day of the last `count` months, oldest first"""
+    months = []
+    month_date = today.replace(day=1)
+    for _ in range(count):
+        months.append(month_date)
+        if month_date.month == 1:
+            month_date = month_date.replace(year=month_date.year - 1, month=12)
+        else:
+            month_date = month_date.replace(month=month_date.month - 1)
+    return list(reversed(months))
+
+
+def build_dashboard_stats():
+    """Compute the admin dashboard statistics with one aggregate query per table"""
+    # Doctor status and subscription counts in a single pass
+    doctor_aggregates = {
+        'total': Count('id'),
+        'pending': Count('id', filter=Q(status='pending')),
+        'approved': Count('id', filter=Q(status='approved')),
+        'rejected': Count('id', filter=Q(status='rejected')),
+    }
+    for plan_code, _ in Doctor.SUBSCRIPTION_CHOICES:
+        doctor_aggregates[f'plan_{plan_code}'] = Count('id', filter=Q(subscription_plan=plan_code))
+    doctor_stats = Doctor.objects.aggregate(**doctor_aggregates)
+    
+    subscription_data = {
+        plan_code: {
+            'name': plan_name,
+            'count': doctor_stats[f'plan_{plan_code}']
+        }
+        for plan_code, plan_name in Doctor.SUBSCRIPTION_CHOICES
+    }
+    
+    # Calculate monthly subscription revenue
+    subscription_revenue = sum(
+        subscription_data[plan]['count'] * SUBSCRIPTION_PRICES[plan]
+        for plan in SUBSCRIPTION_PRICES
+        if plan in subscription_data
+    )
+    
+    # Total users (patients) - distinct patient_ids from appointments
+    total_users = Appointment.objects.aggregate(
+        total_users=Count('patient_id', distinct=True)
+    )['total_users']
+    
+    # Appointment revenue from the daily rollups
+    appointment_revenue = float(
+        DailyAppointmentStats.objects.aggregate(total=Sum('total_amount'))['total'] or 0
+    )
+    
+    # Total revenue = subscription revenue + appointment revenue
+    total_revenue = subscription_revenue + appointment_revenue
+    
+    # Monthly appointment revenue for the chart (last 6 months), grouped in the database
+    today = timezone.now().date()
+    months = _month_starts(today, 6)
+    monthly_revenue = {
+        row['month']: row['revenue'] or 0
+        for row in DailyAppointmentStats.objects.filter(
+            date__gte=months[0]
+        ).annotate(
+            month=TruncMonth('date')
+        ).values('month').annotate(
+            revenue=Sum('total_amount')
+        ).values('month', 'revenue')
+    }
+    
+    monthly_data = []
+    for month_date in months:
+        month_appointment_revenue = monthly_revenue.get(month_date, 0)
+        
+        # Estimate subscription revenue (this is simplified)
+        month_subscription_revenue = subscription_revenue
+        
+        monthly_data.append({
+            'month': month_date.strftime('%b'),
+            'subscription_revenue': float(month_subscription_revenue),
+            'appointment_revenue': float(month_appointment_revenue),
+            'total_revenue': float(month_subscription_revenue + month_appointment_revenue)
+        })
+    
+    ticket_counts = SupportTicketStatusCounter.counts()
+    
+    review_stats = Review.objects.aggregate(total=Count('id'), avg=Avg('rating'))
+    average_rating = review_stats['avg'] or 0
+    
+    return {
+        'total_doctors': doctor_stats['total'],
+        'pending_doctors': doctor_stats['pending'],
+        'approved_doctors': doctor_stats['approved'],
+        'rejected_doctors': doctor_stats['rejected'],
+        'doctor_verification': {
+            'approved': doctor_stats['approved'],
+            'pending': doctor_stats['pending'],
+            'rejected': doctor_stats['rejected']
+        },
+        'total_users': total_users,
+        'active_subscriptions': doctor_stats['total'],
+        'subscription_revenue': subscription_revenue,
+        'appointment_revenue': appointment_revenue,
+        'total_revenue': total_revenue,
+        'revenue_chart_data': monthly_data,
+        'total_tickets': sum(ticket_counts.values()),
+        'open_tickets': sum(ticket_counts[status] for status in SupportTicket.OPEN_STATUSES),
+        'total_reviews': review_stats['total'],
+        'average_rating': round(average_rating, 2),
+        'subscription_data': subscription_data
+    }
+
 
 class AdminDashboardStatsView(APIView):
     """API view to get dashboard statistics"""
@@ -144,123 +267,15 @@ class AdminDashboardStatsView(APIView):
     
     def get(self, request, format=None):
         try:
-            # Get all doctors and their stats
-            total_doctors = Doctor.objects.count()
-            pending_doctors = Doctor.objects.filter(status='pending').count()
-            approved_doctors = Doctor.objects.filter(status='approved').count()
-            rejected_doctors = Doctor.objects.filter(status='rejected').count()
-            
-            # Get all subscription plans and their counts
-            subscription_data = {}
-            for plan in Doctor.SUBSCRIPTION_CHOICES:
-                plan_code, plan_name = plan
-                subscription_data[plan_code] = {
-                    'name': plan_name,
-                    'count': Doctor.objects.filter(subscription_plan=plan_code).count()
-                }
-            
-            # Calculate subscription revenue
-            # These would be your subscription prices, adjust as needed
-            subscription_prices = {
-                'basic': 29,       # $29/month
-                'professional': 49, # $49/month
-                'premium': 99      # $99/month
-            }
-            
-            # Calculate monthly subscription revenue
-            subscription_revenue = sum(
-                subscription_data[plan]['count'] * subscription_prices[plan]
-                for plan in subscription_prices
-                if plan in subscription_data
+            # Cached briefly and invalidated by admin_portal.signals on writes;
+            # the date is part of the key because the chart window moves monthly
+            stats = get_or_build(
+                DASHBOARD_CACHE_NAMESPACE,
+                (timezone.now().date().isoformat(),),
+                build_dashboard_stats,
+                settings.ADMIN_DASHBOARD_CACHE_TTL
             )
             
-            # Get total users (patients) - using distinct patient_ids from appointments
-            patient_ids = Appointment.objects.values_list('patient_id', flat=True).distinct()
-            total_users = len(patient_ids)
-            
-            # Calculate appointment revenue
-            appointment_revenue_data = Appointment.objects.aggregate(
-                total_revenue=Sum('amount')
-            )
-            appointment_revenue = float(appointment_revenue_data['total_revenue'] or 0)
-            
-            # Total revenue = subscription revenue + appointment revenue
-            total_revenue = subscription_revenue + appointment_revenue
-            
-            # Get monthly revenue data for the chart (last 6 months)
-            today = timezone.now().date()
-            monthly_data = []
-            
-            for i in range(5, -1, -1):  # Last 6 months
-                # Calculate the first day of the month, i months ago
-                month_date = today.replace(day=1)
-                for _ in range(i):
-                    # Go back one month at a time to handle year boundaries correctly
-                    if month_date.month == 1:
-                        month_date = month_date.replace(year=month_date.year-1, month=12)
-                    else:
-                        month_date = month_date.replace(month=month_date.month-1)
-                
-                # Calculate the last day of the month
-                if month_date.month == 12:
-                    next_month = month_date.replace(year=month_date.year+1, month=1)
-                else:
-                    next_month = month_date.replace(month=month_date.month+1)
-                
-                last_day = (next_month - timedelta(days=1)).day
-                month_end = month_date.replace(day=last_day)
-                
-                # Get appointments revenue for this month
-                month_appointment_revenue = Appointment.objects.filter(
-                    appointment_date__gte=month_date,
-                    appointment_date__lte=month_end
-                ).aggregate(Sum('amount'))['amount__sum'] or 0
-                
-                # Estimate subscription revenue (this is simplified)
-                month_subscription_revenue = subscription_revenue
-                
-                monthly_data.append({
-                    'month': month_date.strftime('%b'),
-                    'subscription_revenue': float(month_subscription_revenue),
-                    'appointment_revenue': float(month_appointment_revenue),
-                    'total_revenue': float(month_subscription_revenue + month_appointment_revenue)
-                })
-            
-            # Count tickets
-            total_tickets = SupportTicket.objects.count()
-            open_tickets = SupportTicket.objects.filter(
-                status__in=['new', 'in_progress']
-            ).count()
-            
-            # Get rating statistics
-            reviews = Review.objects.all()
-            total_reviews = reviews.count()
-            average_rating = reviews.aggregate(avg=Avg('rating'))['avg'] or 0
-            
-            # Serialize all the statistics
-            stats = {
-                'total_doctors': total_doctors,
-                'pending_doctors': pending_doctors,
-                'approved_doctors': approved_doctors,
-                'rejected_doctors': rejected_doctors,
-                'doctor_verification': {
-                    'approved': approved_doctors,
-                    'pending': pending_doctors,
-                    'rejected': rejected_doctors
-                },
-                'total_users': total_users,
-                'active_subscriptions': total_doctors,
-                'subscription_revenue': subscription_revenue,
-                'appointment_revenue': appointment_revenue,
-                'total_revenue': total_revenue,
-                'revenue_chart_data': monthly_data,
-                'total_tickets': total_tickets,
-                'open_tickets': open_tickets,
-                'total_reviews': total_reviews,
-                'average_rating': round(average_rating, 2),
-                'subscription_data': subscription_data
-            }
-            
             return Response({
                 'status': 'success',
                 'stats': stats
@@ -274,6 +289,64 @@ class AdminDashboardStatsView(APIView):
                 'message': str(e)
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+class NotificationMetricsView(APIView):
+    """API view to get chat notification dispatcher metrics for this process"""
+    permission_classes = [IsAdminUser]
+    
+    def get(self, request, format=None):
+        dispatcher = get_notification_dispatcher()
+        if dispatcher is None:
+            return Response({
+                'status': 'success',
+                'enabled': False,
+                'metrics': {}
+            })
+        
+        return Response({
+            'status': 'success',
+            'enabled': True,
+            'metrics': dispatcher.metrics()
+        })
+
+class AdminExportView(APIView):
+    """API view to stream a whole dataset as CSV or NDJSON"""
+    permission_classes = [IsAdminUser]
+    
+    def get(self, request, dataset, format=None):
+        # 'format' is taken by DRF's format suffixes, so the output format is ?output=
+        export_format = request.query_params.get('output', 'csv')
+        
+        if dataset not in EXPORT_DATASETS:
+            return Response({
+                'status': 'error',
+                'message': f"Unknown dataset {dataset}, use one of: {', '.join(EXPORT_DATASETS)}"
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        if export_format not in EXPORT_FORMATS:
+            return Response({
+                'status': 'error',
+                'message': f"Unknown output format {export_format}, use one of: {', '.join(EXPORT_FORMATS)}"
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        logger.info(f"Streaming {dataset} export as {export_format}")
+        filename = f"{dataset}-{timezone.now():%Y%m%d-%H%M%S}.{export_format}"
+        response = StreamingHttpResponse(
+            stream_export(dataset, export_format),
+            content_type=EXPORT_FORMATS[export_format]
+        )
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+class FirebaseRegistryStatsView(APIView):
+    """API view to get Firebase app, client and connection counts for this process"""
+    permission_classes = [IsAdminUser]
+    
+    def get(self, request, format=None):
+        return Response({
+            'status': 'success',
+            'stats': firebase_registry.stats()
+        })
+
 class AdminUserViewSet(viewsets.ModelViewSet):
     """ViewSet for managing Django User objects"""
     queryset = User.objects.all().order_by('-date_joined')
@@ -296,9 +369,24 @@ class AdminUserViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(admins, many=True)
         return Response(serializer.data)
 
-class AdminDoctorViewSet(viewsets.ModelViewSet):
+DOCTOR_NAME_FIELDS = ('doctor__title', 'doctor__first_name', 'doctor__last_name')
+
+DOCTOR_DETAIL_PLAN = {
+    'prefetch_related': ('documents',),
+    'annotations': {'document_count': Count('documents')},
+}
+DOCTOR_LIST_PLAN = {
+    'only': ('id', 'title', 'first_name', 'last_name', 'email', 'specialty', 'status', 'created_at'),
+}
+
+class AdminDoctorViewSet(QueryPlanMixin, viewsets.ModelViewSet):
     """ViewSet for managing Doctor objects"""
     queryset = Doctor.objects.all().order_by('-created_at')
+    query_plans = {
+        'list': DOCTOR_LIST_PLAN,
+        'pending': DOCTOR_LIST_PLAN,
+        'default': DOCTOR_DETAIL_PLAN,
+    }
     permission_classes = [IsAdminUser]
     pagination_class = StandardResultsSetPagination
     filter_backends = [filters.SearchFilter]
@@ -312,7 +400,7 @@ class AdminDoctorViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def pending(self, request):
         """Get only pending doctors"""
-        pending = Doctor.objects.filter(status='pending').order_by('-created_at')
+        pending = self.get_queryset().filter(status='pending')
         page = self.paginate_queryset(pending)
         
         if page is not None:
@@ -326,12 +414,39 @@ class AdminDoctorViewSet(viewsets.ModelViewSet):
     def approve(self, request, pk=None):
         """Approve a doctor"""
         doctor = self.get_object()
-        doctor.status = 'approved'
-        doctor.save()
+        bulk_approve_doctors([doctor.pk])
         return Response({
             'status': 'success',
             'message': f'Doctor {doctor.full_name} has been approved'
         })
+    
+    @action(detail=False, methods=['post'], url_path='bulk-approve')
+    def bulk_approve(self, request):
+        """Approve several doctors at once"""
+        doctor_ids = request.data.get('ids')
+        if not isinstance(doctor_ids, list) or not doctor_ids:
+            return Response({
+                'status': 'error',
+                'message': 'ids must be a non-empty list of doctor IDs'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            doctor_ids = [int(doctor_id) for doctor_id in doctor_ids]
+        except (TypeError, ValueError):
+            return Response({
+                'status': 'error',
+                'message': 'ids must be a non-empty list of doctor IDs'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        result = bulk_approve_doctors(doctor_ids)
+        return Response({
+            'status': 'success',
+            'message': f"{len(result['approved'])} doctors have been approved",
+            'approved_ids': [doctor.pk for doctor in result['approved']],
+            'accounts_created': result['accounts_created'],
+            'already_approved': result['already_approved'],
+            'skipped_accounts': result['skipped_accounts']
+        })
         
     @action(detail=True, methods=['post'])
     def reject(self, request, pk=None):
@@ -353,9 +468,24 @@ class AdminFAQViewSet(viewsets.ModelViewSet):
     filter_backends = [filters.SearchFilter]
     search_fields = ['question', 'answer', 'category']
 
-class AdminSupportTicketViewSet(viewsets.ModelViewSet):
+TICKET_LIST_PLAN = {
+    'select_related': ('doctor',),
+    'only': concrete_field_names(SupportTicket) + DOCTOR_NAME_FIELDS,
+}
+
+# Tickets returned per poll of the ticket queue
+TICKET_QUEUE_DEFAULT_LIMIT = 20
+TICKET_QUEUE_MAX_LIMIT = 100
+
+class AdminSupportTicketViewSet(FullTextSearchMixin, QueryPlanMixin, viewsets.ModelViewSet):
     """ViewSet for managing SupportTicket objects"""
     queryset = SupportTicket.objects.all().order_by('-created_at')
+    query_plans = {
+        'list': TICKET_LIST_PLAN,
+        'open': TICKET_LIST_PLAN,
+        'queue': TICKET_LIST_PLAN,
+        'default': {'select_related': ('doctor',)},
+    }
     serializer_class = AdminSupportTicketSerializer
     permission_classes = [IsAdminUser]
     pagination_class = StandardResultsSetPagination
@@ -366,14 +496,8 @@ class AdminSupportTicketViewSet(viewsets.ModelViewSet):
     def resolve(self, request, pk=None):
         """Mark a ticket as resolved"""
         ticket = self.get_object()
-        ticket.status = 'resolved'
-        ticket.resolved_at = timezone.now()
-        
         # Add response if provided
-        if 'response' in request.data:
-            ticket.response = request.data['response']
-            
-        ticket.save()
+        ticket.resolve(response=request.data.get('response'))
         return Response({
             'status': 'success',
             'message': f'Ticket {ticket.ticket_id} has been resolved'
@@ -382,9 +506,9 @@ class AdminSupportTicketViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def open(self, request):
         """Get only open tickets"""
-        open_tickets = SupportTicket.objects.filter(
+        open_tickets = self.get_queryset().filter(
             status__in=['new', 'in_progress']
-        ).order_by('-created_at')
+        )
         
         page = self.paginate_queryset(open_tickets)
         
@@ -394,19 +518,85 @@ class AdminSupportTicketViewSet(viewsets.ModelViewSet):
             
         serializer = self.get_serializer(open_tickets, many=True)
         return Response(serializer.data)
+    
+    @action(detail=False, methods=['get'])
+    def queue(self, request):
+        """Ticket counts per status and the oldest unassigned tickets, for polling"""
+        try:
+            limit = int(request.query_params.get('limit', TICKET_QUEUE_DEFAULT_LIMIT))
+            if limit < 1:
+                raise ValueError
+        except ValueError:
+            return Response({
+                'status': 'error',
+                'message': 'limit must be a positive integer'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        limit = min(limit, TICKET_QUEUE_MAX_LIMIT)
+        
+        # Nobody has picked up a 'new' ticket yet; oldest first, on the
+        # (status, created_at, id) index
+        ordering = ['created_at', 'id']
+        tickets = self.get_queryset().filter(status='new').order_by(*ordering)
+        
+        cursor = request.query_params.get('cursor')
+        if cursor:
+            try:
+                values = decode_cursor(cursor)
+                if len(values) != 2:
+                    raise ValueError('Invalid cursor')
+                values[0] = parse_cursor_datetime(values[0])
+            except ValueError as e:
+                return Response({
+                    'status': 'error',
+                    'message': str(e)
+                }, status=status.HTTP_400_BAD_REQUEST)
+            tickets = tickets.filter(keyset_filter(ordering, values))
+        
+        # One extra row tells whether there is more
+        tickets = list(tickets[:limit + 1])
+        next_cursor = None
+        if len(tickets) > limit:
+            tickets = tickets[:limit]
+            next_cursor = encode_cursor([tickets[-1].created_at, tickets[-1].id])
+        
+        counts = SupportTicketStatusCounter.counts()
+        return Response({
+            'status': 'success',
+            'counts': counts,
+            'open': sum(counts[ticket_status] for ticket_status in SupportTicket.OPEN_STATUSES),
+            'tickets': self.get_serializer(tickets, many=True).data,
+            'next_cursor': next_cursor
+        })
 
-class AdminReviewViewSet(viewsets.ModelViewSet):
+class AdminReviewViewSet(FullTextSearchMixin, QueryPlanMixin, viewsets.ModelViewSet):
     """ViewSet for managing Review objects"""
     queryset = Review.objects.all().order_by('-created_at')
+    query_plans = {
+        'list': {
+            'select_related': ('doctor', 'appointment'),
+            'only': concrete_field_names(Review) + DOCTOR_NAME_FIELDS + ('appointment__appointment_id',),
+        },
+        'default': {'select_related': ('doctor', 'appointment')},
+    }
     serializer_class = AdminReviewSerializer
     permission_classes = [IsAdminUser]
     pagination_class = StandardResultsSetPagination
     filter_backends = [filters.SearchFilter]
     search_fields = ['doctor__first_name', 'doctor__last_name', 'review_text']
 
-class AdminAppointmentViewSet(viewsets.ModelViewSet):
+APPOINTMENT_LIST_PLAN = {
+    'select_related': ('doctor',),
+    'only': concrete_field_names(Appointment) + DOCTOR_NAME_FIELDS,
+}
+
+class AdminAppointmentViewSet(QueryPlanMixin, viewsets.ModelViewSet):
     """ViewSet for managing Appointment objects"""
     queryset = Appointment.objects.all().order_by('-appointment_date', '-start_time')
+    query_plans = {
+        'list': APPOINTMENT_LIST_PLAN,
+        'upcoming': APPOINTMENT_LIST_PLAN,
+        'default': {'select_related': ('doctor',)},
+    }
     serializer_class = AdminAppointmentSerializer
     permission_classes = [IsAdminUser]
     pagination_class = StandardResultsSetPagination
@@ -418,7 +608,7 @@ class AdminAppointmentViewSet(viewsets.ModelViewSet):
     def upcoming(self, request):
         """Get only upcoming appointments"""
         today = timezone.now().date()
-        upcoming = Appointment.objects.filter(
+        upcoming = self.get_queryset().filter(
             appointment_date__gte=today,
             status__in=['pending', 'confirmed']
         ).order_by('appointment_date', 'start_time')
@@ -439,7 +629,7 @@ class UserManagementViewSet(viewsets.ModelViewSet):
     queryset = UserProxy.objects.all().order_by('-date_joined')
     permission_classes = [IsAdminUser]
     pagination_class = StandardResultsSetPagination
-    parser_classes = [MultiPartParser, FormParser, JSONParser]
+    parser_classes = [MultiPartParser, FormParser, ORJSONParser]
     filter_backends = [filters.SearchFilter]
     search_fields = ['email', 'name', 'phone_number']
     
@@ -605,6 +795,32 @@ class UserManagementViewSet(viewsets.ModelViewSet):
             'message': f'Admin privileges removed from {user.email}'
         })
 
+USERS_CACHE_NAMESPACE = 'admin_users'
+USER_DETAIL_CACHE_NAMESPACE = 'admin_user_detail'
+
+# Columns the users table can be sorted by
+USERS_TABLE_SORT_FIELDS = frozenset({'date_joined', 'name', 'email'})
+USERS_TABLE_MAX_PAGE_SIZE = 100
+
+
+def build_user_summary():
+    """Compute the users table summary counts in one query per table"""
+    one_week_ago = timezone.now() - timedelta(days=7)
+    user_stats = UserProxy.objects.aggregate(
+        total=Count('id'),
+        active=Count('id', filter=Q(is_active=True)),
+        new_this_week=Count('id', filter=Q(date_joined__gte=one_week_ago))
+    )
+    total_inactive_users = user_stats['total'] - user_stats['active']
+    return {
+        'total_users': user_stats['total'],
+        'total_active_users': user_stats['active'],
+        'total_inactive_users': total_inactive_users,
+        'total_blocked_users': total_inactive_users,  # For simplicity, we're treating inactive as blocked
+        'new_users_this_week': user_stats['new_this_week'],
+        'total_appointments': Appointment.objects.count(),
+    }
+
 def is_admin(user):
     """Check if the user is an admin."""
     return user.is_staff or user.is_superuser
@@ -623,21 +839,25 @@ def get_users_data(request):
     try:
         # Get query parameters
         page = int(request.GET.get('page', 1))
-        page_size = int(request.GET.get('page_size', 20))
+        page_size = min(max(int(request.GET.get('page_size', 20)), 1), USERS_TABLE_MAX_PAGE_SIZE)
+        cursor = request.GET.get('cursor')
         search = request.GET.get('search', '')
         status_filter = request.GET.get('status', 'all')
         sort_by = request.GET.get('sort_by', 'date_joined')
         sort_order = request.GET.get('sort_order', 'desc')
         
+        if sort_by not in USERS_TABLE_SORT_FIELDS:
+            return JsonResponse({'error': f'Cannot sort by {sort_by}'}, status=400)
+        
         # Build the queryset
         users_queryset = UserProxy.objects.all()
         
         # Apply search filter
         if search:
             users_queryset = users_queryset.filter(
-                name__icontains=search) | users_queryset.filter(
-                email__icontains=search) | users_queryset.filter(
-                phone_number__icontains=search
+                Q(name__icontains=search) |
+                Q(email__icontains=search) |
+                Q(phone_number__icontains=search)
             )
         
         # Apply status filter
@@ -646,29 +866,48 @@ def get_users_data(request):
         elif status_filter == 'inactive':
             users_queryset = users_queryset.filter(is_active=False)
         
-        # Apply sorting
-        if sort_order == 'desc':
-            sort_by = f'-{sort_by}'
-        users_queryset = users_queryset.order_by(sort_by)
+        # Apply sorting; id breaks ties so every row has a unique position
+        prefix = '-' if sort_order == 'desc' else ''
+        ordering = [f'{prefix}{sort_by}', f'{prefix}id']
+        users_queryset = users_queryset.order_by(*ordering)
         
-        # Count total users
-        total_users = users_queryset.count()
+        # Appointment count per user as a correlated subquery instead of one query per row
+        appointment_counts = Appointment.objects.filter(
+            patient_id=OuterRef('pk')
+        ).order_by().values('patient_id').annotate(
+            count=Count('id')
+        ).values('count')
+        users_queryset = users_queryset.annotate(
+            appointment_count=Coalesce(Subquery(appointment_counts, output_field=IntegerField()), 0)
+        )
         
-        # Calculate pagination
-        start_index = (page - 1) * page_size
-        end_index = start_index + page_size
-        paginated_users = users_queryset[start_index:end_index]
+        # Summary counts are shared by every page and cached
+        summary = get_or_build(USERS_CACHE_NAMESPACE, ('summary',), build_user_summary,
+                               settings.ADMIN_DASHBOARD_CACHE_TTL)
         
-        # Get appointment count for each user
-        # Here we're getting appointment counts from a hypothetical Appointment model
-        # In a real app, adjust this to match your actual models
-        from doctors.models import Appointment
+        if cursor:
+            # Keyset pagination: seek past the last row of the previous page
+            try:
+                values = decode_cursor(cursor)
+                if len(values) != 2:
+                    raise ValueError('Invalid cursor')
+                if sort_by == 'date_joined':
+                    values[0] = parse_cursor_datetime(values[0])
+            except ValueError as e:
+                return JsonResponse({'error': str(e)}, status=400)
+            page_queryset = users_queryset.filter(keyset_filter(ordering, values))
+        else:
+            # Page numbers are kept for existing clients; deep pages pay for the OFFSET
+            start_index = (page - 1) * page_size
+            page_queryset = users_queryset[start_index:]
+        
+        # Fetch one extra row to know whether there is a next page
+        page_users = list(page_queryset[:page_size + 1])
+        has_next = len(page_users) > page_size
+        page_users = page_users[:page_size]
         
         users_with_appointments = []
-        for user in paginated_users:
-            # Count appointments for this user
-            appointment_count = Appointment.objects.filter(patient_id=user.id).count()
-            
+        for user in page_users:
             # Format the date to match the UI expectations
             joined_date = user.date_joined.strftime('%b %d, %Y') if user.date_joined else ''
             
@@ -679,7 +918,7 @@ def get_users_data(request):
                 'email': user.email,
                 'phone_number': user.phone_number or 'N/A',
                 'joined_date': joined_date,
-                'appointment_count': appointment_count,
+                'appointment_count': user.appointment_count,
                 'is_active': user.is_active,
                 'is_staff': user.is_staff,
                 'is_superuser': user.is_superuser,
@@ -687,30 +926,34 @@ def get_users_data(request):
             }
             users_with_appointments.append(user_data)
         
-        # Get user statistics
-        total_active_users = UserProxy.objects.filter(is_active=True).count()
-        total_inactive_users = total_users - total_active_users
-        total_blocked_users = total_inactive_users  # For simplicity, we're treating inactive as blocked
+        next_cursor = None
+        if has_next:
+            last_user = page_users[-1]
+            next_cursor = encode_cursor([getattr(last_user, sort_by), last_user.id])
         
-        # Calculate new users this week
-        one_week_ago = datetime.now() - timedelta(days=7)
-        new_users_this_week = UserProxy.objects.filter(date_joined__gte=one_week_ago).count()
-        
-        # Get total appointments
-        total_appointments = Appointment.objects.count()
+        # Count matching users; unfiltered and status-only totals come from the summary
+        if search:
+            total_users = users_queryset.count() if not cursor else None
+        elif status_filter == 'active':
+            total_users = summary['total_active_users']
+        elif status_filter == 'inactive':
+            total_users = summary['total_inactive_users']
+        else:
+            total_users = summary['total_users']
         
         # Prepare response data
         response_data = {
             'users': users_with_appointments,
             'total_users': total_users,
-            'total_active_users': total_active_users,
-            'total_inactive_users': total_inactive_users,
-            'total_blocked_users': total_blocked_users,
-            'new_users_this_week': new_users_this_week,
-            'total_appointments': total_appointments,
-            'current_page': page,
-            'total_pages': (total_users + page_size - 1) // page_size,  # Ceiling division
+            'total_active_users': summary['total_active_users'],
+            'total_inactive_users': summary['total_inactive_users'],
+            'total_blocked_users': summary['total_blocked_users'],
+            'new_users_this_week': summary['new_users_this_week'],
+            'total_appointments': summary['total_appointments'],
+            'current_page': None if cursor else page,
+            'total_pages': (total_users + page_size - 1) // page_size if total_users is not None else None,  # Ceiling division
             'page_size': page_size,
+            'next_cursor': next_cursor,
         }
         
         return JsonResponse(response_data)
@@ -778,52 +1021,83 @@ def toggle_admin_status(request, user_id):
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
 
+def user_detail_namespace(user_id):
+    """Cache namespace of one user's detail panel, bumped when the user or their appointments change"""
+    return f"{USER_DETAIL_CACHE_NAMESPACE}:{user_id}"
+
+
+def build_user_details(user_id):
+    """
+    Assemble the user detail panel
+
+    Args:
+        user_id (int): User primary key
+
+    Returns:
+        dict: User details with their 10 latest appointments
+
+    Raises:
+        UserProxy.DoesNotExist: If there is no such user
+    """
+    user = UserProxy.objects.only(
+        'id', 'name', 'email', 'phone_number', 'gender', 'dob', 'date_joined', 'last_login',
+        'is_active', 'is_staff', 'is_superuser', 'profile_picture_firebase_url'
+    ).get(id=user_id)
+
+    # Doctor names come from the same query
+    appointments = Appointment.objects.filter(patient_id=user.id).select_related('doctor').only(
+        'id', 'doctor_id', 'appointment_date', 'start_time', 'package_type', 'status',
+        'doctor__first_name', 'doctor__last_name'
+    ).order_by('-appointment_date')[:10]
+
+    appointment_data = []
+    for appt in appointments:
+        doctor_name = f"Dr. {appt.doctor.first_name} {appt.doctor.last_name}" if appt.doctor else "N/A"
+
+        appointment_data.append({
+            'id': appt.id,
+            'doctor_name': doctor_name,
+            'doctor_id': appt.doctor_id,
+            'date': appt.appointment_date.strftime('%d %b, %Y') if appt.appointment_date else '',
+            'time': appt.start_time.strftime('%I:%M %p') if appt.start_time else '',
+            'type': appt.package_type,
+            'status': appt.status,
+        })
+
+    return {
+        'id': user.id,
+        'name': user.name,
+        'email': user.email,
+        'phone_number': user.phone_number or 'N/A',
+        'gender': user.gender,
+        'gender_display': 'Male' if user.gender == 'M' else ('Female' if user.gender == 'F' else 'Other'),
+        'dob': user.dob.strftime('%d %b, %Y') if user.dob else 'N/A',
+        'age': calculate_age(user.dob) if user.dob else 'N/A',
+        'joined_date': user.date_joined.strftime('%d %b, %Y') if user.date_joined else '',
+        'last_login': user.last_login.strftime('%d %b, %Y') if user.last_login else 'Never',
+        'is_active': user.is_active,
+        'is_staff': user.is_staff,
+        'is_superuser': user.is_superuser,
+        'profile_picture_url': user.profile_picture_firebase_url or '',
+        'appointments': appointment_data,
+        'appointment_count': len(appointment_data),
+    }
+
+
 @login_required
 @user_passes_test(is_admin)
 def get_user_details(request, user_id):
     """API endpoint to get detailed information about a specific user."""
     try:
-        user = UserProxy.objects.get(id=user_id)
-        
-        # Get user appointments
-        from doctors.models import Appointment, Doctor
-        
-        appointments = Appointment.objects.filter(patient_id=user.id).order_by('-appointment_date')[:10]
-        
-        appointment_data = []
-        for appt in appointments:
-            doctor_name = f"Dr. {appt.doctor.first_name} {appt.doctor.last_name}" if appt.doctor else "N/A"
-            
-            appointment_data.append({
-                'id': appt.id,
-                'doctor_name': doctor_name,
-                'doctor_id': appt.doctor_id,
-                'date': appt.appointment_date.strftime('%d %b, %Y') if appt.appointment_date else '',
-                'time': appt.start_time.strftime('%I:%M %p') if appt.start_time else '',
-                'type': appt.appointment_type,
-                'status': appt.status,
-            })
-        
-        # Format the user details
-        user_data = {
-            'id': user.id,
-            'name': user.name,
-            'email': user.email,
-            'phone_number': user.phone_number or 'N/A',
-            'gender': user.gender,
-            'gender_display': 'Male' if user.gender == 'M' else ('Female' if user.gender == 'F' else 'Other'),
-            'dob': user.dob.strftime('%d %b, %Y') if user.dob else 'N/A',
-            'age': calculate_age(user.dob) if user.dob else 'N/A',
-            'joined_date': user.date_joined.strftime('%d %b, %Y') if user.date_joined else '',
-            'last_login': user.last_login.strftime('%d %b, %Y') if user.last_login else 'Never',
-            'is_active': user.is_active,
-            'is_staff': user.is_staff,
-            'is_superuser': user.is_superuser,
-            'profile_picture_url': user.profile_picture_firebase_url or '',
-            'appointments': appointment_data,
-            'appointment_count': len(appointment_data),
-        }
-        
+        # Keyed by date as well, so the age rolls over on birthdays
+        user_data = get_or_build(
+            user_detail_namespace(user_id),
+            (timezone.localdate().isoformat(),),
+            lambda: build_user_details(user_id),
+            settings.ADMIN_USER_DETAIL_CACHE_TTL,
+            version_timeout=settings.ADMIN_USER_DETAIL_VERSION_TTL
+        )
+
         return JsonResponse(user_data)
         
     except UserProxy.DoesNotExist:
@@ -374,10 +374,226 @@ finally:
         conn.close()
 "
 
+# Migrations are faked on deploy, so tables added by later migrations are
+# created here with the SQL Django would run. Each file must be safe to run
+# on every deploy (IF NOT EXISTS / ON CONFLICT).
+run_sql_file() {
+    python -c "
+import os
+import sys
+import psycopg2
+
+path, label = sys.argv[1], sys.argv[2]
+
+# Connect to the database
+try:
+    conn = psycopg2.connect(os.environ.get('DATABASE_URL'))
+    conn.autocommit = True  # Set autocommit mode
+    cursor = conn.cursor()
+
+    # Read the SQL file
+    with open(path, 'r') as f:
+        sql = f.read()
+
+    # Execute the SQL
+    cursor.execute(sql)
+    print(f'{label} SQL executed successfully')
+except Exception as e:
+    print(f'Error executing {label} SQL: {e}')
+finally:
+    if 'conn' in locals() and conn:
+        if 'cursor' in locals() and cursor:
+            cursor.close()
+        conn.close()
+" "$1" "$2"
+}
+
+# Chat message store tables (chat/migrations/0002_message_store), used when
+# CHAT_MESSAGE_STORE=sql
+echo "Creating chat message store tables directly..."
+cat > create_chat_store_tables.sql << EOL
+CREATE TABLE IF NOT EXISTS chat_chatmessage (
+    id BIGINT NOT NULL PRIMARY KEY GENERATED BY DEFAULT AS IDENTITY,
+    chat_id VARCHAR(255) NOT NULL,
+    text TEXT NOT NULL,
+    sender_id VARCHAR(50) NOT NULL,
+    sender_type VARCHAR(10) NOT NULL,
+    "timestamp" TIMESTAMP WITH TIME ZONE NOT NULL,
+    read BOOLEAN NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS chat_chatroom (
+    id BIGINT NOT NULL PRIMARY KEY GENERATED BY DEFAULT AS IDENTITY,
+    chat_id VARCHAR(255) NOT NULL UNIQUE,
+    appointment_id VARCHAR(20),
+    doctor_id INTEGER,
+    patient_id INTEGER,
+    last_message_text TEXT,
+    last_message_sender VARCHAR(50),
+    last_message_at TIMESTAMP WITH TIME ZONE,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS chat_chatme_chat_id_841849_idx ON chat_chatmessage(chat_id, "timestamp");
+CREATE INDEX IF NOT EXISTS chat_chatme_chat_id_97acac_idx ON chat_chatmessage(chat_id, read);
+CREATE INDEX IF NOT EXISTS chat_chatroom_chat_id_f2c29e4d_like ON chat_chatroom(chat_id varchar_pattern_ops);
+CREATE INDEX IF NOT EXISTS chat_chatro_doctor__ec6da7_idx ON chat_chatroom(doctor_id, updated_at);
+CREATE INDEX IF NOT EXISTS chat_chatro_patient_c5b7e7_idx ON chat_chatroom(patient_id, updated_at);
+EOL
+run_sql_file create_chat_store_tables.sql "Chat message store tables"
+
+# Chat provisioning outbox (chat/migrations/0003_chat_outbox). Appointments
+# only get a chat once their outbox row is drained, so this table is required.
+echo "Creating chat outbox table directly..."
+cat > create_chat_outbox_table.sql << EOL
+CREATE TABLE IF NOT EXISTS chat_chatoutbox (
+    id BIGINT NOT NULL PRIMARY KEY GENERATED BY DEFAULT AS IDENTITY,
+    status VARCHAR(20) NOT NULL,
+    attempts INTEGER NOT NULL CHECK (attempts >= 0),
+    next_attempt_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    locked_at TIMESTAMP WITH TIME ZONE,
+    last_error TEXT,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    appointment_id BIGINT NOT NULL UNIQUE
+        REFERENCES doctors_appointment(id) DEFERRABLE INITIALLY DEFERRED
+);
+
+CREATE INDEX IF NOT EXISTS chat_chatou_status_b74c72_idx ON chat_chatoutbox(status, next_attempt_at);
+EOL
+run_sql_file create_chat_outbox_table.sql "Chat outbox table"
+
+# Daily appointment statistics rollups (doctors/migrations/0012_daily_appointment_stats).
+# The migration's backfill doesn't run under --fake; the rollups are rebuilt
+# below once migrations are marked as applied.
+echo "Creating appointment stats tables directly..."
+cat > create_appointment_stats_tables.sql << EOL
+CREATE TABLE IF NOT EXISTS doctors_statswatermark (
+    id BIGINT NOT NULL PRIMARY KEY GENERATED BY DEFAULT AS IDENTITY,
+    name VARCHAR(100) NOT NULL UNIQUE,
+    last_processed_at TIMESTAMP WITH TIME ZONE,
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS doctors_dailyappointmentstats (
+    id BIGINT NOT NULL PRIMARY KEY GENERATED BY DEFAULT AS IDENTITY,
+    date DATE NOT NULL,
+    package_type VARCHAR(20) NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    appointment_count INTEGER NOT NULL,
+    total_amount NUMERIC(14, 2) NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    doctor_id BIGINT NOT NULL
+        REFERENCES doctors_doctor(id) DEFERRABLE INITIALLY DEFERRED,
+    CONSTRAINT unique_daily_appointment_stats UNIQUE (date, doctor_id, package_type, status)
+);
+
+CREATE INDEX IF NOT EXISTS doctors_statswatermark_name_c03500d3_like ON doctors_statswatermark(name varchar_pattern_ops);
+CREATE INDEX IF NOT EXISTS doctors_dailyappointmentstats_doctor_id_53c47b35 ON doctors_dailyappointmentstats(doctor_id);
+CREATE INDEX IF NOT EXISTS doctors_dai_doctor__f04aa0_idx ON doctors_dailyappointmentstats(doctor_id, date);
+EOL
+run_sql_file create_appointment_stats_tables.sql "Appointment stats tables"
+
+# Support ticket status counters (doctors/migrations/0014_support_ticket_status_counter). They
+# are recounted on every deploy, which seeds them the first time and repairs
+# any drift from failed counter updates or queryset.update() on status.
+echo "Creating support ticket counters directly..."
+cat > create_ticket_counter_table.sql << EOL
+CREATE TABLE IF NOT EXISTS doctors_supportticketstatuscounter (
+    id BIGINT NOT NULL PRIMARY KEY GENERATED BY DEFAULT AS IDENTITY,
+    status VARCHAR(20) NOT NULL UNIQUE,
+    count INTEGER NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS doctors_supportticketstatuscounter_status_5fa793e6_like ON doctors_supportticketstatuscounter(status varchar_pattern_ops);
+CREATE INDEX IF NOT EXISTS doctors_sup_status_e4b91a_idx ON doctors_supportticket(status, created_at, id);
+
+BEGIN;
+-- Hold off ticket writes while counting so no change slips in between
+LOCK TABLE doctors_supportticket IN SHARE MODE;
+INSERT INTO doctors_supportticketstatuscounter (status, count)
+SELECT status, count(*) FROM doctors_supportticket GROUP BY status
+ON CONFLICT (status) DO UPDATE SET count = EXCLUDED.count;
+UPDATE doctors_supportticketstatuscounter SET count = 0
+WHERE status NOT IN (SELECT DISTINCT status FROM doctors_supportticket);
+COMMIT;
+EOL
+run_sql_file create_ticket_counter_table.sql "Support ticket counters"
+
+# Delta sync tombstones and (owner, updated_at, id) indexes
+# (doctors/migrations/0016_delta_sync). Every appointment, review and
+# ticket delete writes a tombstone.
+echo "Creating sync tombstones table directly..."
+cat > create_sync_tables.sql << EOL
+CREATE TABLE IF NOT EXISTS doctors_tombstone (
+    id BIGINT NOT NULL PRIMARY KEY GENERATED BY DEFAULT AS IDENTITY,
+    kind VARCHAR(20) NOT NULL,
+    object_id INTEGER NOT NULL,
+    doctor_id INTEGER,
+    patient_id INTEGER,
+    deleted_at TIMESTAMP WITH TIME ZONE NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS doctors_tom_doctor__415db3_idx ON doctors_tombstone(doctor_id, deleted_at, id);
+CREATE INDEX IF NOT EXISTS doctors_tom_patient_511985_idx ON doctors_tombstone(patient_id, deleted_at, id);
+CREATE INDEX IF NOT EXISTS doctors_tom_deleted_45b5f4_idx ON doctors_tombstone(deleted_at);
+
+CREATE INDEX IF NOT EXISTS doctors_app_doctor__9a5cef_idx ON doctors_appointment(doctor_id, updated_at, id);
+CREATE INDEX IF NOT EXISTS doctors_app_patient_2bdb8b_idx ON doctors_appointment(patient_id, updated_at, id);
+CREATE INDEX IF NOT EXISTS doctors_rev_doctor__4b8651_idx ON doctors_review(doctor_id, updated_at, id);
+CREATE INDEX IF NOT EXISTS doctors_rev_patient_add6e1_idx ON doctors_review(patient_id, updated_at, id);
+CREATE INDEX IF NOT EXISTS doctors_sup_doctor__18a80e_idx ON doctors_supportticket(doctor_id, updated_at, id);
+CREATE INDEX IF NOT EXISTS doctors_sup_patient_8f0c81_idx ON doctors_supportticket(patient_id, updated_at, id);
+EOL
+run_sql_file create_sync_tables.sql "Sync tombstones"
+
+# Full-text search GIN indexes (doctors/migrations/0013_full_text_search),
+# built from the expressions in that migration so they stay in step with
+# doctors.search
+echo "Creating full-text search indexes directly..."
+python -c "
+import importlib
+import os
+import psycopg2
+
+indexes = importlib.import_module('doctors.migrations.0013_full_text_search').POSTGRES_INDEXES
+
+# Connect to the database
+try:
+    conn = psycopg2.connect(os.environ.get('DATABASE_URL'))
+    conn.autocommit = True  # Set autocommit mode
+    cursor = conn.cursor()
+
+    for name, (table, expression) in indexes.items():
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {table} USING GIN (({expression}))')
+    print('Full-text search indexes created successfully')
+except Exception as e:
+    print(f'Error creating full-text search indexes: {e}')
+finally:
+    if 'conn' in locals() and conn:
+        if 'cursor' in locals() and cursor:
+            cursor.close()
+        conn.close()
+"
+
+# Doctor patient roster index (doctors/migrations/0015_appointment_patient_roster_index)
+echo "Creating patient roster index directly..."
+cat > create_roster_index.sql << EOL
+CREATE INDEX IF NOT EXISTS doctors_app_doctor__a23fb8_idx ON doctors_appointment(doctor_id, patient_id, appointment_date);
+EOL
+run_sql_file create_roster_index.sql "Patient roster index"
+
 # Apply our specific migrations
 echo "Applying migrations..."
 python manage.py migrate --fake
 
+# Rebuild the appointment stats rollups: backfills them on the first deploy
+# and repairs changes the incremental catch-up can't see (deletes and
+# queryset updates that bypass the signals and leave updated_at alone)
+echo "Rebuilding appointment stats rollups..."
+python manage.py rollup_appointment_stats --full || echo "Error rebuilding appointment stats rollups"
+
 # Collect static files
 echo "Collecting static files..."
 python manage.py collectstatic --no-input
@@ -1,12 +1,10 @@
-import os
-import json
-import firebase_admin
-from firebase_admin import credentials, firestore
+from firebase_admin import firestore
 import logging
 import uuid
 from datetime import datetime
 from django.conf import settings
 import traceback
+from mediconnect_project.firebase_registry import firebase_registry
 
 logger = logging.getLogger(__name__)
 
@@ -14,96 +12,10 @@ class FirebaseChat:
     """
     Utility class for Firebase Firestore chat operations
     """
-    _firestore_client = None
-    _app_initialized = False
-    
     @classmethod
     def get_firestore_client(cls):
-        """Get or initialize the Firestore client with better error handling"""
-        if cls._firestore_client:
-            return cls._firestore_client
-            
-        try:
-            # Check if Firebase is already initialized
-            if cls._app_initialized:
-                logger.info("Using existing Firebase app for Firestore")
-            else:
-                # Initialize Firebase with credentials from environment
-                logger.info("Initializing Firebase app for Firestore")
-                service_account_json = os.environ.get('FIREBASE_SERVICE_ACCOUNT_JSON')
-                
-                if not service_account_json:
-                    logger.error("FIREBASE_SERVICE_ACCOUNT_JSON environment variable not set")
-                    logger.error("Available env vars: %s", str(os.environ.keys()))
-                    return None
-                
-                try:
-                    # Try to parse the JSON string
-                    service_account_info = json.loads(service_account_json)
-                    creds = credentials.Certificate(service_account_info)
-                    
-                    # Make sure we have a unique app name to avoid conflicts
-                    app_name = f"firestore-{uuid.uuid4()}"
-                    
-                    # Create app with error handling
-                    try:
-                        app = firebase_admin.initialize_app(creds, name=app_name)
-                        cls._app_initialized = True
-                        logger.info("Firebase app initialized successfully")
-                    except ValueError as e:
-                        # App already exists with this name, try to get it
-                        if "already exists" in str(e):
-                            logger.warning("Firebase app already exists, attempting to get it")
-                            # We'll handle this by continuing and trying to get the client
-                            cls._app_initialized = True
-                        else:
-                            raise
-                        
-                except json.JSONDecodeError:
-                    # If it's not a JSON string, it might be a path to a file
-                    logger.info("Service account isn't JSON, trying as file path")
-                    if os.path.exists(service_account_json):
-                        creds = credentials.Certificate(service_account_json)
-                        app = firebase_admin.initialize_app(creds, name=f"firestore-{uuid.uuid4()}")
-                        cls._app_initialized = True
-                        logger.info("Firebase app initialized successfully from file")
-                    else:
-                        logger.error("Service account JSON is neither valid JSON nor a valid file path")
-                        return None
-            
-            # Get Firestore client
-            try:
-                # Try to get the default app first
-                app = firebase_admin.get_app()
-                db = firestore.client(app)
-                cls._firestore_client = db
-                logger.info("Successfully connected to Firestore with default app")
-                return db
-            except ValueError:
-                # No default app, try to get app by name
-                try:
-                    # Try to find any initialized app
-                    for app_name in firebase_admin._apps:
-                        if app_name:
-                            app = firebase_admin.get_app(app_name)
-                            db = firestore.client(app)
-                            cls._firestore_client = db
-                            logger.info(f"Successfully connected to Firestore with app: {app_name}")
-                            return db
-                            
-                    # If we get here, no app was found
-                    logger.error("No Firebase app found after initialization attempt")
-                    return None
-                except Exception as e:
-                    logger.error(f"Error getting Firebase app: {e}")
-                    return None
-                    
-        except Exception as e:
-            logger.error(f"Error getting Firestore client: {e}")
-            logger.error(traceback.format_exc())
-            return None
-            
-        return None
+        """Get the process-wide Firestore client from the Firebase registry"""
+        return firebase_registry.get_firestore()
     
     @staticmethod
     def create_chat(doctor_id, patient_id, appointment_id):
@@ -182,7 +94,7 @@ class FirebaseChat:
             text (str): Message text
             
         Returns:
-            bool: Success status
+            dict: The stored message data including its ID, or False if failed
         """
         db = FirebaseChat.get_firestore_client()
         if not db:
@@ -240,7 +152,7 @@ class FirebaseChat:
                 })
                 logger.info(f"Updated lastMessage for chat {chat_id}")
                 
-                return True
+                return {'id': message_ref.id, **message_data}
             except Exception as inner_e:
                 logger.error(f"Error in the message sending process: {inner_e}")
                 logger.error(traceback.format_exc())
@@ -0,0 +1,133 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from datetime import timedelta
+import time
+import logging
+
+from chat.message_store import MESSAGE_STORE_BACKENDS, FirestoreMessageStore, load_message_store
+
+logger = logging.getLogger(__name__)
+
+
+class RollbackBenchmark(Exception):
+    """Raised to discard the rows written while benchmarking the SQL store"""
+
+
+class Command(BaseCommand):
+    help = 'Compare throughput of the chat message store backends'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--backend',
+            action='append',
+            dest='backends',
+            help="Backend alias or dotted path (repeatable, default: sql and memory)"
+        )
+        parser.add_argument('--chats', type=int, default=10, help='Number of chats to create')
+        parser.add_argument('--messages', type=int, default=200, help='Messages sent per chat')
+        parser.add_argument('--reads', type=int, default=200, help='Read operations per chat')
+        parser.add_argument(
+            '--allow-live',
+            action='store_true',
+            help='Allow benchmarking firestore, which writes to the live project and is not cleaned up'
+        )
+        parser.add_argument('--doctor-id', type=int, help='Doctor the benchmark chats belong to (required for firestore)')
+        parser.add_argument('--patient-id', type=int, help='Patient the benchmark chats belong to (required for firestore)')
+
+    def handle(self, *args, **options):
+        backends = options['backends'] or ['sql', 'memory']
+
+        for backend in backends:
+            try:
+                store = load_message_store(backend)
+            except ImportError as e:
+                raise CommandError(
+                    f"Unknown backend {backend!r}, use one of {', '.join(MESSAGE_STORE_BACKENDS)} "
+                    f"or a dotted path ({e})"
+                )
+
+            if isinstance(store, FirestoreMessageStore):
+                # Nothing rolls back or deletes Firestore documents, so the
+                # chats must go to accounts nobody uses
+                if not (options['allow_live'] and options['doctor_id'] and options['patient_id']):
+                    raise CommandError(
+                        'firestore writes chats and messages to the live Firestore project and leaves '
+                        'them there; pass --allow-live with a throwaway --doctor-id and --patient-id'
+                    )
+                self.stdout.write(self.style.WARNING(
+                    f"Benchmarking firestore writes to the live Firestore project as doctor "
+                    f"{options['doctor_id']} and patient {options['patient_id']}"
+                ))
+
+            self.stdout.write(self.style.SUCCESS(f'Benchmarking {store.__class__.__name__}...'))
+
+            try:
+                # Run inside a transaction so the SQL store leaves no rows behind
+                with transaction.atomic():
+                    results = self._run(store, options)
+                    raise RollbackBenchmark()
+            except RollbackBenchmark:
+                pass
+
+            for operation, count, elapsed in results:
+                rate = count / elapsed if elapsed else float('inf')
+                self.stdout.write(
+                    f'  {operation:<16} {count:>8} ops  {elapsed:8.3f}s  {rate:10.1f} ops/s'
+                )
+
+    def _run(self, store, options):
+        """Run each store operation and return (operation, count, seconds) tuples"""
+        results = []
+        chat_count = options['chats']
+        message_count = options['messages']
+        read_count = options['reads']
+
+        doctor_id = options['doctor_id'] or 1
+        patient_id = options['patient_id']
+
+        start = time.perf_counter()
+        chat_ids = [
+            store.create_chat(
+                doctor_id=doctor_id,
+                patient_id=patient_id if patient_id is not None else index,
+                appointment_id=f'BENCH{index}'
+            )
+            for index in range(chat_count)
+        ]
+        results.append(('create_chat', chat_count, time.perf_counter() - start))
+
+        start = time.perf_counter()
+        for chat_index, chat_id in enumerate(chat_ids):
+            for index in range(message_count):
+                if index % 2:
+                    user_id, user_type = doctor_id, 'doctor'
+                else:
+                    user_id, user_type = (patient_id if patient_id is not None else chat_index), 'patient'
+                store.send_message(chat_id, user_id, user_type, f'Benchmark message {index}')
+        results.append(('send_message', chat_count * message_count, time.perf_counter() - start))
+
+        start = time.perf_counter()
+        for chat_id in chat_ids:
+            for _ in range(read_count):
+                store.get_messages(chat_id, limit=50)
+        results.append(('get_messages', chat_count * read_count, time.perf_counter() - start))
+
+        since = timezone.now() - timedelta(seconds=1)
+        start = time.perf_counter()
+        for chat_id in chat_ids:
+            for _ in range(read_count):
+                store.get_since(chat_id, since)
+        results.append(('get_since', chat_count * read_count, time.perf_counter() - start))
+
+        start = time.perf_counter()
+        for chat_id in chat_ids:
+            store.mark_read(chat_id, doctor_id, 'doctor')
+        results.append(('mark_read', chat_count, time.perf_counter() - start))
+
+        start = time.perf_counter()
+        for _ in range(read_count):
+            store.list_user_chats(doctor_id, 'doctor')
+        results.append(('list_user_chats', read_count, time.perf_counter() - start))
+
+        return results
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+import time
+import logging
+
+from chat.provisioning import drain_outbox
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Create pending chats from the chat provisioning outbox'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep polling the outbox until interrupted')
+        parser.add_argument('--interval', type=float, default=2.0, help='Seconds between polls in --loop mode')
+        parser.add_argument('--batch-size', type=int, default=50, help='Rows claimed per batch')
+        parser.add_argument('--workers', type=int, default=None, help='Concurrent provisioning threads')
+
+    def handle(self, *args, **options):
+        while True:
+            succeeded, failed = drain_outbox(
+                batch_size=options['batch_size'],
+                workers=options['workers']
+            )
+            if succeeded or failed or not options['loop']:
+                self.stdout.write(self.style.SUCCESS(
+                    f'Processed chat outbox: {succeeded} succeeded, {failed} failed'
+                ))
+
+            if not options['loop']:
+                break
+
+            # Don't hold a connection open between polls
+            connection.close()
+            time.sleep(options['interval'])
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+import logging
+
+from doctors.models import Appointment
+from chat.provisioning import drain_outbox, enqueue_missing_chats
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Create chats for appointments that are missing them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many chats are missing')
+        parser.add_argument('--limit', type=int, default=None, help='Maximum number of appointments to queue')
+        parser.add_argument('--workers', type=int, default=8, help='Concurrent provisioning threads')
+        parser.add_argument('--batch-size', type=int, default=100, help='Rows claimed per batch')
+
+    def handle(self, *args, **options):
+        missing = Appointment.objects.filter(chat__isnull=True).count()
+        self.stdout.write(f'{missing} appointments have no chat')
+
+        if options['dry_run'] or not missing:
+            return
+
+        queued = enqueue_missing_chats(limit=options['limit'])
+        self.stdout.write(f'Queued {queued} appointments, creating chats with {options["workers"]} workers...')
+
+        succeeded, failed = drain_outbox(
+            batch_size=options['batch_size'],
+            workers=options['workers']
+        )
+
+        style = self.style.SUCCESS if not failed else self.style.WARNING
+        self.stdout.write(style(f'Created {succeeded} chats, {failed} failed (failed rows will be retried)'))
@@ -0,0 +1,278 @@
+"""
+Write-through cache of the most recent messages per chat
+
+Opening a chat reads the latest messages from the message store every time,
+for both participants. RecentMessageCache keeps the newest messages of active
+chats in process memory, evicting whole chats LRU once a total byte budget is
+exceeded. CachedMessageStore wraps any MessageStore with it.
+
+Each cached chat is tagged with a version kept in Django's cache. Every write
+sets a new version, so a worker whose copy is older than another worker's
+write misses and re-reads the store. With a shared cache (e.g. Redis) this
+keeps workers consistent. With the per-process default a worker can serve
+stale history until the TTL expires, so CHAT_MESSAGE_CACHE_ENABLED defaults
+to on only when REDIS_URL is set.
+"""
+
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import cache
+
+from .message_store import MessageStore, _as_aware
+
+logger = logging.getLogger(__name__)
+
+# Rough per-message overhead of the dict, keys, timestamp and id
+MESSAGE_OVERHEAD_BYTES = 600
+
+
+def _version_key(chat_id):
+    return f"chat:messages:version:{chat_id}"
+
+
+def _message_size(message):
+    return MESSAGE_OVERHEAD_BYTES + sys.getsizeof(message.get('text') or '')
+
+
+def _normalize(message):
+    """Copy a message with an aware timestamp so cached messages compare consistently"""
+    message = dict(message)
+    if message.get('timestamp') is not None:
+        message['timestamp'] = _as_aware(message['timestamp'])
+    return message
+
+
+class _Entry:
+    __slots__ = ('messages', 'complete', 'version', 'expires_at', 'size')
+
+    def __init__(self, messages, complete, version, expires_at):
+        self.messages = messages
+        self.complete = complete
+        self.version = version
+        self.expires_at = expires_at
+        self.size = sum(_message_size(message) for message in messages)
+
+
+class RecentMessageCache:
+    """LRU cache of the newest messages per chat with a total memory budget"""
+
+    def __init__(self, max_messages=50, max_bytes=16 * 1024 * 1024, ttl=300):
+        self.max_messages = max_messages
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def current_version(self, chat_id):
+        """Version of the chat in the shared cache; read before fetching from the store"""
+        return cache.get(_version_key(chat_id))
+
+    def _bump_version(self, chat_id):
+        version = time.time_ns()
+        cache.set(_version_key(chat_id), version, None)
+        return version
+
+    def _fresh_entry(self, chat_id):
+        """Return the entry if it is still valid; caller holds the lock"""
+        entry = self._entries.get(chat_id)
+        if entry is None:
+            return None
+        if entry.expires_at is not None and entry.expires_at < time.monotonic():
+            self._remove(chat_id)
+            return None
+        return entry
+
+    def _validate(self, chat_id):
+        """Fresh entry whose version matches the shared version, else None"""
+        shared_version = self.current_version(chat_id)
+        with self._lock:
+            entry = self._fresh_entry(chat_id)
+            if entry is not None and entry.version != shared_version:
+                self._remove(chat_id)
+                entry = None
+            return entry
+
+    def _remove(self, chat_id):
+        entry = self._entries.pop(chat_id, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def _store(self, chat_id, entry):
+        """Insert an entry as most recently used and enforce the byte budget; caller holds the lock"""
+        self._remove(chat_id)
+        self._entries[chat_id] = entry
+        self._bytes += entry.size
+
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            evicted_id, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.size
+            self._stats['evictions'] += 1
+            logger.debug(f"Evicted cached messages for chat {evicted_id}")
+
+    def get(self, chat_id, limit):
+        """
+        Get the newest messages of a chat
+
+        Returns:
+            list: Up to limit messages in chronological order, or None on a miss
+        """
+        entry = self._validate(chat_id)
+        with self._lock:
+            if entry is None or (limit > len(entry.messages) and not entry.complete):
+                self._stats['misses'] += 1
+                return None
+            self._entries.move_to_end(chat_id)
+            self._stats['hits'] += 1
+            return [dict(message) for message in entry.messages[-limit:]] if limit else []
+
+    def get_since(self, chat_id, since_datetime, limit):
+        """
+        Get cached messages newer than since_datetime
+
+        Returns:
+            list: Messages in chronological order, or None if the cache can't answer
+        """
+        since_datetime = _as_aware(since_datetime)
+        entry = self._validate(chat_id)
+        with self._lock:
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            messages = entry.messages
+            oldest = messages[0]['timestamp'] if messages else None
+            if not entry.complete and (oldest is None or since_datetime < oldest):
+                # Messages older than the cached window may be newer than since_datetime
+                self._stats['misses'] += 1
+                return None
+            self._entries.move_to_end(chat_id)
+            self._stats['hits'] += 1
+            newer = [dict(message) for message in messages if message['timestamp'] > since_datetime]
+            return newer[:limit]
+
+    def put(self, chat_id, messages, complete, version):
+        """
+        Cache messages read from the store
+
+        Args:
+            chat_id (str): Chat ID
+            messages (list): Newest messages in chronological order
+            complete (bool): True if these are all messages of the chat
+            version: Shared version read before the messages were fetched
+        """
+        complete = complete and len(messages) <= self.max_messages
+        messages = [_normalize(message) for message in messages[-self.max_messages:]]
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._store(chat_id, _Entry(messages, complete, version, expires_at))
+
+    def append(self, chat_id, message):
+        """Write a newly sent message through to the cached chat, if cached"""
+        # Validate first so a copy that missed another worker's write isn't relabelled as current
+        entry = self._validate(chat_id)
+        version = self._bump_version(chat_id)
+        with self._lock:
+            if entry is None or self._entries.get(chat_id) is not entry:
+                return
+            messages = entry.messages + [_normalize(message)]
+            complete = entry.complete
+            if len(messages) > self.max_messages:
+                messages = messages[-self.max_messages:]
+                complete = False
+            self._store(chat_id, _Entry(messages, complete, version, entry.expires_at))
+
+    def has_unread(self, chat_id, reader_id):
+        """
+        Whether the cached window holds messages the reader hasn't read
+
+        Returns:
+            bool: None if the chat isn't cached or is stale
+        """
+        entry = self._validate(chat_id)
+        if entry is None:
+            return None
+        with self._lock:
+            return any(
+                not message['read'] and message['senderId'] != reader_id
+                for message in entry.messages
+            )
+
+    def mark_read(self, chat_id, reader_id):
+        """Write a mark-as-read through to the cached chat, if cached"""
+        entry = self._validate(chat_id)
+        version = self._bump_version(chat_id)
+        with self._lock:
+            if entry is None or self._entries.get(chat_id) is not entry:
+                return
+            for message in entry.messages:
+                if message['senderId'] != reader_id:
+                    message['read'] = True
+            entry.version = version
+
+    def invalidate(self, chat_id):
+        with self._lock:
+            self._remove(chat_id)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update({'chats': len(self._entries), 'bytes': self._bytes, 'max_bytes': self.max_bytes})
+            return stats
+
+
+class CachedMessageStore(MessageStore):
+    """MessageStore wrapper serving recent messages from a RecentMessageCache"""
+
+    def __init__(self, store, message_cache):
+        self.store = store
+        self.cache = message_cache
+
+    def create_chat(self, doctor_id, patient_id, appointment_id):
+        return self.store.create_chat(doctor_id, patient_id, appointment_id)
+
+    def send_message(self, chat_id, user_id, user_type, text):
+        message = self.store.send_message(chat_id, user_id, user_type, text)
+        if message:
+            self.cache.append(chat_id, message)
+        else:
+            self.cache.invalidate(chat_id)
+        return message
+
+    def get_messages(self, chat_id, limit=50):
+        messages = self.cache.get(chat_id, limit)
+        if messages is not None:
+            return messages
+
+        version = self.cache.current_version(chat_id)
+        fetch_limit = max(limit, self.cache.max_messages)
+        messages = self.store.get_messages(chat_id, limit=fetch_limit)
+        if messages:
+            self.cache.put(chat_id, messages, complete=len(messages) < fetch_limit, version=version)
+        return messages[-limit:] if limit else []
+
+    def get_since(self, chat_id, since_datetime, limit=100):
+        messages = self.cache.get_since(chat_id, since_datetime, limit)
+        if messages is not None:
+            return messages
+        return self.store.get_since(chat_id, since_datetime, limit=limit)
+
+    def mark_read(self, chat_id, user_id, user_type):
+        reader_id = f"{user_type}_{user_id}"
+        if self.cache.has_unread(chat_id, reader_id) is False:
+            # Nothing to mark; skip the store round trip and keep other workers' caches valid
+            return True
+
+        success = self.store.mark_read(chat_id, user_id, user_type)
+        if success:
+            self.cache.mark_read(chat_id, reader_id)
+        else:
+            self.cache.invalidate(chat_id)
+        return success
+
+    def list_user_chats(self, user_id, user_type):
+        return self.store.list_user_chats(user_id, user_type)
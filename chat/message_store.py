@@ -0,0 +1,417 @@
+"""
+Pluggable storage backends for chat messages
+
+The chat views talk to a MessageStore instead of a concrete service so that
+chat can run on Firestore, on the Django database or purely in memory. The
+backend is selected with the CHAT_MESSAGE_STORE setting.
+"""
+
+import bisect
+import logging
+import threading
+import traceback
+import uuid
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .firebase_utils import FirebaseChat
+
+logger = logging.getLogger(__name__)
+
+WELCOME_MESSAGE = (
+    "Welcome to your appointment chat. You can use this to communicate "
+    "before and after your appointment."
+)
+
+
+def _as_aware(value):
+    """Treat naive datetimes as UTC so they can be compared with stored timestamps"""
+    if timezone.is_naive(value):
+        return timezone.make_aware(value, dt_timezone.utc)
+    return value
+
+
+class MessageStore:
+    """
+    Interface for chat message storage backends
+
+    Messages are returned as dictionaries with the keys expected by
+    MessageSerializer: id, text, senderId, senderType, timestamp and read.
+    """
+
+    def create_chat(self, doctor_id, patient_id, appointment_id):
+        """
+        Create a new chat with a welcome message
+
+        Args:
+            doctor_id (int): Doctor's ID
+            patient_id (int): Patient's ID
+            appointment_id (str): Appointment ID the chat belongs to
+
+        Returns:
+            str: Chat ID or None if failed
+        """
+        raise NotImplementedError
+
+    def send_message(self, chat_id, user_id, user_type, text):
+        """
+        Store a message in a chat
+
+        Args:
+            chat_id (str): Chat ID
+            user_id (int): ID of the sender
+            user_type (str): 'doctor' or 'patient'
+            text (str): Message text
+
+        Returns:
+            dict: The stored message or None if failed
+        """
+        raise NotImplementedError
+
+    def get_messages(self, chat_id, limit=50):
+        """
+        Get the most recent messages of a chat in chronological order
+
+        Args:
+            chat_id (str): Chat ID
+            limit (int): Maximum number of messages to retrieve
+
+        Returns:
+            list: List of messages or empty list if none or error
+        """
+        raise NotImplementedError
+
+    def get_since(self, chat_id, since_datetime, limit=100):
+        """
+        Get messages created after a specific datetime in chronological order
+
+        Args:
+            chat_id (str): Chat ID
+            since_datetime (datetime): Only fetch messages created after this time
+            limit (int): Maximum number of messages to retrieve
+
+        Returns:
+            list: List of messages or empty list if none or error
+        """
+        raise NotImplementedError
+
+    def mark_read(self, chat_id, user_id, user_type):
+        """
+        Mark all messages sent by the other participant as read
+
+        Args:
+            chat_id (str): Chat ID
+            user_id (int): ID of the reader
+            user_type (str): 'doctor' or 'patient'
+
+        Returns:
+            bool: Success status
+        """
+        raise NotImplementedError
+
+    def list_user_chats(self, user_id, user_type):
+        """
+        Get all chats a user participates in
+
+        Args:
+            user_id (int): User ID
+            user_type (str): 'doctor' or 'patient'
+
+        Returns:
+            list: List of chat dictionaries or empty list if none or error
+        """
+        raise NotImplementedError
+
+
+class FirestoreMessageStore(MessageStore):
+    """Message store backed by Firebase Firestore"""
+
+    def create_chat(self, doctor_id, patient_id, appointment_id):
+        return FirebaseChat.create_chat(doctor_id, patient_id, appointment_id)
+
+    def send_message(self, chat_id, user_id, user_type, text):
+        return FirebaseChat.send_message(chat_id, user_id, user_type, text) or None
+
+    def get_messages(self, chat_id, limit=50):
+        return FirebaseChat.get_chat_messages(chat_id, limit=limit)
+
+    def get_since(self, chat_id, since_datetime, limit=100):
+        return FirebaseChat.get_new_messages(chat_id, since_datetime, limit=limit)
+
+    def mark_read(self, chat_id, user_id, user_type):
+        return FirebaseChat.mark_messages_as_read(chat_id, user_id, user_type)
+
+    def list_user_chats(self, user_id, user_type):
+        return FirebaseChat.get_user_chats(user_id, user_type)
+
+
+class SQLMessageStore(MessageStore):
+    """Message store backed by the Django database"""
+
+    def create_chat(self, doctor_id, patient_id, appointment_id):
+        from .models import ChatRoom, ChatMessage
+
+        try:
+            chat_id = str(uuid.uuid4())
+            now = timezone.now()
+
+            with transaction.atomic():
+                ChatRoom.objects.create(
+                    chat_id=chat_id,
+                    appointment_id=str(appointment_id),
+                    doctor_id=doctor_id,
+                    patient_id=patient_id,
+                    last_message_text="Chat started",
+                    last_message_sender='system',
+                    last_message_at=now
+                )
+                ChatMessage.objects.create(
+                    chat_id=chat_id,
+                    text=WELCOME_MESSAGE,
+                    sender_id='system',
+                    sender_type='system',
+                    timestamp=now
+                )
+
+            logger.info(f"Created SQL chat with ID: {chat_id}")
+            return chat_id
+        except Exception as e:
+            logger.error(f"Error creating chat in database: {e}")
+            logger.error(traceback.format_exc())
+            return None
+
+    def send_message(self, chat_id, user_id, user_type, text):
+        from .models import ChatRoom, ChatMessage
+
+        try:
+            sender_id = f"{user_type}_{user_id}"
+            now = timezone.now()
+
+            with transaction.atomic():
+                message = ChatMessage.objects.create(
+                    chat_id=chat_id,
+                    text=text,
+                    sender_id=sender_id,
+                    sender_type=user_type,
+                    timestamp=now
+                )
+                updated = ChatRoom.objects.filter(chat_id=chat_id).update(
+                    last_message_text=text,
+                    last_message_sender=sender_id,
+                    last_message_at=now,
+                    updated_at=now
+                )
+                if not updated:
+                    logger.warning(f"Chat {chat_id} does not exist, creating it")
+                    ChatRoom.objects.create(
+                        chat_id=chat_id,
+                        last_message_text=text,
+                        last_message_sender=sender_id,
+                        last_message_at=now
+                    )
+
+            return message.to_message_dict()
+        except Exception as e:
+            logger.error(f"Error sending message to chat {chat_id}: {e}")
+            logger.error(traceback.format_exc())
+            return None
+
+    def get_messages(self, chat_id, limit=50):
+        from .models import ChatMessage
+
+        messages = list(
+            ChatMessage.objects.filter(chat_id=chat_id).order_by('-timestamp', '-id')[:limit]
+        )
+        messages.reverse()
+        return [message.to_message_dict() for message in messages]
+
+    def get_since(self, chat_id, since_datetime, limit=100):
+        from .models import ChatMessage
+
+        messages = ChatMessage.objects.filter(
+            chat_id=chat_id,
+            timestamp__gt=_as_aware(since_datetime)
+        ).order_by('timestamp', 'id')[:limit]
+        return [message.to_message_dict() for message in messages]
+
+    def mark_read(self, chat_id, user_id, user_type):
+        from .models import ChatMessage
+
+        try:
+            reader_id = f"{user_type}_{user_id}"
+            count = ChatMessage.objects.filter(
+                chat_id=chat_id,
+                read=False
+            ).exclude(sender_id=reader_id).update(read=True)
+            logger.info(f"Marked {count} messages as read in chat {chat_id} for {reader_id}")
+            return True
+        except Exception as e:
+            logger.error(f"Error marking messages as read for chat {chat_id}: {e}")
+            return False
+
+    def list_user_chats(self, user_id, user_type):
+        from .models import ChatRoom
+
+        if user_type == 'doctor':
+            rooms = ChatRoom.objects.filter(doctor_id=user_id)
+        elif user_type == 'patient':
+            rooms = ChatRoom.objects.filter(patient_id=user_id)
+        else:
+            return []
+        return [room.to_chat_dict() for room in rooms.order_by('-updated_at')]
+
+
+class InMemoryMessageStore(MessageStore):
+    """
+    Process-local message store
+
+    Useful for development, tests and benchmarks. Data is lost when the
+    process exits and is not shared between workers.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._chats = {}
+        self._messages = {}
+        self._timestamps = {}
+
+    def _append(self, chat_id, message):
+        """Insert a message keeping the chat ordered by timestamp"""
+        timestamps = self._timestamps.setdefault(chat_id, [])
+        position = bisect.bisect_right(timestamps, message['timestamp'])
+        timestamps.insert(position, message['timestamp'])
+        self._messages.setdefault(chat_id, []).insert(position, message)
+
+    def create_chat(self, doctor_id, patient_id, appointment_id):
+        chat_id = str(uuid.uuid4())
+        now = timezone.now()
+
+        with self._lock:
+            self._chats[chat_id] = {
+                'id': chat_id,
+                'participants': [f"doctor_{doctor_id}", f"patient_{patient_id}"],
+                'appointmentId': str(appointment_id),
+                'createdAt': now,
+                'updatedAt': now,
+                'lastMessage': {'text': "Chat started", 'timestamp': now, 'senderId': 'system'}
+            }
+            self._append(chat_id, {
+                'id': uuid.uuid4().hex,
+                'text': WELCOME_MESSAGE,
+                'senderId': 'system',
+                'senderType': 'system',
+                'timestamp': now,
+                'read': False
+            })
+        return chat_id
+
+    def send_message(self, chat_id, user_id, user_type, text):
+        sender_id = f"{user_type}_{user_id}"
+        now = timezone.now()
+        message = {
+            'id': uuid.uuid4().hex,
+            'text': text,
+            'senderId': sender_id,
+            'senderType': user_type,
+            'timestamp': now,
+            'read': False
+        }
+
+        with self._lock:
+            chat = self._chats.setdefault(chat_id, {
+                'id': chat_id,
+                'participants': [],
+                'createdAt': now
+            })
+            chat['lastMessage'] = {'text': text, 'timestamp': now, 'senderId': sender_id}
+            chat['updatedAt'] = now
+            self._append(chat_id, message)
+        return dict(message)
+
+    def get_messages(self, chat_id, limit=50):
+        with self._lock:
+            messages = self._messages.get(chat_id, [])
+            return [dict(message) for message in messages[-limit:]] if limit else []
+
+    def get_since(self, chat_id, since_datetime, limit=100):
+        since_datetime = _as_aware(since_datetime)
+        with self._lock:
+            timestamps = self._timestamps.get(chat_id, [])
+            start = bisect.bisect_right(timestamps, since_datetime)
+            messages = self._messages.get(chat_id, [])[start:start + limit]
+            return [dict(message) for message in messages]
+
+    def mark_read(self, chat_id, user_id, user_type):
+        reader_id = f"{user_type}_{user_id}"
+        with self._lock:
+            for message in self._messages.get(chat_id, []):
+                if not message['read'] and message['senderId'] != reader_id:
+                    message['read'] = True
+        return True
+
+    def list_user_chats(self, user_id, user_type):
+        participant_id = f"{user_type}_{user_id}"
+        with self._lock:
+            return [
+                dict(chat) for chat in self._chats.values()
+                if participant_id in chat.get('participants', [])
+            ]
+
+
+MESSAGE_STORE_BACKENDS = {
+    'firestore': 'chat.message_store.FirestoreMessageStore',
+    'sql': 'chat.message_store.SQLMessageStore',
+    'memory': 'chat.message_store.InMemoryMessageStore',
+}
+
+_message_store = None
+_message_store_lock = threading.Lock()
+
+
+def load_message_store(backend):
+    """
+    Instantiate a message store
+
+    Args:
+        backend (str): Backend alias ('firestore', 'sql', 'memory') or dotted path
+
+    Returns:
+        MessageStore: A new message store instance
+    """
+    path = MESSAGE_STORE_BACKENDS.get(backend, backend)
+    return import_string(path)()
+
+
+def get_message_store():
+    """Return the process-wide message store selected by CHAT_MESSAGE_STORE"""
+    global _message_store
+
+    if _message_store is None:
+        with _message_store_lock:
+            if _message_store is None:
+                backend = getattr(settings, 'CHAT_MESSAGE_STORE', 'firestore')
+                store = load_message_store(backend)
+                logger.info(f"Using chat message store: {store.__class__.__name__}")
+
+                if getattr(settings, 'CHAT_MESSAGE_CACHE_ENABLED', False):
+                    from .message_cache import CachedMessageStore, RecentMessageCache
+
+                    store = CachedMessageStore(store, RecentMessageCache(
+                        max_messages=getattr(settings, 'CHAT_MESSAGE_CACHE_MAX_MESSAGES', 50),
+                        max_bytes=getattr(settings, 'CHAT_MESSAGE_CACHE_MAX_BYTES', 16 * 1024 * 1024),
+                        ttl=getattr(settings, 'CHAT_MESSAGE_CACHE_TTL', 300)
+                    ))
+                _message_store = store
+    return _message_store
+
+
+def reset_message_store():
+    """Drop the cached message store so the next call re-reads the settings"""
+    global _message_store
+
+    with _message_store_lock:
+        _message_store = None
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:48
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChatMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chat_id', models.CharField(max_length=255)),
+                ('text', models.TextField()),
+                ('sender_id', models.CharField(max_length=50)),
+                ('sender_type', models.CharField(max_length=10)),
+                ('timestamp', models.DateTimeField(default=django.utils.timezone.now)),
+                ('read', models.BooleanField(default=False)),
+            ],
+            options={
+                'verbose_name': 'Chat Message',
+                'verbose_name_plural': 'Chat Messages',
+                'indexes': [models.Index(fields=['chat_id', 'timestamp'], name='chat_chatme_chat_id_841849_idx'), models.Index(fields=['chat_id', 'read'], name='chat_chatme_chat_id_97acac_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ChatRoom',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chat_id', models.CharField(max_length=255, unique=True)),
+                ('appointment_id', models.CharField(blank=True, max_length=20, null=True)),
+                ('doctor_id', models.IntegerField(blank=True, null=True)),
+                ('patient_id', models.IntegerField(blank=True, null=True)),
+                ('last_message_text', models.TextField(blank=True, null=True)),
+                ('last_message_sender', models.CharField(blank=True, max_length=50, null=True)),
+                ('last_message_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Chat Room',
+                'verbose_name_plural': 'Chat Rooms',
+                'indexes': [models.Index(fields=['doctor_id', 'updated_at'], name='chat_chatro_doctor__ec6da7_idx'), models.Index(fields=['patient_id', 'updated_at'], name='chat_chatro_patient_c5b7e7_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:49
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0002_message_store'),
+        ('doctors', '0011_fix_database_sync'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChatOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('appointment', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='chat_outbox', to='doctors.appointment')),
+            ],
+            options={
+                'verbose_name': 'Chat Outbox Entry',
+                'verbose_name_plural': 'Chat Outbox',
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='chat_chatou_status_b74c72_idx')],
+            },
+        ),
+    ]
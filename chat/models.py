@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from doctors.models import Appointment, Doctor
 
 class Chat(models.Model):
@@ -17,4 +18,113 @@ class Chat(models.Model):
     
     class Meta:
         verbose_name = 'Chat'
-        verbose_name_plural = 'Chats'
\ No newline at end of file
+        verbose_name_plural = 'Chats'
+
+class ChatRoom(models.Model):
+    """Chat metadata used by the SQL message store"""
+    chat_id = models.CharField(max_length=255, unique=True)
+    appointment_id = models.CharField(max_length=20, blank=True, null=True)
+    doctor_id = models.IntegerField(blank=True, null=True)
+    patient_id = models.IntegerField(blank=True, null=True)
+    last_message_text = models.TextField(blank=True, null=True)
+    last_message_sender = models.CharField(max_length=50, blank=True, null=True)
+    last_message_at = models.DateTimeField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Chat room {self.chat_id}"
+
+    def to_chat_dict(self):
+        """Return the chat in the same shape as FirebaseChat.get_user_chats"""
+        participants = []
+        if self.doctor_id is not None:
+            participants.append(f"doctor_{self.doctor_id}")
+        if self.patient_id is not None:
+            participants.append(f"patient_{self.patient_id}")
+
+        return {
+            'id': self.chat_id,
+            'participants': participants,
+            'appointmentId': self.appointment_id,
+            'createdAt': self.created_at,
+            'updatedAt': self.updated_at,
+            'lastMessage': {
+                'text': self.last_message_text,
+                'timestamp': self.last_message_at,
+                'senderId': self.last_message_sender
+            }
+        }
+
+    class Meta:
+        verbose_name = 'Chat Room'
+        verbose_name_plural = 'Chat Rooms'
+        indexes = [
+            models.Index(fields=['doctor_id', 'updated_at']),
+            models.Index(fields=['patient_id', 'updated_at']),
+        ]
+
+
+class ChatMessage(models.Model):
+    """Message stored by the SQL message store"""
+    chat_id = models.CharField(max_length=255)
+    text = models.TextField()
+    sender_id = models.CharField(max_length=50)
+    sender_type = models.CharField(max_length=10)
+    timestamp = models.DateTimeField(default=timezone.now)
+    read = models.BooleanField(default=False)
+
+    def __str__(self):
+        return f"Message {self.id} in chat {self.chat_id}"
+
+    def to_message_dict(self):
+        """Return the message in the shape expected by MessageSerializer"""
+        return {
+            'id': str(self.id),
+            'text': self.text,
+            'senderId': self.sender_id,
+            'senderType': self.sender_type,
+            'timestamp': self.timestamp,
+            'read': self.read
+        }
+
+    class Meta:
+        verbose_name = 'Chat Message'
+        verbose_name_plural = 'Chat Messages'
+        indexes = [
+            models.Index(fields=['chat_id', 'timestamp']),
+            models.Index(fields=['chat_id', 'read']),
+        ]
+
+
+class ChatOutbox(models.Model):
+    """Pending chat creation for an appointment, drained by chat.provisioning"""
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    )
+
+    appointment = models.OneToOneField(
+        Appointment,
+        on_delete=models.CASCADE,
+        related_name='chat_outbox'
+    )
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Chat outbox for appointment {self.appointment_id} ({self.status})"
+
+    class Meta:
+        verbose_name = 'Chat Outbox Entry'
+        verbose_name_plural = 'Chat Outbox'
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
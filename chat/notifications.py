@@ -0,0 +1,304 @@
+"""
+Background delivery of chat message notifications
+
+Doctor messages used to trigger a blocking requests.post to the main server
+inside SendMessageView. NotificationDispatcher queues them instead and delivers
+them from a daemon thread over a pooled keep-alive session. Messages sent to
+the same chat within CHAT_NOTIFICATION_COALESCE_SECONDS produce one
+notification carrying the latest preview and the number of messages.
+"""
+
+import atexit
+import heapq
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_NOTIFICATION_URL = "https://doctomoris.onrender.com/api/notifications/chat-message/"
+
+
+class NotificationDispatcher:
+    """Coalescing, retrying notification sender running in a background thread"""
+
+    def __init__(self, url, api_key, coalesce_seconds=3.0, max_attempts=4,
+                 retry_base_seconds=1.0, pool_size=4, timeout=5, max_pending=1000):
+        self.url = url
+        self.api_key = api_key
+        self.coalesce_seconds = coalesce_seconds
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.max_pending = max_pending
+        self._reset()
+
+    def _reset(self):
+        """(Re)create all per-process state; also used after a fork"""
+        self._pid = os.getpid()
+        self._condition = threading.Condition()
+        self._pending = {}  # chat_id -> notification
+        self._schedule = []  # heap of (due_at, sequence, chat_id)
+        self._sequence = 0
+        self._thread = None
+        self._executor = None
+        self._session = None
+        self._stopping = False
+        self._in_flight = 0
+        self._latencies = deque(maxlen=1000)
+        self._counters = {
+            'enqueued': 0,
+            'coalesced': 0,
+            'delivered': 0,
+            'retried': 0,
+            'failed': 0,
+            'dropped': 0,
+        }
+
+    def _ensure_started(self):
+        if self._pid != os.getpid():
+            # Threads, locks and sockets are not inherited usefully across fork
+            self._reset()
+
+        if self._thread is None or not self._thread.is_alive():
+            self._session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+            self._session.mount('https://', adapter)
+            self._session.mount('http://', adapter)
+            self._session.headers.update({
+                'Content-Type': 'application/json',
+                'Authorization': f"Bearer {self.api_key}"
+            })
+            self._executor = ThreadPoolExecutor(max_workers=self.pool_size, thread_name_prefix='chat-notify-send')
+            self._thread = threading.Thread(target=self._run, name='chat-notify', daemon=True)
+            self._thread.start()
+
+    def enqueue(self, patient_id, doctor_name, message_preview, appointment_id, chat_id):
+        """
+        Queue a notification for a new chat message
+
+        Returns immediately; delivery happens in the background.
+
+        Returns:
+            bool: False if the notification was dropped
+        """
+        now = time.monotonic()
+
+        with self._condition:
+            self._ensure_started()
+            self._counters['enqueued'] += 1
+
+            notification = self._pending.get(chat_id)
+            if notification and notification['attempts'] == 0:
+                # Fold into the notification that is still waiting for its window
+                notification['payload']['message_preview'] = message_preview
+                notification['payload']['message_count'] += 1
+                self._counters['coalesced'] += 1
+                return True
+
+            if len(self._pending) >= self.max_pending:
+                self._counters['dropped'] += 1
+                logger.warning(f"Notification queue full, dropping notification for chat {chat_id}")
+                return False
+
+            payload = {
+                'patient_id': patient_id,
+                'doctor_name': doctor_name,
+                'message_preview': message_preview,
+                'appointment_id': appointment_id,
+                'chat_id': chat_id,
+                'message_count': 1
+            }
+            if notification:
+                # A retry is pending for this chat; the new message supersedes it
+                payload['message_count'] += notification['payload']['message_count']
+
+            self._pending[chat_id] = {
+                'payload': payload,
+                'enqueued_at': notification['enqueued_at'] if notification else now,
+                'attempts': 0
+            }
+            self._push(now + self.coalesce_seconds, chat_id)
+            return True
+
+    def _push(self, due_at, chat_id):
+        self._sequence += 1
+        heapq.heappush(self._schedule, (due_at, self._sequence, chat_id))
+        self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._stopping:
+                    now = time.monotonic()
+                    if self._schedule and self._schedule[0][0] <= now:
+                        break
+                    timeout = self._schedule[0][0] - now if self._schedule else None
+                    self._condition.wait(timeout)
+
+                if self._stopping and not self._schedule:
+                    return
+
+                _, sequence, chat_id = heapq.heappop(self._schedule)
+                notification = self._pending.pop(chat_id, None)
+                if notification is None:
+                    continue
+                self._in_flight += 1
+
+            self._executor.submit(self._deliver, chat_id, notification)
+
+    def _post(self, notification):
+        """
+        Send one notification
+
+        Returns:
+            tuple: (delivered, retryable)
+        """
+        try:
+            response = self._session.post(self.url, json=notification['payload'], timeout=self.timeout)
+        except requests.RequestException as e:
+            logger.error(f"Error sending notification: {e}")
+            return False, True
+        except Exception as e:
+            logger.error(f"Unexpected error sending notification: {e}")
+            return False, False
+
+        if 200 <= response.status_code < 300:
+            logger.info(f"Notification sent for patient {notification['payload']['patient_id']}")
+            return True, False
+
+        logger.error(f"Notification API returned error: {response.status_code}, {response.text[:200]}")
+        return False, response.status_code == 429 or response.status_code >= 500
+
+    def _deliver(self, chat_id, notification):
+        notification['attempts'] += 1
+        delivered, retryable = self._post(notification)
+
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+            if delivered:
+                self._counters['delivered'] += 1
+                self._latencies.append(time.monotonic() - notification['enqueued_at'])
+                return
+
+            if not retryable or notification['attempts'] >= self.max_attempts or self._stopping:
+                self._counters['failed'] += 1
+                return
+
+            if chat_id in self._pending:
+                # A newer notification for this chat is already queued and replaces this one
+                self._pending[chat_id]['payload']['message_count'] += notification['payload']['message_count']
+                return
+
+            self._counters['retried'] += 1
+            delay = self.retry_base_seconds * (2 ** (notification['attempts'] - 1)) * random.uniform(0.5, 1.0)
+            self._pending[chat_id] = notification
+            self._push(time.monotonic() + delay, chat_id)
+
+    def flush(self, timeout=5.0):
+        """
+        Deliver queued notifications without waiting for their windows
+
+        Args:
+            timeout (float): Maximum seconds to wait
+
+        Returns:
+            bool: True if nothing is left pending or in flight
+        """
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            if self._pid != os.getpid() or self._thread is None:
+                return not self._pending
+            self._schedule = [(0, sequence, chat_id) for _, sequence, chat_id in self._schedule]
+            heapq.heapify(self._schedule)
+            self._condition.notify_all()
+
+            while self._pending or self._in_flight:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def stop(self, timeout=5.0):
+        """Flush outstanding notifications and stop the background thread"""
+        self.flush(timeout)
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+            thread, executor = self._thread, self._executor
+        if thread is not None and self._pid == os.getpid():
+            thread.join(timeout)
+            executor.shutdown(wait=False)
+
+    def metrics(self):
+        """
+        Snapshot of queue depth, delivery counters and latency
+
+        Returns:
+            dict: Metrics for this process
+        """
+        with self._condition:
+            latencies = sorted(self._latencies)
+            metrics = dict(self._counters)
+            metrics.update({
+                'pid': os.getpid(),
+                'queue_depth': len(self._pending),
+                'in_flight': self._in_flight,
+                'running': self._pid == os.getpid() and self._thread is not None and self._thread.is_alive(),
+            })
+
+        def percentile(fraction):
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(len(latencies) * fraction))], 3)
+
+        metrics['delivery_latency_seconds'] = {
+            'samples': len(latencies),
+            'p50': percentile(0.5),
+            'p95': percentile(0.95),
+            'max': round(latencies[-1], 3) if latencies else None,
+        }
+        return metrics
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_notification_dispatcher():
+    """
+    Return the process-wide dispatcher
+
+    Returns:
+        NotificationDispatcher: The dispatcher, or None if DOCTOMORIS_API_KEY is not configured
+    """
+    global _dispatcher
+
+    if _dispatcher is None:
+        api_key = getattr(settings, 'DOCTOMORIS_API_KEY', '')
+        if not api_key:
+            return None
+
+        with _dispatcher_lock:
+            if _dispatcher is None:
+                _dispatcher = NotificationDispatcher(
+                    url=getattr(settings, 'CHAT_NOTIFICATION_URL', DEFAULT_NOTIFICATION_URL),
+                    api_key=api_key,
+                    coalesce_seconds=getattr(settings, 'CHAT_NOTIFICATION_COALESCE_SECONDS', 3.0),
+                    max_attempts=getattr(settings, 'CHAT_NOTIFICATION_MAX_ATTEMPTS', 4),
+                    pool_size=getattr(settings, 'CHAT_NOTIFICATION_POOL_SIZE', 4),
+                )
+                atexit.register(_dispatcher.stop, 2.0)
+    return _dispatcher
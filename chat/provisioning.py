@@ -0,0 +1,323 @@
+"""
+Asynchronous chat provisioning
+
+Appointments no longer create their chat inside post_save. The signal writes a
+ChatOutbox row in the same transaction as the appointment, and the functions
+here drain the outbox: rows are claimed with SELECT ... FOR UPDATE SKIP LOCKED,
+processed concurrently and retried with exponential backoff. The background
+drain thread stays alive while failed rows wait for their retry and wakes at
+the earliest next_attempt_at.
+"""
+
+import logging
+import random
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Min, Q
+from django.utils import timezone
+
+from doctors.models import Appointment
+from .message_store import get_message_store
+from .models import Chat, ChatOutbox
+
+logger = logging.getLogger(__name__)
+
+_drain_lock = threading.Lock()
+_drain_thread = None
+_drain_requested = False
+_drain_wakeup = threading.Event()
+
+# Shortest wait between background drains, so rows held by another process
+# that are already due don't make the thread spin
+MIN_DRAIN_INTERVAL_SECONDS = 1
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def provision_chat(appointment):
+    """
+    Create the chat for an appointment unless it already has one
+
+    Args:
+        appointment (Appointment): Appointment that needs a chat
+
+    Returns:
+        Chat: The existing or newly created chat
+
+    Raises:
+        RuntimeError: If the message store could not create the chat
+    """
+    existing = Chat.objects.filter(appointment=appointment).first()
+    if existing:
+        return existing
+
+    firebase_chat_id = get_message_store().create_chat(
+        doctor_id=appointment.doctor_id,
+        patient_id=appointment.patient_id,
+        appointment_id=appointment.appointment_id
+    )
+    if not firebase_chat_id:
+        raise RuntimeError(f"Message store could not create chat for appointment {appointment.appointment_id}")
+
+    try:
+        chat = Chat.objects.create(appointment=appointment, firebase_chat_id=firebase_chat_id)
+    except IntegrityError:
+        # Another process created the chat while we were talking to the store
+        chat = Chat.objects.get(appointment=appointment)
+        logger.warning(
+            f"Chat for appointment {appointment.appointment_id} was created concurrently, "
+            f"discarding {firebase_chat_id}"
+        )
+
+    logger.info(f"Created chat {chat.firebase_chat_id} for appointment {appointment.appointment_id}")
+    return chat
+
+
+def retry_delay(attempts):
+    """Exponential backoff with jitter for the given number of failed attempts"""
+    base = _setting('CHAT_OUTBOX_RETRY_BASE_SECONDS', 5)
+    cap = _setting('CHAT_OUTBOX_RETRY_MAX_SECONDS', 3600)
+    delay = min(cap, base * (2 ** max(attempts - 1, 0)))
+    return timedelta(seconds=delay * random.uniform(0.5, 1.0))
+
+
+def claim_batch(batch_size=50):
+    """
+    Claim due outbox rows for processing
+
+    Rows stuck in 'processing' for longer than CHAT_OUTBOX_LEASE_SECONDS are
+    treated as abandoned by a crashed worker and claimed again.
+
+    Args:
+        batch_size (int): Maximum number of rows to claim
+
+    Returns:
+        list: IDs of the claimed outbox rows
+    """
+    now = timezone.now()
+    lease_expired = now - timedelta(seconds=_setting('CHAT_OUTBOX_LEASE_SECONDS', 300))
+
+    with transaction.atomic():
+        due = ChatOutbox.objects.filter(
+            Q(status='pending', next_attempt_at__lte=now) |
+            Q(status='processing', locked_at__lt=lease_expired)
+        ).order_by('next_attempt_at')
+
+        if connection.features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+
+        ids = list(due.values_list('id', flat=True)[:batch_size])
+        if ids:
+            ChatOutbox.objects.filter(id__in=ids).update(status='processing', locked_at=now)
+    return ids
+
+
+def process_entry(entry_id):
+    """
+    Provision the chat for one claimed outbox row
+
+    Args:
+        entry_id (int): ChatOutbox ID
+
+    Returns:
+        bool: True if the chat exists afterwards
+    """
+    try:
+        entry = ChatOutbox.objects.select_related('appointment').get(id=entry_id)
+    except ChatOutbox.DoesNotExist:
+        return False
+
+    try:
+        provision_chat(entry.appointment)
+    except Exception as e:
+        attempts = entry.attempts + 1
+        max_attempts = _setting('CHAT_OUTBOX_MAX_ATTEMPTS', 8)
+        status = 'failed' if attempts >= max_attempts else 'pending'
+
+        ChatOutbox.objects.filter(id=entry_id).update(
+            status=status,
+            attempts=attempts,
+            next_attempt_at=timezone.now() + retry_delay(attempts),
+            locked_at=None,
+            last_error=f"{e}\n{traceback.format_exc()}",
+            updated_at=timezone.now()
+        )
+        log = logger.error if status == 'failed' else logger.warning
+        log(f"Chat provisioning attempt {attempts} failed for appointment {entry.appointment_id}: {e}")
+        return False
+
+    ChatOutbox.objects.filter(id=entry_id).update(
+        status='done',
+        attempts=entry.attempts + 1,
+        locked_at=None,
+        last_error=None,
+        updated_at=timezone.now()
+    )
+    return True
+
+
+def _process_in_thread(entry_id):
+    """Run process_entry in a pool thread and release that thread's DB connection"""
+    try:
+        return process_entry(entry_id)
+    except Exception as e:
+        logger.error(f"Unexpected error processing chat outbox entry {entry_id}: {e}")
+        logger.error(traceback.format_exc())
+        return False
+    finally:
+        connection.close()
+
+
+def drain_outbox(batch_size=50, workers=None, max_batches=None):
+    """
+    Process due outbox rows until none are left
+
+    Args:
+        batch_size (int): Number of rows claimed per batch
+        workers (int): Number of concurrent provisioning threads
+        max_batches (int): Stop after this many batches (None for no limit)
+
+    Returns:
+        tuple: (succeeded, failed) counts
+    """
+    workers = workers or _setting('CHAT_OUTBOX_WORKERS', 4)
+    succeeded = failed = batches = 0
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='chat-outbox') as executor:
+        while max_batches is None or batches < max_batches:
+            ids = claim_batch(batch_size)
+            if not ids:
+                break
+            batches += 1
+
+            for result in executor.map(_process_in_thread, ids):
+                if result:
+                    succeeded += 1
+                else:
+                    failed += 1
+
+    if succeeded or failed:
+        logger.info(f"Chat outbox drained: {succeeded} succeeded, {failed} failed")
+    return succeeded, failed
+
+
+def enqueue_chat(appointment):
+    """Record that an appointment needs a chat and drain the outbox after commit"""
+    # Savepoint so a failure here cannot break the caller's transaction
+    with transaction.atomic():
+        ChatOutbox.objects.get_or_create(appointment=appointment)
+    transaction.on_commit(schedule_drain)
+
+
+def enqueue_missing_chats(limit=None):
+    """
+    Queue every appointment that has no chat yet
+
+    Failed outbox rows for those appointments are reset so they are retried.
+
+    Args:
+        limit (int): Maximum number of appointments to queue (None for all)
+
+    Returns:
+        int: Number of appointments queued
+    """
+    missing = Appointment.objects.filter(chat__isnull=True).order_by('id').values_list('id', flat=True)
+    if limit:
+        missing = missing[:limit]
+    appointment_ids = list(missing)
+
+    with transaction.atomic():
+        ChatOutbox.objects.bulk_create(
+            [ChatOutbox(appointment_id=appointment_id) for appointment_id in appointment_ids],
+            ignore_conflicts=True,
+            batch_size=500
+        )
+        ChatOutbox.objects.filter(appointment_id__in=appointment_ids).exclude(status='processing').update(
+            status='pending',
+            attempts=0,
+            next_attempt_at=timezone.now(),
+            updated_at=timezone.now()
+        )
+    return len(appointment_ids)
+
+
+def seconds_until_due():
+    """
+    Seconds until the next outbox row can be claimed
+
+    Returns:
+        float: Seconds until the earliest pending retry or lease expiry (0 if
+            one is already due), None if no row is waiting
+    """
+    lease = timedelta(seconds=_setting('CHAT_OUTBOX_LEASE_SECONDS', 300))
+    waiting = ChatOutbox.objects.aggregate(
+        next_attempt_at=Min('next_attempt_at', filter=Q(status='pending')),
+        locked_at=Min('locked_at', filter=Q(status='processing')),
+    )
+    candidates = [waiting['next_attempt_at']]
+    if waiting['locked_at'] is not None:
+        candidates.append(waiting['locked_at'] + lease)
+    candidates = [candidate for candidate in candidates if candidate is not None]
+    if not candidates:
+        return None
+    return max((min(candidates) - timezone.now()).total_seconds(), 0)
+
+
+def _drain_in_background():
+    global _drain_thread, _drain_requested
+    try:
+        while True:
+            with _drain_lock:
+                _drain_requested = False
+                _drain_wakeup.clear()
+            drain_outbox()
+            delay = seconds_until_due()
+
+            with _drain_lock:
+                if delay is None and not _drain_requested:
+                    _drain_thread = None
+                    return
+
+            # Don't hold a connection open while waiting for the next retry
+            connection.close()
+            if delay is not None:
+                _drain_wakeup.wait(max(delay, MIN_DRAIN_INTERVAL_SECONDS))
+    except Exception as e:
+        logger.error(f"Background chat outbox drain failed: {e}")
+        logger.error(traceback.format_exc())
+    finally:
+        connection.close()
+        with _drain_lock:
+            if _drain_thread is threading.current_thread():
+                _drain_thread = None
+
+
+def schedule_drain():
+    """
+    Drain the outbox in a background thread of this process
+
+    Does nothing when CHAT_OUTBOX_DRAIN_ON_COMMIT is disabled (a dedicated
+    process_chat_outbox --loop worker is expected then). If a drain is
+    already running, or waiting for a retry, it makes another pass right away.
+    The thread sleeps until the earliest pending retry and only exits once no
+    row is waiting, so retries don't depend on a later appointment commit.
+    """
+    global _drain_thread, _drain_requested
+
+    if not _setting('CHAT_OUTBOX_DRAIN_ON_COMMIT', True):
+        return
+
+    with _drain_lock:
+        _drain_requested = True
+        _drain_wakeup.set()
+        if _drain_thread is not None and _drain_thread.is_alive():
+            return
+        _drain_thread = threading.Thread(target=_drain_in_background, name='chat-outbox-drain', daemon=True)
+        _drain_thread.start()
@@ -3,10 +3,11 @@ from .models import Chat
 from doctors.models import Appointment, Doctor
 from doctors.serializers import AppointmentSerializer
 from django.contrib.auth import get_user_model
+from mediconnect_project.sparse_fields import SparseFieldsetsMixin
 
 User = get_user_model()
 
-class ChatSerializer(serializers.ModelSerializer):
+class ChatSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     appointment = AppointmentSerializer(read_only=True)
     
     class Meta:
@@ -14,7 +15,7 @@ class ChatSerializer(serializers.ModelSerializer):
         fields = ('id', 'appointment', 'firebase_chat_id', 'created_at', 'updated_at')
         read_only_fields = ('firebase_chat_id',)
 
-class ChatListItemSerializer(serializers.ModelSerializer):
+class ChatListItemSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     doctor_name = serializers.SerializerMethodField()
     patient_name = serializers.CharField(source='appointment.patient_name')
     patient_id = serializers.IntegerField(source='appointment.patient_id')
@@ -25,11 +26,15 @@ class ChatListItemSerializer(serializers.ModelSerializer):
         model = Chat
         fields = ('id', 'firebase_chat_id', 'doctor_name', 'patient_name', 'patient_id', 
                   'appointment_date', 'appointment_id', 'updated_at')
+        sparse_columns = {
+            'doctor_name': ('appointment__doctor__title', 'appointment__doctor__first_name',
+                            'appointment__doctor__last_name'),
+        }
     
     def get_doctor_name(self, obj):
         return obj.appointment.doctor.full_name
 
-class MessageSerializer(serializers.Serializer):
+class MessageSerializer(SparseFieldsetsMixin, serializers.Serializer):
     """Serializer for Firebase chat messages (not a Django model)"""
     id = serializers.CharField(required=False, read_only=True)
     text = serializers.CharField()
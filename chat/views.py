@@ -14,9 +14,11 @@ from .serializers import (
     MessageSerializer,
     SendMessageSerializer
 )
-from .firebase_utils import FirebaseChat
+from .message_store import get_message_store
+from .notifications import get_notification_dispatcher
 # Import the new timestamp utilities
 from .timestamp_utils import parse_timestamp, format_timestamp, now
+from mediconnect_project.sparse_fields import sparse_only
 import logging
 import jwt
 from django.conf import settings
@@ -107,6 +109,11 @@ class ChatListView(generics.ListAPIView):
         else:
             return Chat.objects.none()
         
+        queryset = sparse_only(
+            queryset.select_related('appointment', 'appointment__doctor'),
+            ChatListItemSerializer, self.request
+        )
+        
         # Apply timestamp filter for incremental updates if provided
         since_timestamp = self.request.query_params.get('since', None)
         if since_timestamp:
@@ -169,7 +176,8 @@ class ChatMessagesView(APIView):
             # Check for 'since' parameter for incremental updates
             since_timestamp = request.query_params.get('since', None)
             
-            # Get messages from Firebase
+            # Get messages from the configured message store
+            store = get_message_store()
             if since_timestamp:
                 logger.info(f"Fetching messages for chat {firebase_chat_id} since {since_timestamp}")
                 try:
@@ -177,22 +185,22 @@ class ChatMessagesView(APIView):
                     import dateutil.parser
                     since_datetime = dateutil.parser.parse(since_timestamp)
                     
-                    # Get new messages from Firebase
-                    messages = FirebaseChat.get_new_messages(firebase_chat_id, since_datetime)
+                    # Get new messages only
+                    messages = store.get_since(firebase_chat_id, since_datetime)
                 except (ValueError, TypeError) as e:
                     logger.error(f"Invalid timestamp format: {since_timestamp}, error: {e}")
                     # Fall back to getting all messages
-                    messages = FirebaseChat.get_chat_messages(firebase_chat_id)
+                    messages = store.get_messages(firebase_chat_id)
             else:
                 # No timestamp provided, get all messages
-                messages = FirebaseChat.get_chat_messages(firebase_chat_id)
+                messages = store.get_messages(firebase_chat_id)
             
             # Serialize messages
-            serializer = MessageSerializer(messages, many=True)
+            serializer = MessageSerializer(messages, many=True, context={'request': request})
             
             # Mark messages as read (async)
             try:
-                FirebaseChat.mark_messages_as_read(firebase_chat_id, user_id, user_type)
+                store.mark_read(firebase_chat_id, user_id, user_type)
             except Exception as e:
                 # Log but don't fail if marking as read fails
                 logger.error(f"Error marking messages as read: {e}")
@@ -257,9 +265,9 @@ class SendMessageView(APIView):
                         status=status.HTTP_403_FORBIDDEN
                     )
                 
-                # Send message to Firebase
+                # Send message to the configured message store
                 try:
-                    success = FirebaseChat.send_message(
+                    success = get_message_store().send_message(
                         chat_id=chat_id,
                         user_id=user_id,
                         user_type=user_type,
@@ -270,7 +278,7 @@ class SendMessageView(APIView):
                         # Only send notification if doctor is sending to patient
                         if user_type == 'doctor':
                             try:
-                                # Send notification via the doctomoris server
+                                # Queue notification via the doctomoris server
                                 self._send_message_notification(
                                     patient_id=appointment.patient_id,
                                     doctor_name=appointment.doctor.full_name or appointment.doctor.last_name,
@@ -287,13 +295,13 @@ class SendMessageView(APIView):
                             status=status.HTTP_201_CREATED
                         )
                     else:
-                        logger.error(f"Failed to send message to Firebase for chat: {chat_id}")
+                        logger.error(f"Failed to store message for chat: {chat_id}")
                         return Response(
                             {'detail': 'Failed to send message'},
                             status=status.HTTP_500_INTERNAL_SERVER_ERROR
                         )
                 except Exception as e:
-                    logger.error(f"Exception sending message to Firebase: {e}")
+                    logger.error(f"Exception sending message: {e}")
                     logger.error(traceback.format_exc())
                     return Response(
                         {'detail': 'Failed to send message'},
@@ -310,53 +318,20 @@ class SendMessageView(APIView):
             )
     
     def _send_message_notification(self, patient_id, doctor_name, message_preview, appointment_id, chat_id):
-        """Send notification to the main server for a new message"""
-        # Add these imports at the top of your file if they're not already there
-        import requests
-        from django.conf import settings
-        
-        # Check if notification sending is enabled
-        if not hasattr(settings, 'DOCTOMORIS_API_KEY') or not settings.DOCTOMORIS_API_KEY:
+        """Queue a notification to the main server for a new message"""
+        dispatcher = get_notification_dispatcher()
+        if dispatcher is None:
             logger.warning("DOCTOMORIS_API_KEY not configured, skipping notification")
             return False
-            
-        # URL for the notification endpoint on the main server
-        notification_url = "https://doctomoris.onrender.com/api/notifications/chat-message/"
-        
-        # Prepare data payload
-        data = {
-            'patient_id': patient_id,
-            'doctor_name': doctor_name,
-            'message_preview': message_preview,
-            'appointment_id': appointment_id,
-            'chat_id': chat_id
-        }
-        
-        # Set up API key or auth token
-        headers = {
-            'Content-Type': 'application/json',
-            'Authorization': f"Bearer {settings.DOCTOMORIS_API_KEY}"
-        }
-        
-        try:
-            # Make the API call
-            response = requests.post(
-                notification_url,
-                json=data,
-                headers=headers,
-                timeout=5  # Set a timeout to avoid blocking
-            )
-            
-            if response.status_code == 200:
-                logger.info(f"Notification sent for patient {patient_id}")
-                return True
-            else:
-                logger.error(f"Notification API returned error: {response.status_code}, {response.text}")
-                return False
-                
-        except Exception as e:
-            logger.error(f"Error sending notification: {e}")
-            return False
+
+        # Delivered in the background so a slow notification server can't delay the response
+        return dispatcher.enqueue(
+            patient_id=patient_id,
+            doctor_name=doctor_name,
+            message_preview=message_preview,
+            appointment_id=appointment_id,
+            chat_id=chat_id
+        )
         
 class MarkMessagesReadView(APIView):
     """View for marking messages as read in a Firebase chat"""
@@ -384,7 +359,7 @@ class MarkMessagesReadView(APIView):
             
             # Mark messages as read
             try:
-                success = FirebaseChat.mark_messages_as_read(
+                success = get_message_store().mark_read(
                     chat_id=firebase_chat_id,
                     user_id=user_id,
                     user_type=user_type
@@ -396,14 +371,14 @@ class MarkMessagesReadView(APIView):
                         status=status.HTTP_200_OK
                     )
                 else:
-                    logger.error(f"Failed to mark messages as read in Firebase for chat: {firebase_chat_id}")
+                    logger.error(f"Failed to mark messages as read for chat: {firebase_chat_id}")
                     # Return success anyway to avoid client errors
                     return Response(
                         {'detail': 'Messages marked as read'},
                         status=status.HTTP_200_OK
                     )
             except Exception as e:
-                logger.error(f"Exception marking messages as read in Firebase: {e}")
+                logger.error(f"Exception marking messages as read: {e}")
                 logger.error(traceback.format_exc())
                 # Return success anyway to avoid client errors
                 return Response(
@@ -455,8 +430,8 @@ class CreateChatView(APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            # Create a chat in Firebase
-            firebase_chat_id = FirebaseChat.create_chat(
+            # Create a chat in the configured message store
+            firebase_chat_id = get_message_store().create_chat(
                 doctor_id=appointment.doctor.id,
                 patient_id=appointment.patient_id,
                 appointment_id=appointment.appointment_id
@@ -464,7 +439,7 @@ class CreateChatView(APIView):
             
             if not firebase_chat_id:
                 return Response(
-                    {'detail': 'Failed to create chat in Firebase'},
+                    {'detail': 'Failed to create chat'},
                     status=status.HTTP_500_INTERNAL_SERVER_ERROR
                 )
             
@@ -4,6 +4,8 @@ from .models import Doctor, DoctorDocument, DoctorAccount, DoctorAvailability, D
 from .models import Appointment
 from .models import Review
 from .models import SupportTicket, FAQ
+from .approval import bulk_approve_doctors
+from .search import search_queryset
 
 @admin.register(Appointment)
 class AppointmentAdmin(admin.ModelAdmin):
@@ -64,9 +66,18 @@ class AppointmentAdmin(admin.ModelAdmin):
 class ReviewAdmin(admin.ModelAdmin):
     list_display = ['appointment_id_display', 'doctor_name', 'patient_id', 'rating', 'created_at']
     list_filter = ['rating', 'created_at']
-    search_fields = ['doctor__first_name', 'doctor__last_name', 'appointment__appointment_id', 'review_text']
+    # review_text is matched through the full-text index in get_search_results
+    search_fields = ['doctor__first_name', 'doctor__last_name', 'appointment__appointment_id']
     readonly_fields = ['created_at', 'updated_at']
     
+    def get_search_results(self, request, queryset, search_term):
+        """Match review text with the full-text index, other fields as usual"""
+        results, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        if search_term:
+            matches = search_queryset(self.model.objects.all(), search_term).values('pk')
+            results |= queryset.filter(pk__in=matches)
+        return results, may_have_duplicates
+    
     def appointment_id_display(self, obj):
         """Display appointment ID in a more readable format"""
         return obj.appointment.appointment_id if obj.appointment.appointment_id else f"#{obj.appointment.id}"
@@ -175,15 +186,21 @@ class DoctorAdmin(admin.ModelAdmin):
                 f"Please communicate this password securely to the doctor."
             )
     
-    def approve_doctors(self, modeladmin, request, queryset):
+    def approve_doctors(self, request, queryset):
         """Batch approve selected doctors"""
-        for doctor in queryset:
-            if doctor.status == 'approved':
-                continue
-            doctor.status = 'approved'
-            doctor.save()
+        result = bulk_approve_doctors(queryset.values_list('pk', flat=True))
         
-        messages.success(request, f"{queryset.count()} doctors have been approved. Account details will be shown above.")
+        messages.success(
+            request,
+            f"{len(result['approved'])} doctors have been approved "
+            f"({result['already_approved']} were already approved). "
+            f"Login details are being emailed to {result['accounts_created']} new accounts."
+        )
+        if result['skipped_accounts']:
+            messages.warning(
+                request,
+                f"No account was created for {', '.join(result['skipped_accounts'])}: the username is already taken."
+            )
     
     approve_doctors.short_description = "Approve selected doctors"
     
@@ -229,9 +246,18 @@ class DoctorAvailabilitySettingsAdmin(admin.ModelAdmin):
 class SupportTicketAdmin(admin.ModelAdmin):
     list_display = ['ticket_id', 'full_name', 'subject', 'status', 'user_type', 'created_at']
     list_filter = ['status', 'subject', 'user_type', 'created_at']
-    search_fields = ['ticket_id', 'full_name', 'email', 'message']
+    # Names, messages and responses are matched through the full-text index in get_search_results
+    search_fields = ['ticket_id', 'email']
     readonly_fields = ['ticket_id', 'created_at', 'updated_at']
     
+    def get_search_results(self, request, queryset, search_term):
+        """Match ticket text with the full-text index, IDs and emails as usual"""
+        results, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        if search_term:
+            matches = search_queryset(self.model.objects.all(), search_term).values('pk')
+            results |= queryset.filter(pk__in=matches)
+        return results, may_have_duplicates
+    
     fieldsets = (
         ('Ticket Information', {
             'fields': (
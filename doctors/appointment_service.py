@@ -2,6 +2,7 @@
 
 import logging
 from datetime import datetime, timedelta
+from django.db import transaction
 from django.utils import timezone
 from .models import Appointment
 from .zoom_service import ZoomService
@@ -59,8 +60,10 @@ class AppointmentService:
             appointment.zoom_meeting_status = 'scheduled'
             appointment.zoom_meeting_duration = duration_minutes
             
-            # Save the appointment
-            appointment.save()
+            # Save the appointment; the chat outbox row written by the
+            # post_save signal commits together with it
+            with transaction.atomic():
+                appointment.save()
             
             logger.info(f"Created appointment with Zoom meeting: {appointment.appointment_id}")
             return appointment
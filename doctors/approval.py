@@ -0,0 +1,165 @@
+"""
+Bulk doctor approval
+
+Saving approved doctors one by one runs the doctor_status_changed pre_save
+signal per row: it re-reads the doctor, looks up the account, hashes a new
+password and sends the credentials email before the next row starts.
+bulk_approve_doctors does the same work for any number of doctors with a
+fixed number of queries, hashes the passwords in a thread pool and leaves the
+emails to the background mail queue.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.mail import EmailMessage
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .mail_queue import get_mail_queue
+from .models import Doctor, DoctorAccount
+from .signals import doctors_approved, generate_random_password
+
+logger = logging.getLogger(__name__)
+
+CREDENTIALS_FROM_EMAIL = "noreply@mediconnect.com"
+
+
+def credentials_email(doctor, password):
+    """
+    Build the email telling an approved doctor their login details
+
+    Args:
+        doctor (Doctor): Approved doctor
+        password (str): Generated plain-text password
+
+    Returns:
+        EmailMessage: Message ready to be sent or queued
+    """
+    subject = "MediConnect - Your Account has been Approved"
+    message = f"""Hello {doctor.full_name},
+
+Your MediConnect account has been approved! You can now log in to access your dashboard.
+
+Login Details:
+- Email: {doctor.email}
+- Password: {password}
+
+For security reasons, we recommend changing your password after your first login.
+
+If you have any questions, please contact our support team.
+
+Best regards,
+The MediConnect Team
+"""
+    return EmailMessage(subject, message, CREDENTIALS_FROM_EMAIL, [doctor.email])
+
+
+def hash_passwords(passwords, workers=None):
+    """
+    Hash passwords concurrently
+
+    PBKDF2 runs in OpenSSL with the GIL released, so threads hash in parallel.
+
+    Args:
+        passwords (list): Plain-text passwords
+        workers (int): Thread pool size
+
+    Returns:
+        list: Hashes in the same order
+    """
+    workers = workers or getattr(settings, 'DOCTOR_APPROVAL_HASH_WORKERS', 4)
+    if len(passwords) <= 1 or workers <= 1:
+        return [make_password(password) for password in passwords]
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash') as executor:
+        return list(executor.map(make_password, passwords))
+
+
+def bulk_approve_doctors(doctor_ids):
+    """
+    Approve doctors and create their login accounts in bulk
+
+    Doctors that are already approved are left alone. Doctors that already have
+    an account, or whose email is already taken as a username, are approved
+    without a new account or email, as the per-save signal would do.
+
+    Args:
+        doctor_ids (iterable): Primary keys of the doctors to approve
+
+    Returns:
+        dict: 'approved' (list of Doctor), 'accounts_created' (int),
+        'already_approved' (int) and 'skipped_accounts' (list of emails)
+    """
+    doctor_ids = list(doctor_ids)
+
+    with transaction.atomic():
+        # Previous state of every selected doctor in one query
+        doctors = list(
+            Doctor.objects.select_for_update().filter(pk__in=doctor_ids).only(
+                'id', 'title', 'first_name', 'last_name', 'email', 'status'
+            )
+        )
+        to_approve = [doctor for doctor in doctors if doctor.status != 'approved']
+        result = {
+            'approved': to_approve,
+            'accounts_created': 0,
+            'already_approved': len(doctors) - len(to_approve),
+            'skipped_accounts': [],
+        }
+        if not to_approve:
+            return result
+
+        # Existing accounts, by doctor or by the username a new account would take
+        existing = DoctorAccount.objects.filter(
+            Q(doctor_id__in=[doctor.pk for doctor in to_approve]) |
+            Q(username__in=[doctor.email for doctor in to_approve])
+        ).values_list('doctor_id', 'username')
+        doctors_with_accounts = {doctor_id for doctor_id, _ in existing}
+        taken_usernames = {username for _, username in existing}
+
+        needs_account = []
+        for doctor in to_approve:
+            if doctor.pk in doctors_with_accounts:
+                logger.info(f"Doctor {doctor.full_name} already has an account.")
+            elif doctor.email in taken_usernames:
+                logger.error(f"Failed to create account for {doctor.full_name}: username {doctor.email} is taken")
+                result['skipped_accounts'].append(doctor.email)
+            else:
+                taken_usernames.add(doctor.email)
+                needs_account.append(doctor)
+
+        passwords = [generate_random_password() for _ in needs_account]
+        hashes = hash_passwords(passwords)
+
+        DoctorAccount.objects.bulk_create([
+            DoctorAccount(doctor=doctor, username=doctor.email, password_hash=password_hash)
+            for doctor, password_hash in zip(needs_account, hashes)
+        ])
+        result['accounts_created'] = len(needs_account)
+
+        # update() skips the per-row pre_save signal; its work is done above
+        Doctor.objects.filter(pk__in=[doctor.pk for doctor in to_approve]).update(
+            status='approved',
+            updated_at=timezone.now()
+        )
+        for doctor in to_approve:
+            doctor.status = 'approved'
+
+        emails = [credentials_email(doctor, password) for doctor, password in zip(needs_account, passwords)]
+
+        def after_commit():
+            mail_queue = get_mail_queue()
+            for email in emails:
+                mail_queue.enqueue(email)
+            doctors_approved.send(sender=Doctor, doctor_ids=[doctor.pk for doctor in to_approve])
+
+        transaction.on_commit(after_commit)
+
+    logger.info(
+        f"Approved {len(to_approve)} doctors, created {len(needs_account)} accounts, "
+        f"{result['already_approved']} were already approved"
+    )
+    return result
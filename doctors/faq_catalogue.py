@@ -0,0 +1,130 @@
+"""
+Prebuilt catalogue of the published FAQs
+
+The FAQ list is a few dozen rows that only change when admins edit them, yet
+every request used to query and regroup them. The whole published catalogue
+is instead built once per process into an immutable FAQCatalogue whose
+responses (flat and grouped, for all FAQs and for each category) are already
+rendered to JSON bytes, so serving an FAQ request doesn't touch the database.
+
+The catalogue is tagged with the FAQ_CATALOGUE_NAMESPACE cache version, which
+every FAQ save or delete bumps (the admin API, Django admin and the
+populate_faqs script all save through the model). With a shared cache every
+worker rebuilds on the next request; with the per-process default,
+FAQ_CATALOGUE_TTL bounds how long another worker's edit can go unseen.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from types import MappingProxyType
+
+from django.conf import settings
+from django.db import transaction
+
+from mediconnect_project.cache_utils import bump_version, get_version
+from mediconnect_project.renderers import ORJSONRenderer
+from .models import FAQ
+from .serializers import FAQSerializer
+
+logger = logging.getLogger(__name__)
+
+FAQ_CATALOGUE_NAMESPACE = 'faq_catalogue'
+
+
+def _render(data):
+    return ORJSONRenderer().render(data)
+
+
+def _grouped(faqs):
+    """FAQ dicts grouped under their category display name, in list order"""
+    categories = {}
+    for faq in faqs:
+        categories.setdefault(faq['category_display'], []).append({
+            'id': faq['id'],
+            'question': faq['question'],
+            'answer': faq['answer'],
+            'order': faq['order'],
+        })
+    return categories
+
+
+class FAQCatalogue:
+    """Immutable set of pre-rendered FAQ responses for one catalogue version"""
+    __slots__ = ('version', 'etag', 'expires_at', '_responses', '_empty')
+
+    def __init__(self, version, faqs, ttl):
+        responses = {}
+        for category in [None] + list(dict.fromkeys(faq['category'] for faq in faqs)):
+            selected = [faq for faq in faqs if category is None or faq['category'] == category]
+            responses[(category, False)] = _render({'status': 'success', 'faqs': selected})
+            responses[(category, True)] = _render({'status': 'success', 'categories': _grouped(selected)})
+
+        digest = hashlib.md5(usedforsecurity=False)
+        digest.update(responses[(None, False)])
+
+        object.__setattr__(self, 'version', version)
+        object.__setattr__(self, 'etag', digest.hexdigest())
+        object.__setattr__(self, 'expires_at', time.monotonic() + ttl if ttl else None)
+        object.__setattr__(self, '_responses', MappingProxyType(responses))
+        object.__setattr__(self, '_empty', MappingProxyType({
+            False: _render({'status': 'success', 'faqs': []}),
+            True: _render({'status': 'success', 'categories': {}}),
+        }))
+
+    def __setattr__(self, name, value):
+        raise AttributeError('FAQCatalogue is immutable')
+
+    def is_current(self, version):
+        """Whether this catalogue can still serve requests at the given cache version"""
+        if self.version != version:
+            return False
+        return self.expires_at is None or self.expires_at > time.monotonic()
+
+    def render(self, category=None, grouped=False):
+        """
+        JSON bytes of the FAQ list
+
+        Args:
+            category (str): Category code to filter by, None for all FAQs
+            grouped (bool): Group under category display names
+
+        Returns:
+            bytes: Response body; an empty list for a category without FAQs
+        """
+        return self._responses.get((category or None, grouped), self._empty[grouped])
+
+
+def build_faq_catalogue(version):
+    """Read the published FAQs and build their catalogue"""
+    faqs = FAQ.objects.filter(is_published=True).order_by('order', 'category')
+    data = FAQSerializer(faqs, many=True).data
+    catalogue = FAQCatalogue(version, data, settings.FAQ_CATALOGUE_TTL)
+    logger.info(f"Built FAQ catalogue with {len(data)} FAQs")
+    return catalogue
+
+
+_catalogue = None
+_catalogue_lock = threading.Lock()
+
+
+def get_faq_catalogue():
+    """Current FAQ catalogue of this process, rebuilt when FAQs have changed"""
+    global _catalogue
+    version = get_version(FAQ_CATALOGUE_NAMESPACE)
+    catalogue = _catalogue
+    if catalogue is not None and catalogue.is_current(version):
+        return catalogue
+
+    with _catalogue_lock:
+        catalogue = _catalogue
+        if catalogue is None or not catalogue.is_current(version):
+            catalogue = build_faq_catalogue(version)
+            _catalogue = catalogue
+    return catalogue
+
+
+def invalidate_faq_catalogue():
+    """Rebuild the FAQ catalogue on the next request once the transaction commits"""
+    transaction.on_commit(lambda: bump_version(FAQ_CATALOGUE_NAMESPACE))
@@ -0,0 +1,186 @@
+"""
+Background delivery of outgoing email
+
+Approving a doctor used to call send_mail inside the request, opening a new
+SMTP connection (connect, EHLO, STARTTLS, AUTH) for every message. MailQueue
+hands messages to a daemon thread that sends them in batches over one
+connection, kept open while messages keep arriving and closed after
+MAIL_QUEUE_IDLE_SECONDS without any.
+"""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.core.mail import get_connection
+
+logger = logging.getLogger(__name__)
+
+
+class MailQueue:
+    """Sends queued EmailMessages from a background thread over a persistent connection"""
+
+    def __init__(self, idle_seconds=30.0, max_batch=50, max_attempts=2):
+        self.idle_seconds = idle_seconds
+        self.max_batch = max_batch
+        self.max_attempts = max_attempts
+        self._reset()
+
+    def _reset(self):
+        """(Re)create all per-process state; also used after a fork"""
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._thread = None
+        self._connection = None
+        self._counters = {
+            'enqueued': 0,
+            'sent': 0,
+            'failed': 0,
+            'connections_opened': 0,
+            'batches': 0,
+        }
+
+    def _ensure_started(self):
+        if self._pid != os.getpid():
+            # The worker thread and the SMTP socket don't survive fork
+            self._reset()
+
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='mail-queue', daemon=True)
+                self._thread.start()
+
+    def enqueue(self, message):
+        """
+        Queue an email for delivery
+
+        Args:
+            message (EmailMessage): Message to send; its connection is ignored
+        """
+        self._ensure_started()
+        self._counters['enqueued'] += 1
+        self._queue.put(message)
+
+    def flush(self, timeout=None):
+        """
+        Wait until every queued message has been handled
+
+        Returns:
+            bool: True if the queue drained within the timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def stop(self, timeout=5.0):
+        """Deliver what is queued, then stop the worker and close the connection"""
+        if self._thread is None or self._pid != os.getpid():
+            return
+        self.flush(timeout)
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def metrics(self):
+        metrics = dict(self._counters)
+        metrics.update({
+            'queued': self._queue.qsize(),
+            'connection_open': self._connection is not None,
+        })
+        return metrics
+
+    def _run(self):
+        while True:
+            try:
+                message = self._queue.get(timeout=self.idle_seconds if self._connection else None)
+            except queue.Empty:
+                self._close_connection()
+                continue
+
+            if message is None:
+                self._queue.task_done()
+                self._close_connection()
+                return
+
+            # Take whatever else is already waiting so it shares the round trip
+            batch = [message]
+            while len(batch) < self.max_batch:
+                try:
+                    message = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if message is None:
+                    self._queue.put(None)
+                    self._queue.task_done()
+                    break
+                batch.append(message)
+
+            try:
+                self._send_batch(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _open_connection(self):
+        if self._connection is None:
+            connection = get_connection(fail_silently=False)
+            connection.open()
+            self._connection = connection
+            self._counters['connections_opened'] += 1
+        return self._connection
+
+    def _close_connection(self):
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except Exception as e:
+                logger.warning(f"Error closing mail connection: {str(e)}")
+            self._connection = None
+
+    def _send_batch(self, batch):
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                connection = self._open_connection()
+                sent = connection.send_messages(batch) or 0
+                self._counters['sent'] += sent
+                self._counters['batches'] += 1
+                logger.info(f"Sent {sent} queued emails")
+                return
+            except Exception as e:
+                # The server may have dropped an idle connection; reconnect once
+                logger.warning(f"Sending {len(batch)} emails failed (attempt {attempt}): {str(e)}")
+                self._close_connection()
+
+        self._counters['failed'] += len(batch)
+        logger.error(f"Giving up on {len(batch)} emails to {[message.to for message in batch]}")
+
+
+_mail_queue = None
+_mail_queue_lock = threading.Lock()
+
+
+def get_mail_queue():
+    """
+    Return the process-wide mail queue
+
+    Returns:
+        MailQueue: The queue
+    """
+    global _mail_queue
+
+    if _mail_queue is None:
+        with _mail_queue_lock:
+            if _mail_queue is None:
+                _mail_queue = MailQueue(
+                    idle_seconds=getattr(settings, 'MAIL_QUEUE_IDLE_SECONDS', 30.0),
+                    max_batch=getattr(settings, 'MAIL_QUEUE_MAX_BATCH', 50),
+                )
+                atexit.register(_mail_queue.stop, 5.0)
+    return _mail_queue
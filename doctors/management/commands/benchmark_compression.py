@@ -0,0 +1,77 @@
+from django.core.management.base import BaseCommand, CommandError
+import time
+import logging
+
+from doctors import sample_payloads
+from mediconnect_project.compression import available_encodings, compress_bytes, stream_compressor
+from mediconnect_project.renderers import ORJSONRenderer
+
+logger = logging.getLogger(__name__)
+
+# Levels compared per coding; the middleware's defaults sit in the middle
+LEVELS = {
+    'gzip': (1, 6, 9),
+    'br': (1, 5, 11),
+}
+
+
+class Command(BaseCommand):
+    help = 'Compare CPU time and bytes saved by gzip and brotli on representative API responses'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=200, help='Rows per list payload')
+        parser.add_argument('--iterations', type=int, default=50, help='Times each body is compressed')
+        parser.add_argument(
+            '--coding',
+            action='append',
+            dest='codings',
+            help=f"Coding to measure (repeatable, default: {', '.join(available_encodings())})"
+        )
+
+    def handle(self, *args, **options):
+        codings = options['codings'] or list(available_encodings())
+        for coding in codings:
+            if coding not in available_encodings():
+                raise CommandError(
+                    f"Coding {coding!r} is not available, use one of {', '.join(available_encodings())}"
+                )
+
+        rows = options['rows']
+        iterations = options['iterations']
+        renderer = ORJSONRenderer()
+        bodies = (
+            ('doctor directory', renderer.render(sample_payloads.doctor_directory(rows))),
+            ('appointment list', renderer.render(sample_payloads.appointments(rows))),
+            ('chat history', renderer.render(sample_payloads.chat_messages(rows))),
+            ('appointments export (csv)', sample_payloads.appointments_csv(rows)),
+        )
+
+        for name, body in bodies:
+            self.stdout.write(self.style.SUCCESS(f'{name}: {len(body) / 1024:.1f} KiB'))
+            for coding in codings:
+                for level in LEVELS[coding]:
+                    compressed = compress_bytes(body, coding, level)
+                    start = time.perf_counter()
+                    for _ in range(iterations):
+                        compress_bytes(body, coding, level)
+                    elapsed = (time.perf_counter() - start) / iterations
+                    saved = 1 - len(compressed) / len(body)
+                    self.stdout.write(
+                        f'  {coding:<4} level {level:>2}  {len(compressed) / 1024:8.1f} KiB'
+                        f'  saved {saved:6.1%}  {elapsed * 1000:8.3f} ms'
+                        f'  {len(body) / elapsed / (1024 * 1024) if elapsed else float("inf"):8.1f} MiB/s'
+                    )
+
+            # Streaming compresses the same bytes chunk by chunk, as the export view sends them
+            for coding in codings:
+                compressor = stream_compressor(coding)
+                start = time.perf_counter()
+                streamed = sum(
+                    len(compressor.compress(body[offset:offset + 8192]))
+                    for offset in range(0, len(body), 8192)
+                ) + len(compressor.finish())
+                elapsed = time.perf_counter() - start
+                self.stdout.write(
+                    f'  {coding:<4} streamed  {streamed / 1024:8.1f} KiB'
+                    f'  saved {1 - streamed / len(body):6.1%}  {elapsed * 1000:8.3f} ms'
+                )
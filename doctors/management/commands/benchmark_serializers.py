@@ -0,0 +1,73 @@
+from django.core.management.base import BaseCommand, CommandError
+from io import BytesIO
+import json
+import time
+import logging
+
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from doctors import sample_payloads
+from mediconnect_project import renderers
+from mediconnect_project.renderers import ORJSONParser, ORJSONRenderer
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Compare JSON renderer and parser throughput on realistic API payloads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=200, help='Rows per list payload')
+        parser.add_argument('--iterations', type=int, default=200, help='Times each payload is encoded')
+
+    def handle(self, *args, **options):
+        if renderers.orjson is None:
+            raise CommandError('orjson is not installed, ORJSONRenderer would only time DRF again')
+
+        rows = options['rows']
+        iterations = options['iterations']
+
+        for name, build in (
+            ('appointments', sample_payloads.appointments),
+            ('sync reviews', sample_payloads.reviews),
+            ('chat messages', sample_payloads.chat_messages),
+            ('revenue series', sample_payloads.revenue_series),
+        ):
+            start = time.perf_counter()
+            for _ in range(max(iterations // 10, 1)):
+                payload = build(rows)
+            serialize_elapsed = (time.perf_counter() - start) / max(iterations // 10, 1)
+
+            expected = JSONRenderer().render(payload)
+            rendered = ORJSONRenderer().render(payload)
+            # Float notation may differ (see mediconnect_project.renderers), the values may not
+            if json.loads(rendered) != json.loads(expected):
+                raise CommandError(f'ORJSONRenderer output decodes differently from JSONRenderer for {name}')
+
+            self.stdout.write(self.style.SUCCESS(
+                f'{name}: {rows} rows, {len(expected) / 1024:.1f} KiB, '
+                f'serializer {serialize_elapsed * 1000:.2f} ms, '
+                f"orjson bytes {'identical' if rendered == expected else 'differ in float notation'}"
+            ))
+            for label, renderer, json_parser in (
+                ('drf', JSONRenderer(), JSONParser()),
+                ('orjson', ORJSONRenderer(), ORJSONParser()),
+            ):
+                render_elapsed = self._time(iterations, lambda: renderer.render(payload))
+                parse_elapsed = self._time(iterations, lambda: json_parser.parse(BytesIO(expected)))
+                self.stdout.write(
+                    f'  {label:<8} render {self._rate(iterations, render_elapsed, len(expected))}'
+                    f'   parse {self._rate(iterations, parse_elapsed, len(expected))}'
+                )
+
+    def _time(self, iterations, operation):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            operation()
+        return time.perf_counter() - start
+
+    def _rate(self, iterations, elapsed, size):
+        per_second = iterations / elapsed if elapsed else float('inf')
+        megabytes = per_second * size / (1024 * 1024)
+        return f'{per_second:9.1f} ops/s {megabytes:7.1f} MiB/s'
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from datetime import timedelta
+import logging
+
+from doctors.stats import catch_up
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Bring the daily appointment statistics rollups up to date'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Rebuild every rollup row instead of only days with changed appointments'
+        )
+        parser.add_argument(
+            '--overlap-minutes',
+            type=int,
+            default=5,
+            help='Re-check appointments updated this long before the last watermark'
+        )
+
+    def handle(self, *args, **options):
+        changed, doctor_days, written = catch_up(
+            overlap=timedelta(minutes=options['overlap_minutes']),
+            full=options['full']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Processed {changed} appointments, recomputed {doctor_days} doctor-days ({written} rollup rows)'
+        ))
@@ -0,0 +1,82 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:56
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+
+def backfill_daily_stats(apps, schema_editor):
+    """Build the rollups from the existing appointments"""
+    Appointment = apps.get_model('doctors', 'Appointment')
+    DailyAppointmentStats = apps.get_model('doctors', 'DailyAppointmentStats')
+    StatsWatermark = apps.get_model('doctors', 'StatsWatermark')
+
+    started_at = timezone.now()
+    rows = Appointment.objects.values(
+        'appointment_date', 'doctor_id', 'package_type', 'status'
+    ).annotate(
+        appointment_count=Count('id'),
+        total_amount=Sum('amount')
+    ).order_by()
+
+    DailyAppointmentStats.objects.bulk_create(
+        (
+            DailyAppointmentStats(
+                date=row['appointment_date'],
+                doctor_id=row['doctor_id'],
+                package_type=row['package_type'],
+                status=row['status'],
+                appointment_count=row['appointment_count'],
+                total_amount=row['total_amount'] or Decimal('0')
+            )
+            for row in rows.iterator()
+        ),
+        batch_size=1000
+    )
+    StatsWatermark.objects.create(name='daily_appointment_stats', last_processed_at=started_at)
+
+
+def remove_daily_stats(apps, schema_editor):
+    apps.get_model('doctors', 'DailyAppointmentStats').objects.all().delete()
+    apps.get_model('doctors', 'StatsWatermark').objects.filter(name='daily_appointment_stats').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctors', '0011_fix_database_sync'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatsWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('last_processed_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailyAppointmentStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('package_type', models.CharField(max_length=20)),
+                ('status', models.CharField(max_length=20)),
+                ('appointment_count', models.IntegerField(default=0)),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('doctor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='doctors.doctor')),
+            ],
+            options={
+                'verbose_name': 'Daily Appointment Stats',
+                'verbose_name_plural': 'Daily Appointment Stats',
+                'indexes': [models.Index(fields=['doctor', 'date'], name='doctors_dai_doctor__f04aa0_idx')],
+                'constraints': [models.UniqueConstraint(fields=('date', 'doctor', 'package_type', 'status'), name='unique_daily_appointment_stats')],
+            },
+        ),
+        migrations.RunPython(backfill_daily_stats, remove_daily_stats),
+    ]
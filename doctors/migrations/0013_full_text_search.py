@@ -0,0 +1,93 @@
+import logging
+
+from django.db import migrations, OperationalError
+
+logger = logging.getLogger(__name__)
+
+# Must match doctors.search.postgres_document_sql() for the index to be used
+POSTGRES_INDEXES = {
+    'doctors_supportticket_search_gin': (
+        'doctors_supportticket',
+        "setweight(to_tsvector('english', coalesce(\"ticket_id\", '') || ' ' || "
+        "coalesce(\"full_name\", '') || ' ' || coalesce(\"email\", '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(\"message\", '')), 'B') || "
+        "setweight(to_tsvector('english', coalesce(\"response\", '')), 'C')"
+    ),
+    'doctors_review_search_gin': (
+        'doctors_review',
+        "setweight(to_tsvector('english', coalesce(\"review_text\", '')), 'A')"
+    ),
+}
+
+SQLITE_FTS_TABLES = {
+    'doctors_supportticket_fts': (
+        'doctors_supportticket',
+        ('ticket_id', 'full_name', 'email', 'message', 'response'),
+    ),
+    'doctors_review_fts': (
+        'doctors_review',
+        ('review_text',),
+    ),
+}
+
+
+def sqlite_fts_statements(fts_table, table, columns):
+    """FTS5 table over `table` plus the triggers that keep it in sync"""
+    column_list = ', '.join(columns)
+    new_values = ', '.join(f'new.{column}' for column in columns)
+    old_values = ', '.join(f'old.{column}' for column in columns)
+    return [
+        f"CREATE VIRTUAL TABLE {fts_table} USING fts5({column_list}, "
+        f"content='{table}', content_rowid='id', tokenize='porter unicode61')",
+        f"CREATE TRIGGER {fts_table}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts_table}(rowid, {column_list}) VALUES (new.id, {new_values}); END",
+        f"CREATE TRIGGER {fts_table}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts_table}({fts_table}, rowid, {column_list}) VALUES ('delete', old.id, {old_values}); END",
+        f"CREATE TRIGGER {fts_table}_au AFTER UPDATE OF {column_list} ON {table} BEGIN "
+        f"INSERT INTO {fts_table}({fts_table}, rowid, {column_list}) VALUES ('delete', old.id, {old_values}); "
+        f"INSERT INTO {fts_table}(rowid, {column_list}) VALUES (new.id, {new_values}); END",
+        f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')",
+    ]
+
+
+def create_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+
+    if vendor == 'postgresql':
+        for name, (table, expression) in POSTGRES_INDEXES.items():
+            schema_editor.execute(f'CREATE INDEX {name} ON {table} USING GIN (({expression}))')
+
+    elif vendor == 'sqlite':
+        for fts_table, (table, columns) in SQLITE_FTS_TABLES.items():
+            try:
+                for statement in sqlite_fts_statements(fts_table, table, columns):
+                    schema_editor.execute(statement)
+            except OperationalError as e:
+                # SQLite built without FTS5; doctors.search falls back to icontains
+                logger.warning(f"Skipping full-text table {fts_table}: {e}")
+                return
+
+
+def drop_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+
+    if vendor == 'postgresql':
+        for name in POSTGRES_INDEXES:
+            schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+    elif vendor == 'sqlite':
+        for fts_table in SQLITE_FTS_TABLES:
+            for suffix in ('ai', 'ad', 'au'):
+                schema_editor.execute(f'DROP TRIGGER IF EXISTS {fts_table}_{suffix}')
+            schema_editor.execute(f'DROP TABLE IF EXISTS {fts_table}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctors', '0012_daily_appointment_stats'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:18
+
+from django.db import migrations, models
+from django.db.models import Count
+
+STATUSES = ('new', 'in_progress', 'resolved', 'closed')
+
+
+def seed_ticket_counters(apps, schema_editor):
+    """Count the existing tickets once; SupportTicket.save keeps it current from here"""
+    SupportTicket = apps.get_model('doctors', 'SupportTicket')
+    SupportTicketStatusCounter = apps.get_model('doctors', 'SupportTicketStatusCounter')
+
+    counts = dict.fromkeys(STATUSES, 0)
+    counts.update(
+        SupportTicket.objects.values_list('status').annotate(count=Count('id')).order_by()
+    )
+    SupportTicketStatusCounter.objects.bulk_create(
+        SupportTicketStatusCounter(status=status, count=count)
+        for status, count in counts.items()
+    )
+
+
+def remove_ticket_counters(apps, schema_editor):
+    apps.get_model('doctors', 'SupportTicketStatusCounter').objects.all().delete()
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctors', '0013_full_text_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SupportTicketStatusCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(max_length=20, unique=True)),
+                ('count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='supportticket',
+            index=models.Index(fields=['status', 'created_at', 'id'], name='doctors_sup_status_e4b91a_idx'),
+        ),
+        migrations.RunPython(seed_ticket_counters, remove_ticket_counters),
+    ]
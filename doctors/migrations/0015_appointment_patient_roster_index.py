@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctors', '0014_support_ticket_status_counter'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['doctor', 'patient_id', 'appointment_date'], name='doctors_app_doctor__a23fb8_idx'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctors', '0015_appointment_patient_roster_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('appointment', 'Appointment'), ('review', 'Review'), ('ticket', 'Support Ticket')], max_length=20)),
+                ('object_id', models.IntegerField()),
+                ('doctor_id', models.IntegerField(blank=True, null=True)),
+                ('patient_id', models.IntegerField(blank=True, null=True)),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['doctor', 'updated_at', 'id'], name='doctors_app_doctor__9a5cef_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['patient_id', 'updated_at', 'id'], name='doctors_app_patient_2bdb8b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['doctor', 'updated_at', 'id'], name='doctors_rev_doctor__4b8651_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['patient_id', 'updated_at', 'id'], name='doctors_rev_patient_add6e1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='supportticket',
+            index=models.Index(fields=['doctor', 'updated_at', 'id'], name='doctors_sup_doctor__18a80e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='supportticket',
+            index=models.Index(fields=['patient_id', 'updated_at', 'id'], name='doctors_sup_patient_8f0c81_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['doctor_id', 'deleted_at', 'id'], name='doctors_tom_doctor__415db3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['patient_id', 'deleted_at', 'id'], name='doctors_tom_patient_511985_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['deleted_at'], name='doctors_tom_deleted_45b5f4_idx'),
+        ),
+    ]
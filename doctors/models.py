@@ -1,10 +1,14 @@
 # doctors/models.py
 
-from django.db import models
+import logging
+
+from django.db import DatabaseError, models, transaction
+from django.db.models import F
 from django.utils import timezone
 from django.contrib.auth.hashers import make_password, check_password
 from django.core.validators import MinValueValidator, MaxValueValidator
 
+logger = logging.getLogger(__name__)
 
 class Doctor(models.Model):
     # User choices
@@ -287,6 +291,12 @@ class Appointment(models.Model):
     
     def __str__(self):
         return f"Appointment with {self.doctor.full_name} for {self.patient_name} on {self.appointment_date} at {self.start_time}"
+    
+    def save(self, *args, **kwargs):
+        # One transaction around the save signals, so pre_save can lock the
+        # stored row while post_save moves the daily rollups (doctors.signals)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
         
     class Meta:
         # Ensure no double booking for the same doctor
@@ -298,8 +308,13 @@ class Appointment(models.Model):
         ]
         indexes = [
             models.Index(fields=['doctor', 'appointment_date']),
+            # A doctor's patients with their visits in order (patient roster)
+            models.Index(fields=['doctor', 'patient_id', 'appointment_date']),
             models.Index(fields=['patient_id', 'status']),
             models.Index(fields=['appointment_date', 'start_time']),
+            # Delta sync (doctors.sync)
+            models.Index(fields=['doctor', 'updated_at', 'id']),
+            models.Index(fields=['patient_id', 'updated_at', 'id']),
         ]
 
 class Review(models.Model):
@@ -324,6 +339,9 @@ class Review(models.Model):
         indexes = [
             models.Index(fields=['doctor', 'rating']),  # Index for calculating average rating
             models.Index(fields=['patient_id']),  # Index for finding patient reviews
+            # Delta sync (doctors.sync)
+            models.Index(fields=['doctor', 'updated_at', 'id']),
+            models.Index(fields=['patient_id', 'updated_at', 'id']),
         ]
     
     def __str__(self):
@@ -339,6 +357,9 @@ class SupportTicket(models.Model):
         ('closed', 'Closed'),
     ]
     
+    # Statuses still waiting on support
+    OPEN_STATUSES = ('new', 'in_progress')
+    
     CATEGORY_CHOICES = [
         ('technical', 'Technical Issue'),
         ('billing', 'Billing Question'),
@@ -384,6 +405,11 @@ class SupportTicket(models.Model):
             models.Index(fields=['status']),
             models.Index(fields=['doctor']),
             models.Index(fields=['patient_id']),
+            # Oldest-first ticket queue within a status
+            models.Index(fields=['status', 'created_at', 'id']),
+            # Delta sync (doctors.sync)
+            models.Index(fields=['doctor', 'updated_at', 'id']),
+            models.Index(fields=['patient_id', 'updated_at', 'id']),
         ]
     
     def __str__(self):
@@ -398,8 +424,94 @@ class SupportTicket(models.Model):
             chars = string.ascii_uppercase + string.digits
             ticket_number = ''.join(random.choices(chars, k=5))
             self.ticket_id = f"TM-{ticket_number}"
-            
-        super().save(*args, **kwargs)
+        
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'status' not in update_fields:
+            super().save(*args, **kwargs)
+            return
+        
+        # Keep SupportTicketStatusCounter in step. The stored status is read under
+        # a row lock so concurrent saves of one ticket can't both move it.
+        with transaction.atomic():
+            previous_status = None
+            if not self._state.adding:
+                previous_status = SupportTicket.objects.select_for_update().filter(
+                    pk=self.pk
+                ).values_list('status', flat=True).first()
+            super().save(*args, **kwargs)
+            if previous_status != self.status:
+                SupportTicketStatusCounter.move(previous_status, self.status)
+    
+    def resolve(self, response=None):
+        """
+        Mark the ticket as resolved
+        
+        Args:
+            response (str): Reply to store with the ticket, if any
+        """
+        self.status = 'resolved'
+        self.resolved_at = timezone.now()
+        update_fields = ['status', 'resolved_at', 'updated_at']
+        if response is not None:
+            self.response = response
+            update_fields.append('response')
+        self.save(update_fields=update_fields)
+
+
+class SupportTicketStatusCounter(models.Model):
+    """
+    Number of support tickets in each status
+    
+    Maintained by SupportTicket.save() and the post_delete signal, so the queue
+    can read the counts without counting tickets. QuerySet.update() on status
+    bypasses it.
+    """
+    status = models.CharField(max_length=20, unique=True)
+    count = models.IntegerField(default=0)
+    
+    def __str__(self):
+        return f"{self.status}: {self.count}"
+    
+    @classmethod
+    def move(cls, from_status, to_status):
+        """
+        Move one ticket between statuses, inside the caller's transaction
+        
+        The counters are updated under a savepoint. If that fails (e.g. the
+        table is missing) the error is logged and the ticket write goes ahead
+        with the counters out of step; build.sh recounts them on deploy.
+        
+        Args:
+            from_status (str): Previous status, None for a new ticket
+            to_status (str): New status, None for a deleted ticket
+        """
+        deltas = {}
+        if from_status is not None:
+            deltas[from_status] = deltas.get(from_status, 0) - 1
+        if to_status is not None:
+            deltas[to_status] = deltas.get(to_status, 0) + 1
+        
+        try:
+            with transaction.atomic():
+                # Same lock order everywhere, so opposite moves can't deadlock
+                for status in sorted(deltas):
+                    if deltas[status] and not cls.objects.filter(status=status).update(count=F('count') + deltas[status]):
+                        cls.objects.get_or_create(status=status)
+                        cls.objects.filter(status=status).update(count=F('count') + deltas[status])
+        except DatabaseError as e:
+            logger.error(f"Could not move support ticket counter from {from_status} to {to_status}: {e}")
+    
+    @classmethod
+    def counts(cls):
+        """
+        Current counts, with every status present
+        
+        Returns:
+            dict: status -> number of tickets
+        """
+        counts = {status: 0 for status, _ in SupportTicket.STATUS_CHOICES}
+        counts.update(cls.objects.values_list('status', 'count'))
+        return counts
 
 
 class FAQ(models.Model):
@@ -431,3 +543,72 @@ class FAQ(models.Model):
     
     def __str__(self):
         return self.question
+
+
+class DailyAppointmentStats(models.Model):
+    """Daily appointment count and amount per doctor, package type and status"""
+    date = models.DateField()
+    doctor = models.ForeignKey(Doctor, on_delete=models.CASCADE, related_name='daily_stats')
+    package_type = models.CharField(max_length=20)
+    status = models.CharField(max_length=20)
+    appointment_count = models.IntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = "Daily Appointment Stats"
+        verbose_name_plural = "Daily Appointment Stats"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['date', 'doctor', 'package_type', 'status'],
+                name='unique_daily_appointment_stats'
+            )
+        ]
+        indexes = [
+            models.Index(fields=['doctor', 'date']),
+        ]
+    
+    def __str__(self):
+        return f"{self.date} doctor {self.doctor_id} {self.package_type}/{self.status}: {self.appointment_count}"
+
+
+class StatsWatermark(models.Model):
+    """Last processed position of an incremental statistics job"""
+    name = models.CharField(max_length=100, unique=True)
+    last_processed_at = models.DateTimeField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.name}: {self.last_processed_at}"
+
+
+class Tombstone(models.Model):
+    """
+    Record of a deleted appointment, review or ticket
+    
+    The delta sync API reports these so apps can drop their local copies.
+    Purged after SYNC_TOMBSTONE_RETENTION_DAYS by the purge_sync_tombstones
+    command; sync tokens older than that get a full resync instead.
+    """
+    KIND_CHOICES = [
+        ('appointment', 'Appointment'),
+        ('review', 'Review'),
+        ('ticket', 'Support Ticket'),
+    ]
+    
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.IntegerField()
+    # Plain IDs: the doctor may be gone too
+    doctor_id = models.IntegerField(null=True, blank=True)
+    patient_id = models.IntegerField(null=True, blank=True)
+    deleted_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['doctor_id', 'deleted_at', 'id']),
+            models.Index(fields=['patient_id', 'deleted_at', 'id']),
+            models.Index(fields=['deleted_at']),
+        ]
+    
+    def __str__(self):
+        return f"Deleted {self.kind} {self.object_id}"
@@ -0,0 +1,122 @@
+"""
+Realistic API payloads for the serializer and compression benchmarks
+
+Each builder serializes unsaved model instances shaped like production rows,
+so the benchmarks need no database content.
+"""
+
+import csv
+import io
+from datetime import time as dt_time, timedelta
+from decimal import Decimal
+
+from django.utils import timezone
+
+from chat.serializers import MessageSerializer
+from .models import Appointment, Doctor, Review
+from .serializers import AppointmentSerializer, SyncReviewSerializer
+
+
+def _doctor(doctor_id=1):
+    return Doctor(id=doctor_id, title='Dr.', first_name='Amira', last_name='Qureshi')
+
+
+def appointments(rows):
+    """Doctor appointment list, as served by the recent appointments view"""
+    doctor = _doctor()
+    now = timezone.now()
+    instances = [
+        Appointment(
+            id=index, appointment_id=f'APT{index:06d}', doctor=doctor, patient_id=1000 + index,
+            patient_name=f'Patient {index}', patient_email=f'patient{index}@example.com',
+            patient_phone='+92 300 1234567', appointment_date=now.date() + timedelta(days=index % 30),
+            start_time=dt_time(9 + index % 8, 30), end_time=dt_time(10 + index % 8),
+            package_type='video', problem_description='Recurring headaches and mild fever — 3 days',
+            transaction_number=f'TXN{index:08d}', amount=Decimal('2500.00'), status='confirmed',
+            created_at=now, updated_at=now, zoom_meeting_id=str(8800000000 + index),
+            zoom_meeting_url=f'https://zoom.us/j/{8800000000 + index}',
+        )
+        for index in range(rows)
+    ]
+    context = {'doctor_photos': {doctor.id: 'https://example.com/photos/1.jpg'}}
+    return AppointmentSerializer(instances, many=True, context=context).data
+
+
+def reviews(rows):
+    """Review page of the delta sync response"""
+    doctor = _doctor()
+    now = timezone.now()
+    instances = [
+        Review(
+            id=index, appointment_id=index, doctor=doctor, patient_id=1000 + index,
+            rating=1 + index % 5, review_text='Very attentive, explained everything clearly.',
+            created_at=now, updated_at=now,
+        )
+        for index in range(rows)
+    ]
+    return SyncReviewSerializer(instances, many=True).data
+
+
+def chat_messages(rows):
+    """Chat history page"""
+    now = timezone.now()
+    messages = [
+        {
+            'id': f'msg{index}', 'text': 'Please take the medicine twice a day after meals.',
+            'senderId': str(index % 2), 'senderType': 'doctor' if index % 2 else 'patient',
+            'timestamp': now - timedelta(minutes=rows - index), 'read': bool(index % 3),
+        }
+        for index in range(rows)
+    ]
+    return MessageSerializer(messages, many=True).data
+
+
+def revenue_series(rows):
+    """Revenue analytics response, raw Decimals and dates as the view returns them"""
+    today = timezone.localdate()
+    return {
+        'status': 'success',
+        'granularity': 'day',
+        'total_revenue': Decimal('2500.00') * rows,
+        'series': [
+            {
+                'period': today - timedelta(days=index),
+                'revenue': Decimal('2500.00') * (index % 4),
+                'appointments': index % 4,
+            }
+            for index in range(rows)
+        ],
+    }
+
+
+def doctor_directory(rows):
+    """Approved doctors list, as served to the patient app"""
+    specialties = ('Cardiology', 'Dermatology', 'General Practice', 'Neurology', 'Pediatrics')
+    return {
+        'status': 'success',
+        'doctors': [
+            {
+                'id': index,
+                'name': f'Dr. Doctor {index}',
+                'specialty': specialties[index % len(specialties)],
+                'about_me': 'Consultant with a focus on preventive care and long-term '
+                            'management of chronic conditions.',
+                'profile_photo': f'https://example.com/photos/{index}.jpg',
+                'years_experience': 5 + index % 20,
+                'location': 'Lahore, Pakistan',
+                'average_rating': Decimal('4.50'),
+                'total_reviews': index % 50,
+            }
+            for index in range(rows)
+        ],
+    }
+
+
+def appointments_csv(rows):
+    """Appointments export as CSV bytes"""
+    data = appointments(rows)
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=list(data[0]) if data else [])
+    writer.writeheader()
+    writer.writerows(data)
+    return output.getvalue().encode()
@@ -0,0 +1,193 @@
+"""
+Full-text search over support tickets and reviews
+
+PostgreSQL matches against a weighted tsvector expression that is indexed
+with GIN (migration 0013), ranks with ts_rank and highlights with
+ts_headline. SQLite matches against an FTS5 table kept in sync by triggers,
+ranks with bm25() and highlights with snippet(). Other databases, or SQLite
+builds without FTS5, fall back to icontains with no ranking.
+
+The PostgreSQL document expression below must stay identical to the one the
+migration indexes, or the planner won't use the index.
+"""
+
+import html
+import logging
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Q, TextField, Value
+from django.db.models.expressions import RawSQL
+
+from .models import Review, SupportTicket
+
+logger = logging.getLogger(__name__)
+
+# Highlight markers that can't occur in text; replaced by <mark> after escaping
+HIGHLIGHT_START = '\x02'
+HIGHLIGHT_END = '\x03'
+
+# Relative weight of PostgreSQL's A/B/C/D classes, for SQLite's bm25()
+BM25_WEIGHTS = {'A': 10.0, 'B': 4.0, 'C': 1.0, 'D': 0.5}
+
+SEARCH_SPECS = {
+    SupportTicket: {
+        'fields': (
+            ('ticket_id', 'A'),
+            ('full_name', 'A'),
+            ('email', 'A'),
+            ('message', 'B'),
+            ('response', 'C'),
+        ),
+        'highlight_field': 'message',
+        'fts_table': 'doctors_supportticket_fts',
+    },
+    Review: {
+        'fields': (
+            ('review_text', 'A'),
+        ),
+        'highlight_field': 'review_text',
+        'fts_table': 'doctors_review_fts',
+    },
+}
+
+_fts_tables = {}
+
+
+def postgres_document_sql(model, table=None):
+    """
+    The weighted tsvector expression for a model
+
+    Args:
+        model: SupportTicket or Review
+        table (str): Table to qualify the columns with
+
+    Returns:
+        str: SQL expression
+    """
+    spec = SEARCH_SPECS[model]
+    prefix = f'"{table}".' if table else ''
+    by_weight = {}
+    for field, weight in spec['fields']:
+        by_weight.setdefault(weight, []).append(f"coalesce({prefix}\"{field}\", '')")
+    separator = " || ' ' || "
+    return ' || '.join(
+        f"setweight(to_tsvector('english', {separator.join(columns)}), '{weight}')"
+        for weight, columns in by_weight.items()
+    )
+
+
+def fts5_match_query(query):
+    """
+    Turn user input into an FTS5 query matching every word
+
+    Each word is quoted so FTS5 operators and punctuation in the input are
+    treated as text; the last word also matches as a prefix.
+    """
+    words = re.findall(r'\w+', query)
+    if not words:
+        return None
+    quoted = [f'"{word}"' for word in words]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def has_fts5_table(connection, table):
+    key = (connection.alias, table)
+    if key not in _fts_tables:
+        _fts_tables[key] = table in connection.introspection.table_names()
+        if not _fts_tables[key]:
+            logger.warning(f"Full-text table {table} is missing; search falls back to icontains")
+    return _fts_tables[key]
+
+
+def search_queryset(queryset, query):
+    """
+    Filter a queryset to full-text matches, best first
+
+    Adds search_rank (higher is better) and search_highlight (text of the
+    highlight field with matches between HIGHLIGHT_START and HIGHLIGHT_END)
+    to every row.
+
+    Args:
+        queryset (QuerySet): SupportTicket or Review queryset
+        query (str): Search terms as typed by the user
+
+    Returns:
+        QuerySet: Matching rows ordered by rank
+    """
+    model = queryset.model
+    spec = SEARCH_SPECS[model]
+    table = model._meta.db_table
+    connection = connections[queryset.db]
+
+    if connection.vendor == 'postgresql':
+        document = postgres_document_sql(model, table)
+        tsquery = "websearch_to_tsquery('english', %s)"
+        headline_options = (
+            f'StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_END}, '
+            'MaxFragments=2, MaxWords=30, MinWords=10'
+        )
+        return queryset.filter(
+            RawSQL(f"({document}) @@ {tsquery}", [query], output_field=BooleanField())
+        ).annotate(
+            search_rank=RawSQL(f"ts_rank({document}, {tsquery})", [query], output_field=FloatField()),
+            search_highlight=RawSQL(
+                f"ts_headline('english', coalesce(\"{table}\".\"{spec['highlight_field']}\", ''), {tsquery}, %s)",
+                [query, headline_options],
+                output_field=TextField()
+            ),
+        ).order_by('-search_rank', '-pk')
+
+    fts_table = spec['fts_table']
+    if connection.vendor == 'sqlite' and has_fts5_table(connection, fts_table):
+        match = fts5_match_query(query)
+        if match is None:
+            return queryset.none()
+
+        weights = ', '.join(str(BM25_WEIGHTS[weight]) for _, weight in spec['fields'])
+        column = [field for field, _ in spec['fields']].index(spec['highlight_field'])
+        matching = f'SELECT rowid FROM "{fts_table}" WHERE "{fts_table}" MATCH %s'
+        correlated = f'FROM "{fts_table}" WHERE "{fts_table}" MATCH %s AND rowid = "{table}"."id"'
+        return queryset.filter(pk__in=RawSQL(matching, [match])).annotate(
+            # bm25() is lower for better matches
+            search_rank=RawSQL(f'SELECT -bm25("{fts_table}", {weights}) {correlated}', [match],
+                               output_field=FloatField()),
+            search_highlight=RawSQL(
+                f'SELECT snippet("{fts_table}", {column}, %s, %s, %s, 30) {correlated}',
+                [HIGHLIGHT_START, HIGHLIGHT_END, '…', match],
+                output_field=TextField()
+            ),
+        ).order_by('-search_rank', '-pk')
+
+    condition = Q()
+    for field, _ in spec['fields']:
+        condition |= Q(**{f'{field}__icontains': query})
+    return queryset.filter(condition).annotate(
+        search_rank=Value(0.0, output_field=FloatField()),
+        search_highlight=Value(None, output_field=TextField()),
+    )
+
+
+def render_highlight(obj, query):
+    """
+    HTML for the highlighted excerpt of a search result
+
+    Args:
+        obj: Row returned by search_queryset
+        query (str): Search terms, used when the database gave no highlight
+
+    Returns:
+        str: Escaped text with matches wrapped in <mark>
+    """
+    spec = SEARCH_SPECS[type(obj)]
+    text = getattr(obj, 'search_highlight', None)
+    if text is None:
+        # icontains fallback: mark the terms in Python
+        text = getattr(obj, spec['highlight_field']) or ''
+        words = re.findall(r'\w+', query or '')
+        if words:
+            pattern = re.compile('|'.join(re.escape(word) for word in words), re.IGNORECASE)
+            text = pattern.sub(lambda match: f'{HIGHLIGHT_START}{match.group(0)}{HIGHLIGHT_END}', text)
+
+    return html.escape(text).replace(HIGHLIGHT_START, '<mark>').replace(HIGHLIGHT_END, '</mark>')
@@ -1,6 +1,7 @@
 # doctors/serializers.py
 
 from rest_framework import serializers
+from mediconnect_project.sparse_fields import SparseFieldsetsMixin
 from .models import Doctor, DoctorDocument, Review
 from .models import DoctorAvailability, DoctorAvailabilitySettings
 from .models import Appointment
@@ -26,7 +27,36 @@ class DoctorSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'status', 'created_at', 'updated_at']
 
 # In serializers.py, modify the AppointmentSerializer
-class AppointmentSerializer(serializers.ModelSerializer):
+def doctor_photo_urls(doctor_ids, request=None):
+    """
+    Get the profile photo URLs of several doctors in one query
+    
+    Args:
+        doctor_ids (iterable): Doctor primary keys
+        request: Request to build absolute URLs with, if any
+    
+    Returns:
+        dict: doctor_id -> photo URL, None for doctors without a profile photo
+    """
+    photos = dict.fromkeys(doctor_ids)
+    profile_photos = DoctorDocument.objects.filter(
+        doctor_id__in=list(photos),
+        document_type='profile_photo'
+    ).order_by('-id')
+    for profile_photo in profile_photos:
+        if photos[profile_photo.doctor_id] is None:
+            if request:
+                photos[profile_photo.doctor_id] = request.build_absolute_uri(profile_photo.file.url)
+            else:
+                # Direct Firebase URL if no request context is available
+                photos[profile_photo.doctor_id] = profile_photo.file.url
+    return photos
+
+def doctor_photo_url(doctor_id, request=None):
+    """Get one doctor's profile photo URL, or None"""
+    return doctor_photo_urls([doctor_id], request)[doctor_id]
+
+class AppointmentSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     doctor_name = serializers.CharField(source='doctor.full_name', read_only=True)
     doctor_photo = serializers.SerializerMethodField()
     
@@ -41,23 +71,19 @@ class AppointmentSerializer(serializers.ModelSerializer):
             'zoom_host_joined', 'zoom_client_joined', 'zoom_meeting_duration', 'doctor_photo'
         ]
         read_only_fields = ['id', 'appointment_id', 'created_at', 'updated_at']
+        sparse_columns = {
+            'doctor_name': ('doctor__title', 'doctor__first_name', 'doctor__last_name'),
+            'doctor_photo': ('doctor',),
+        }
     
     def get_doctor_photo(self, obj):
         """Get the doctor's profile photo with correct Firebase URL"""
-        try:
-            # Try to get profile photo
-            profile_photo = DoctorDocument.objects.get(
-                doctor=obj.doctor, 
-                document_type='profile_photo'
-            )
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(profile_photo.file.url)
-            else:
-                # Direct Firebase URL if no request context is available
-                return profile_photo.file.url
-        except DoctorDocument.DoesNotExist:
-            return None
+        # Views listing one doctor's appointments resolve the photo once and
+        # pass it as context['doctor_photos'] = {doctor_id: url}
+        doctor_photos = self.context.get('doctor_photos')
+        if doctor_photos is not None and obj.doctor_id in doctor_photos:
+            return doctor_photos[obj.doctor_id]
+        return doctor_photo_url(obj.doctor_id, self.context.get('request'))
                     
 class DoctorSerializer(serializers.ModelSerializer):
     documents = DoctorDocumentSerializer(many=True, read_only=True)
@@ -67,7 +93,7 @@ class DoctorSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = ['id', 'status', 'created_at', 'updated_at', 'average_rating', 'total_reviews']
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     doctor_name = serializers.CharField(source='doctor.full_name', read_only=True)
     patient_name = serializers.SerializerMethodField()
     
@@ -76,6 +102,10 @@ class ReviewSerializer(serializers.ModelSerializer):
         fields = ['id', 'appointment', 'doctor', 'doctor_name', 'patient_id', 
                  'patient_name', 'rating', 'review_text', 'created_at']
         read_only_fields = ['id', 'created_at', 'doctor_name', 'patient_name']
+        sparse_columns = {
+            'doctor_name': ('doctor__title', 'doctor__first_name', 'doctor__last_name'),
+            'patient_name': ('patient_id',),
+        }
     
     def get_patient_name(self, obj):
         """Get patient name from the User model"""
@@ -334,7 +364,15 @@ class DoctorAvailabilityUpdateSerializer(serializers.Serializer):
 
 # Add these to your doctors/serializers.py file
 
-class SupportTicketSerializer(serializers.ModelSerializer):
+class SyncReviewSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
+    """Review as sent by the delta sync API"""
+    
+    class Meta:
+        model = Review
+        fields = ['id', 'appointment', 'doctor', 'patient_id', 'rating',
+                  'review_text', 'created_at', 'updated_at']
+
+class SupportTicketSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     doctor_name = serializers.CharField(source='doctor.full_name', read_only=True)
     subject_display = serializers.CharField(source='get_subject_display', read_only=True)
     status_display = serializers.CharField(source='get_status_display', read_only=True)
@@ -345,6 +383,11 @@ class SupportTicketSerializer(serializers.ModelSerializer):
                  'message', 'status', 'status_display', 'user_type', 'doctor', 
                  'doctor_name', 'patient_id', 'response', 'created_at', 'updated_at', 'resolved_at']
         read_only_fields = ['id', 'ticket_id', 'status', 'response', 'created_at', 'updated_at', 'resolved_at']
+        sparse_columns = {
+            'doctor_name': ('doctor__title', 'doctor__first_name', 'doctor__last_name'),
+            'subject_display': ('subject',),
+            'status_display': ('status',),
+        }
 
 
 class SupportTicketCreateSerializer(serializers.ModelSerializer):
@@ -8,13 +8,21 @@ from django.dispatch import receiver
 from django.contrib.auth.hashers import make_password
 from .models import Doctor, DoctorAccount, Appointment
 import logging
-from django.core.mail import send_mail
-from django.db.models.signals import post_save, post_delete
+from django.db import DatabaseError, transaction
+from django.dispatch import Signal
+from django.db.models.signals import post_save, post_delete, pre_delete
 from django.db.models import Avg
-from .models import Review
+from .models import FAQ, Review, SupportTicket, SupportTicketStatusCounter, Tombstone
+from .faq_catalogue import invalidate_faq_catalogue
+from .stats import BUCKET_FIELDS, appointment_bucket, invalidate_dashboards, record_change
+from .mail_queue import get_mail_queue
 
 logger = logging.getLogger(__name__)
 
+# Sent after doctors are approved in bulk with queryset.update(), which skips
+# the per-row save signals. Receivers get doctor_ids.
+doctors_approved = Signal()
+
 def generate_random_password(length=10):
     """Generate a random password of specified length"""
     characters = string.ascii_letters + string.digits + "!@#$%^&*()"
@@ -43,7 +51,8 @@ def update_doctor_average_rating(sender, instance, **kwargs):
         # Update the doctor's average rating
         doctor.average_rating = avg_rating
         doctor.total_reviews = total_reviews
-        doctor.save(update_fields=['average_rating', 'total_reviews'])
+        doctor.save(update_fields=['average_rating', 'total_reviews', 'updated_at'])
+        invalidate_dashboards([doctor.pk])
         
         logger.info(f"Updated average rating for doctor {doctor.full_name} to {avg_rating} from {total_reviews} reviews")
     except Exception as e:
@@ -96,38 +105,16 @@ def doctor_status_changed(sender, instance, **kwargs):
                 # Store the password temporarily so we can access it in the admin
                 instance._generated_password = password
                 
-                # Send email - wrapped in try/except
+                # Queue the credentials email; the mail queue sends it in the background
                 try:
-                    subject = "MediConnect - Your Account has been Approved"
-                    message = f"""Hello {instance.full_name},
-
-Your MediConnect account has been approved! You can now log in to access your dashboard.
-
-Login Details:
-- Email: {instance.email}
-- Password: {password}
-
-For security reasons, we recommend changing your password after your first login.
-
-If you have any questions, please contact our support team.
-
-Best regards,
-The MediConnect Team
-"""
-                    from_email = "noreply@mediconnect.com"
-                    recipient_list = [instance.email]
+                    from .approval import credentials_email
                     
-                    send_mail(
-                        subject,
-                        message,
-                        from_email,
-                        recipient_list,
-                        fail_silently=True,  # Changed to fail_silently=True
-                    )
+                    email = credentials_email(instance, password)
+                    transaction.on_commit(lambda: get_mail_queue().enqueue(email))
                     
-                    logger.info(f"Credentials email sent to {instance.email}")
+                    logger.info(f"Credentials email queued for {instance.email}")
                 except Exception as e:
-                    logger.error(f"Failed to send email: {str(e)}")
+                    logger.error(f"Failed to queue email: {str(e)}")
             
             except Exception as e:
                 logger.error(f"Failed to create account: {str(e)}")
@@ -165,4 +152,90 @@ def set_appointment_hex_id(sender, instance, **kwargs):
     except Exception as e:
         logger.error(f"Error generating appointment ID: {str(e)}")
         # Don't block the save even if ID generation fails
-        # If no ID is set, the database will still be consistent
\ No newline at end of file
+        # If no ID is set, the database will still be consistent
+
+def stored_appointment_stats_bucket(pk):
+    """
+    Rollup bucket of an appointment as stored in the database
+
+    Inside a transaction the row stays locked until it commits, so concurrent
+    saves of one appointment move its rollup contribution one after the other.
+    """
+    previous = Appointment.objects.filter(pk=pk).only(*BUCKET_FIELDS)
+    if transaction.get_connection().in_atomic_block:
+        previous = previous.select_for_update()
+    previous = previous.first()
+    return appointment_bucket(previous) if previous else None
+
+@receiver(pre_save, sender=Appointment)
+def load_appointment_stats_bucket(sender, instance, update_fields=None, **kwargs):
+    """Read the stored bucket inside the save's transaction (see Appointment.save)"""
+    if instance.pk is None or instance._state.adding:
+        instance._stats_bucket = None
+        return
+    changed = None
+    if update_fields is not None:
+        changed = {'doctor_id' if field == 'doctor' else field for field in update_fields}
+    if changed is not None and not changed.intersection(BUCKET_FIELDS):
+        # The bucket can't change, so there is nothing to move
+        instance._stats_bucket = appointment_bucket(instance)
+    else:
+        instance._stats_bucket = stored_appointment_stats_bucket(instance.pk)
+
+@receiver(post_save, sender=Appointment)
+def update_appointment_stats_on_save(sender, instance, created, **kwargs):
+    """Keep the daily appointment rollups current"""
+    try:
+        new_bucket = appointment_bucket(instance)
+        old_bucket = None if created else getattr(instance, '_stats_bucket', None)
+        record_change(old_bucket, new_bucket)
+    except Exception as e:
+        # The rollup_appointment_stats command repairs missed changes
+        logger.error(f"Error updating appointment stats for {instance.pk}: {str(e)}")
+
+@receiver(pre_delete, sender=Appointment)
+def load_deleted_appointment_stats_bucket(sender, instance, **kwargs):
+    """Read the stored bucket of an appointment about to be deleted"""
+    instance._stats_bucket = stored_appointment_stats_bucket(instance.pk)
+
+@receiver(post_delete, sender=Appointment)
+def update_appointment_stats_on_delete(sender, instance, **kwargs):
+    """Remove a deleted appointment from the daily rollups"""
+    try:
+        old_bucket = getattr(instance, '_stats_bucket', None) or appointment_bucket(instance)
+        record_change(old_bucket, None)
+    except Exception as e:
+        logger.error(f"Error updating appointment stats for deleted {instance.pk}: {str(e)}")
+
+
+@receiver(post_delete, sender=SupportTicket)
+def update_ticket_counter_on_delete(sender, instance, **kwargs):
+    """Take a deleted ticket out of the status counters"""
+    SupportTicketStatusCounter.move(instance.status, None)
+
+
+@receiver(post_delete, sender=Appointment)
+@receiver(post_delete, sender=Review)
+@receiver(post_delete, sender=SupportTicket)
+def record_sync_tombstone(sender, instance, **kwargs):
+    """Leave a tombstone so delta sync can tell apps about the deletion"""
+    kind = {Appointment: 'appointment', Review: 'review', SupportTicket: 'ticket'}[sender]
+    try:
+        # Savepoint, so a failed tombstone can't fail the delete itself
+        with transaction.atomic():
+            Tombstone.objects.create(
+                kind=kind,
+                object_id=instance.pk,
+                doctor_id=instance.doctor_id,
+                patient_id=instance.patient_id
+            )
+    except DatabaseError as e:
+        # Apps only see the deletion after their next full resync
+        logger.error(f"Could not record sync tombstone for {kind} {instance.pk}: {e}")
+
+
+@receiver(post_save, sender=FAQ)
+@receiver(post_delete, sender=FAQ)
+def invalidate_faqs(sender, instance, **kwargs):
+    """Rebuild the FAQ catalogue after an FAQ is added, edited or deleted"""
+    invalidate_faq_catalogue()
@@ -0,0 +1,381 @@
+"""
+Daily appointment statistics rollups
+
+DailyAppointmentStats holds one row per (date, doctor, package_type, status)
+with the number of appointments and the sum of their amounts. Dashboards and
+revenue charts read these rows instead of aggregating Appointment.
+
+The rollups are kept current incrementally by the Appointment signals in
+doctors/signals.py. catch_up(), run from the rollup_appointment_stats
+management command, recomputes every (doctor, date) touched by appointments
+whose updated_at is past its watermark, which repairs failed deltas and raw
+SQL that sets updated_at. Changes that leave updated_at alone (a
+queryset.update() that doesn't set it, deletes that bypass signals) are only
+repaired by a full rebuild, catch_up(full=True), which build.sh runs on every
+deploy.
+
+Each doctor's dashboard stats and revenue series are computed from the
+rollups in one query and cached under a per-doctor namespace that every
+rollup change bumps.
+"""
+
+import logging
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Trunc
+from django.utils import timezone
+
+from mediconnect_project.cache_utils import bump_version
+from .models import Appointment, DailyAppointmentStats, Doctor, StatsWatermark
+
+logger = logging.getLogger(__name__)
+
+WATERMARK_NAME = 'daily_appointment_stats'
+
+DASHBOARD_CACHE_NAMESPACE = 'doctor_dashboard'
+
+UPCOMING_STATUSES = ('pending', 'confirmed')
+REVENUE_STATUSES = ('completed', 'confirmed')
+
+# Revenue series granularities, as Trunc kinds
+REVENUE_GRANULARITIES = ('day', 'week', 'month')
+
+# Longest series one request may ask for, e.g. ~2.7 years of days
+REVENUE_MAX_PERIODS = 1000
+
+# Fields of Appointment that determine its bucket and contribution
+BUCKET_FIELDS = ('appointment_date', 'doctor_id', 'package_type', 'status', 'amount')
+
+
+def appointment_bucket(appointment):
+    """
+    Return what an appointment contributes to the rollups
+
+    Args:
+        appointment (Appointment): Appointment instance
+
+    Returns:
+        tuple: (date, doctor_id, package_type, status, amount)
+    """
+    return (
+        appointment.appointment_date,
+        appointment.doctor_id,
+        appointment.package_type,
+        appointment.status,
+        appointment.amount or Decimal('0'),
+    )
+
+
+def apply_delta(date, doctor_id, package_type, status, count, amount):
+    """
+    Add count and amount to one rollup row, creating it if needed
+
+    Negative deltas for rows that don't exist are ignored; the row was
+    already removed (e.g. by a cascading doctor delete).
+    """
+    bucket = {
+        'date': date,
+        'doctor_id': doctor_id,
+        'package_type': package_type,
+        'status': status,
+    }
+    increment = {
+        'appointment_count': F('appointment_count') + count,
+        'total_amount': F('total_amount') + amount,
+        'updated_at': timezone.now(),
+    }
+
+    with transaction.atomic():
+        if DailyAppointmentStats.objects.filter(**bucket).update(**increment):
+            return
+        if count < 0:
+            return
+        try:
+            with transaction.atomic():
+                DailyAppointmentStats.objects.create(
+                    appointment_count=count,
+                    total_amount=amount,
+                    **bucket
+                )
+        except IntegrityError:
+            # Created concurrently; add to that row instead
+            DailyAppointmentStats.objects.filter(**bucket).update(**increment)
+
+
+def record_change(old_bucket, new_bucket):
+    """
+    Move an appointment's contribution from one bucket to another
+
+    Args:
+        old_bucket (tuple): Bucket before the change, or None for a new appointment
+        new_bucket (tuple): Bucket after the change, or None for a deleted appointment
+    """
+    if old_bucket == new_bucket:
+        return
+    if old_bucket is not None:
+        apply_delta(*old_bucket[:4], count=-1, amount=-old_bucket[4])
+    if new_bucket is not None:
+        apply_delta(*new_bucket[:4], count=1, amount=new_bucket[4])
+    invalidate_dashboards(bucket[1] for bucket in (old_bucket, new_bucket) if bucket is not None)
+
+
+def rebuild_buckets(doctor_dates, chunk_size=200):
+    """
+    Recompute the rollups of the given doctors and days from Appointment
+
+    Args:
+        doctor_dates (iterable): (doctor_id, date) pairs to recompute
+        chunk_size (int): Pairs recomputed per transaction
+
+    Returns:
+        int: Number of rollup rows written
+    """
+    doctor_dates = list(doctor_dates)
+    written = 0
+
+    for start in range(0, len(doctor_dates), chunk_size):
+        chunk = doctor_dates[start:start + chunk_size]
+        stats_filter = Q()
+        appointment_filter = Q()
+        for doctor_id, date in chunk:
+            stats_filter |= Q(doctor_id=doctor_id, date=date)
+            appointment_filter |= Q(doctor_id=doctor_id, appointment_date=date)
+
+        rows = Appointment.objects.filter(appointment_filter).values(
+            'appointment_date', 'doctor_id', 'package_type', 'status'
+        ).annotate(
+            appointment_count=Count('id'),
+            total_amount=Sum('amount')
+        ).order_by()
+
+        with transaction.atomic():
+            DailyAppointmentStats.objects.filter(stats_filter).delete()
+            created = DailyAppointmentStats.objects.bulk_create([
+                DailyAppointmentStats(
+                    date=row['appointment_date'],
+                    doctor_id=row['doctor_id'],
+                    package_type=row['package_type'],
+                    status=row['status'],
+                    appointment_count=row['appointment_count'],
+                    total_amount=row['total_amount'] or Decimal('0')
+                )
+                for row in rows
+            ])
+            invalidate_dashboards(doctor_id for doctor_id, _ in chunk)
+        written += len(created)
+
+    return written
+
+
+def catch_up(overlap=timedelta(minutes=5), full=False):
+    """
+    Recompute rollups for appointments updated since the last run
+
+    The watermark is moved back by `overlap` so rows committed by transactions
+    that were still open during the previous run are not missed. Recomputing
+    a bucket is idempotent, so the overlap only costs a little extra work.
+
+    Without `full` only appointments whose updated_at moved are seen, so
+    queryset.update() calls that don't set updated_at and deleted rows are
+    missed until the next full rebuild.
+
+    Args:
+        overlap (timedelta): How far before the watermark to start
+        full (bool): Recompute every bucket instead of only changed ones
+
+    Returns:
+        tuple: (changed appointments, recomputed doctor-days, rollup rows written)
+    """
+    watermark, _ = StatsWatermark.objects.get_or_create(name=WATERMARK_NAME)
+    started_at = timezone.now()
+
+    changed = Appointment.objects.all()
+    if watermark.last_processed_at and not full:
+        changed = changed.filter(updated_at__gte=watermark.last_processed_at - overlap)
+
+    doctor_dates = set(changed.values_list('doctor_id', 'appointment_date').distinct().order_by())
+    changed_count = changed.count()
+
+    if full:
+        # Also drops buckets whose appointments no longer exist
+        with transaction.atomic():
+            DailyAppointmentStats.objects.all().delete()
+            written = rebuild_buckets(doctor_dates)
+    else:
+        written = rebuild_buckets(doctor_dates)
+
+    watermark.last_processed_at = started_at
+    watermark.save(update_fields=['last_processed_at', 'updated_at'])
+
+    logger.info(
+        f"Appointment stats catch-up: {changed_count} appointments, "
+        f"{len(doctor_dates)} doctor-days, {written} rollup rows"
+    )
+    return changed_count, len(doctor_dates), written
+
+
+def dashboard_namespace(doctor_id):
+    """Cache namespace of one doctor's dashboard stats"""
+    return f"{DASHBOARD_CACHE_NAMESPACE}:{doctor_id}"
+
+
+def invalidate_dashboards(doctor_ids):
+    """Drop the cached dashboard stats of the given doctors once the transaction commits"""
+    namespaces = {dashboard_namespace(doctor_id) for doctor_id in doctor_ids}
+    if namespaces:
+        transaction.on_commit(
+            lambda: bump_version(*namespaces, timeout=settings.DOCTOR_DASHBOARD_VERSION_TTL)
+        )
+
+
+def build_dashboard_stats(doctor_id, today):
+    """
+    Compute a doctor's dashboard stats in one query
+
+    The rating comes from the doctor row and the appointment figures are
+    conditional sums over the doctor's rollups, joined in the same query.
+
+    Args:
+        doctor_id (int): Doctor primary key
+        today (date): Day from which appointments count as upcoming
+
+    Returns:
+        dict: Dashboard stats
+
+    Raises:
+        Doctor.DoesNotExist: If there is no such doctor
+    """
+    row = Doctor.objects.filter(pk=doctor_id).annotate(
+        appointment_total=Sum('daily_stats__appointment_count'),
+        upcoming_total=Sum(
+            'daily_stats__appointment_count',
+            filter=Q(daily_stats__date__gte=today, daily_stats__status__in=UPCOMING_STATUSES)
+        ),
+        revenue_total=Sum(
+            'daily_stats__total_amount',
+            filter=Q(daily_stats__status__in=REVENUE_STATUSES)
+        ),
+    ).values('average_rating', 'total_reviews', 'appointment_total', 'upcoming_total', 'revenue_total').first()
+
+    if row is None:
+        raise Doctor.DoesNotExist(f"Doctor {doctor_id} does not exist")
+
+    return {
+        'total_appointments': row['appointment_total'] or 0,
+        'upcoming_appointments': row['upcoming_total'] or 0,
+        'total_revenue': float(row['revenue_total'] or 0),
+        'average_rating': row['average_rating'],
+        'total_reviews': row['total_reviews'],
+    }
+
+
+def period_count(start, end, granularity):
+    """
+    Number of periods period_starts() returns, computed without building them
+
+    Args:
+        start (date): First day of the range
+        end (date): Last day of the range
+        granularity (str): 'day', 'week' (starting Monday) or 'month'
+
+    Returns:
+        int: Number of periods, 0 or less if end is before start
+    """
+    if granularity == 'month':
+        return (end.year * 12 + end.month) - (start.year * 12 + start.month) + 1
+    if granularity == 'week':
+        return ((end.toordinal() - end.weekday()) - (start.toordinal() - start.weekday())) // 7 + 1
+    return (end - start).days + 1
+
+
+def period_starts(start, end, granularity):
+    """
+    First day of every period between two dates, as Trunc() would label them
+
+    Args:
+        start (date): First day of the range
+        end (date): Last day of the range
+        granularity (str): 'day', 'week' (starting Monday) or 'month'
+
+    Returns:
+        list: Period start dates in order
+    """
+    count = max(period_count(start, end, granularity), 0)
+    if granularity == 'month':
+        first = start.year * 12 + start.month - 1
+        return [date(month // 12, month % 12 + 1, 1) for month in range(first, first + count)]
+    if granularity == 'week':
+        first = start.toordinal() - start.weekday()
+        return [date.fromordinal(first + 7 * week) for week in range(count)]
+    return [start + timedelta(days=day) for day in range(count)]
+
+
+def build_revenue_series(doctor_id, start, end, granularity):
+    """
+    Revenue and appointment series for a doctor over a date range
+
+    One grouped query over the rollups returns every (period, package type,
+    status) total; periods without appointments are filled with zeros.
+
+    Args:
+        doctor_id (int): Doctor primary key
+        start (date): First day of the range
+        end (date): Last day of the range
+        granularity (str): One of REVENUE_GRANULARITIES
+
+    Returns:
+        dict: 'periods' (ISO dates), 'series' (one per package type and status,
+        with 'revenue' and 'appointments' lists aligned with periods) and
+        'total_revenue' (per period, counting REVENUE_STATUSES only)
+
+    Raises:
+        ValueError: If the granularity is unknown or the range is too long
+    """
+    if granularity not in REVENUE_GRANULARITIES:
+        raise ValueError(f"granularity must be one of {', '.join(REVENUE_GRANULARITIES)}")
+    # Checked before building the periods, so a huge range costs nothing
+    if period_count(start, end, granularity) > REVENUE_MAX_PERIODS:
+        raise ValueError(f"Range too long: at most {REVENUE_MAX_PERIODS} {granularity}s")
+    periods = period_starts(start, end, granularity)
+    index = {period: position for position, period in enumerate(periods)}
+
+    rows = DailyAppointmentStats.objects.filter(
+        doctor_id=doctor_id,
+        date__range=(start, end)
+    ).annotate(
+        period=Trunc('date', granularity)
+    ).values('period', 'package_type', 'status').annotate(
+        revenue=Sum('total_amount'),
+        appointments=Sum('appointment_count')
+    ).order_by()
+
+    series = {}
+    total_revenue = [0.0] * len(periods)
+    for row in rows:
+        key = (row['package_type'], row['status'])
+        if key not in series:
+            series[key] = {
+                'package_type': row['package_type'],
+                'status': row['status'],
+                'revenue': [0.0] * len(periods),
+                'appointments': [0] * len(periods),
+            }
+        position = index[row['period']]
+        revenue = float(row['revenue'] or 0)
+        series[key]['revenue'][position] = revenue
+        series[key]['appointments'][position] = row['appointments'] or 0
+        if row['status'] in REVENUE_STATUSES:
+            total_revenue[position] += revenue
+
+    return {
+        'granularity': granularity,
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'periods': [period.isoformat() for period in periods],
+        'series': [series[key] for key in sorted(series)],
+        'total_revenue': total_revenue,
+    }
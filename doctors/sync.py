@@ -0,0 +1,207 @@
+"""
+Delta sync of appointments, reviews and tickets for the doctor and patient apps
+
+Instead of downloading full lists to spot changes, an app keeps an opaque sync
+token and asks for what changed since. The token is signed and holds, per
+kind of record and for deletions, the (updated_at, id) of the last row sent;
+rows after that position are read in order from the (owner, updated_at, id)
+indexes.
+
+updated_at is set when a row is saved, not when its transaction commits, so a
+slow transaction can commit a row older than the position already handed out.
+Positions are therefore never moved past now - SYNC_OVERLAP_SECONDS; the rows
+in that window are sent again next time, and apps apply changes as upserts.
+
+Deletions come from Tombstone rows. Tokens older than the tombstone retention
+get a full resync (reset=True), since deletions before that are forgotten.
+"""
+
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import signing
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from admin_portal.pagination import keyset_filter
+from .models import Appointment, Review, SupportTicket, Tombstone
+from .serializers import (
+    AppointmentSerializer, SupportTicketSerializer, SyncReviewSerializer, doctor_photo_urls
+)
+
+logger = logging.getLogger(__name__)
+
+TOKEN_SALT = 'doctors.sync'
+
+# Response key -> (model, serializer, related objects to join, tombstone kind)
+SYNC_KINDS = {
+    'appointments': (Appointment, AppointmentSerializer, ('doctor',), 'appointment'),
+    'reviews': (Review, SyncReviewSerializer, (), 'review'),
+    'tickets': (SupportTicket, SupportTicketSerializer, ('doctor',), 'ticket'),
+}
+TOMBSTONE_KINDS = {kind: key for key, (_, _, _, kind) in SYNC_KINDS.items()}
+
+# Filter field of each owner type, on the records and on Tombstone
+OWNER_FIELDS = {
+    'doctor': 'doctor_id',
+    'patient': 'patient_id',
+}
+
+
+class InvalidSyncToken(Exception):
+    """The sync token is malformed, forged or belongs to someone else"""
+
+
+def encode_token(owner_type, owner_id, positions):
+    """
+    Sign the sync positions into an opaque token
+
+    Args:
+        owner_type (str): 'doctor' or 'patient'
+        owner_id (int): Doctor or patient ID
+        positions (dict): Key of SYNC_KINDS or 'deleted' -> (datetime, id)
+
+    Returns:
+        str: Token
+    """
+    return signing.dumps({
+        'owner': [owner_type, owner_id],
+        'positions': {
+            key: [moment.isoformat(), row_id] for key, (moment, row_id) in positions.items()
+        },
+    }, salt=TOKEN_SALT, compress=True)
+
+
+def decode_token(token, owner_type, owner_id):
+    """
+    Read the positions from a sync token
+
+    Raises:
+        InvalidSyncToken: If the token is invalid or issued to another owner
+
+    Returns:
+        dict: Key -> (datetime, id)
+    """
+    try:
+        payload = signing.loads(token, salt=TOKEN_SALT)
+        if payload['owner'] != [owner_type, owner_id]:
+            raise InvalidSyncToken('Sync token belongs to another account')
+        positions = {}
+        for key, (moment, row_id) in payload['positions'].items():
+            parsed = parse_datetime(moment)
+            if parsed is None:
+                raise ValueError(moment)
+            positions[key] = (parsed, int(row_id))
+        return positions
+    except signing.BadSignature as e:
+        raise InvalidSyncToken('Invalid sync token') from e
+    except (KeyError, TypeError, ValueError) as e:
+        raise InvalidSyncToken('Malformed sync token') from e
+
+
+def changes_after(queryset, time_field, position, limit):
+    """
+    Rows after a sync position, oldest first
+
+    Returns:
+        tuple: (rows, has_more)
+    """
+    ordering = [time_field, 'id']
+    queryset = queryset.order_by(*ordering)
+    if position is not None:
+        queryset = queryset.filter(keyset_filter(ordering, list(position)))
+    rows = list(queryset[:limit + 1])
+    return rows[:limit], len(rows) > limit
+
+
+def next_position(rows, time_field, has_more, settle_before):
+    """
+    Position to hand out after sending rows
+
+    A partial batch continues right after its last row. A complete batch has
+    read everything up to now, so it moves to settle_before, even without new
+    rows (otherwise an idle position would age past the tombstone retention
+    and force a full resync), but never past it, so rows committed late inside
+    the overlap window are picked up by the next sync.
+    """
+    if has_more:
+        return (getattr(rows[-1], time_field), rows[-1].id)
+    return (settle_before, 0)
+
+
+def sync_changes(owner_type, owner_id, token=None, request=None):
+    """
+    Collect the changes an app hasn't seen yet
+
+    Args:
+        owner_type (str): 'doctor' or 'patient'
+        owner_id (int): Doctor or patient ID
+        token (str): Token from the previous sync, None for a full sync
+        request: Request for absolute photo URLs
+
+    Returns:
+        dict: 'changes' (serialized rows per kind), 'deleted' (IDs per kind),
+        'token', 'has_more' (call again straight away) and 'reset' (drop local
+        data first: this is a full sync)
+
+    Raises:
+        InvalidSyncToken: If the token can't be used
+    """
+    now = timezone.now()
+    owner_filter = {OWNER_FIELDS[owner_type]: owner_id}
+    limit = settings.SYNC_PAGE_SIZE
+    settle_before = now - timedelta(seconds=settings.SYNC_OVERLAP_SECONDS)
+
+    positions = decode_token(token, owner_type, owner_id) if token else {}
+    reset = not positions
+    oldest_tombstone = now - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+    if 'deleted' in positions and positions['deleted'][0] < oldest_tombstone:
+        # Deletions since then may already be purged
+        positions = {}
+        reset = True
+
+    result = {'changes': {}, 'deleted': {}, 'has_more': False, 'reset': reset}
+    new_positions = {}
+
+    for key, (model, serializer_class, related, _) in SYNC_KINDS.items():
+        queryset = model.objects.filter(**owner_filter)
+        if related:
+            queryset = queryset.select_related(*related)
+        rows, has_more = changes_after(queryset, 'updated_at', positions.get(key), limit)
+
+        context = {'request': request}
+        if model is Appointment:
+            # One photo query for all the doctors on the page
+            context['doctor_photos'] = doctor_photo_urls({row.doctor_id for row in rows}, request)
+        result['changes'][key] = serializer_class(rows, many=True, context=context).data
+        result['has_more'] |= has_more
+        new_positions[key] = next_position(rows, 'updated_at', has_more, settle_before)
+
+    # A full sync sends current rows only, so earlier deletions don't matter
+    deleted_position = positions.get('deleted') or (now, 0)
+    tombstones, has_more = changes_after(
+        Tombstone.objects.filter(**owner_filter), 'deleted_at', deleted_position, limit
+    )
+    result['deleted'] = {key: [] for key in SYNC_KINDS}
+    for tombstone in tombstones:
+        result['deleted'][TOMBSTONE_KINDS[tombstone.kind]].append(tombstone.object_id)
+    result['has_more'] |= has_more
+    new_positions['deleted'] = next_position(tombstones, 'deleted_at', has_more, settle_before)
+
+    result['token'] = encode_token(owner_type, owner_id, new_positions)
+    return result
+
+
+def purge_tombstones(retention_days=None):
+    """
+    Delete tombstones older than the retention period
+
+    Returns:
+        int: Number of tombstones deleted
+    """
+    retention_days = retention_days or settings.SYNC_TOMBSTONE_RETENTION_DAYS
+    cutoff = timezone.now() - timedelta(days=retention_days)
+    deleted, _ = Tombstone.objects.filter(deleted_at__lt=cutoff).delete()
+    logger.info(f"Purged {deleted} sync tombstones older than {retention_days} days")
+    return deleted
@@ -18,7 +18,9 @@ from .views import (
     # New dashboard views
     DoctorDashboardStatsAPIView,
     DoctorRevenueChartAPIView,
+    DoctorRevenueAnalyticsAPIView,
     DoctorRecentAppointmentsAPIView,
+    SyncAPIView,
     ReviewAPIView,
     SupportTicketAPIView, 
     FAQAPIView,
@@ -49,7 +51,9 @@ urlpatterns = [
     # New dashboard paths
     path('doctors/dashboard/stats/', DoctorDashboardStatsAPIView.as_view(), name='doctor-dashboard-stats'),
     path('doctors/dashboard/revenue-chart/', DoctorRevenueChartAPIView.as_view(), name='doctor-revenue-chart'),
+    path('doctors/dashboard/revenue-analytics/', DoctorRevenueAnalyticsAPIView.as_view(), name='doctor-revenue-analytics'),
     path('doctors/dashboard/recent-appointments/', DoctorRecentAppointmentsAPIView.as_view(), name='doctor-recent-appointments'),
+    path('sync/', SyncAPIView.as_view(), name='delta-sync'),
     
     # Add these to urlpatterns in doctors/urls.py
     path('reviews/', ReviewAPIView.as_view(), name='reviews'),
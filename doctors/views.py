@@ -31,17 +31,28 @@ from django.views import View
 from django.http import JsonResponse
 from django.db.models import Count, Sum
 from django.utils import timezone
-from django.db.models.functions import TruncMonth
-from .models import Doctor, Appointment, DoctorAccount
-from .models import FAQ, SupportTicket
+from django.db.models.functions import TruncMonth, RowNumber
+from django.db.models import F, Window
+from .models import Doctor, Appointment, DoctorAccount, DailyAppointmentStats
+from .models import SupportTicket
 from .serializers import SupportTicketCreateSerializer
 from .serializers import SupportTicketSerializer
-from .serializers import FAQSerializer
 import requests
+import logging
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
 from .appointment_service import AppointmentService
+from .stats import build_dashboard_stats, build_revenue_series, dashboard_namespace
+from django.utils.dateparse import parse_date, parse_time
+from .serializers import doctor_photo_url, doctor_photo_urls
+from admin_portal.pagination import encode_cursor, decode_cursor, keyset_filter
+from mediconnect_project.query_budget import query_budget
+from .sync import InvalidSyncToken, sync_changes
+from .faq_catalogue import get_faq_catalogue
+from mediconnect_project.sparse_fields import sparse_only
+from mediconnect_project.cache_utils import get_or_build, get_version
+from mediconnect_project.conditional import conditional_get, make_etag, signed_url_epoch
 
 def test_webhook(request):
     """Simple view to test webhook URL routing"""
@@ -52,6 +63,7 @@ JWT_ALGORITHM = 'HS256'
 JWT_EXPIRATION_DELTA = datetime.timedelta(days=7)
 
 appointment_service = AppointmentService()
+logger = logging.getLogger(__name__)
 
 def generate_token(doctor_id):
     """Generate a JWT token for the doctor"""
@@ -71,6 +83,24 @@ def verify_token(token):
     except jwt.InvalidTokenError:
         return None
 
+def etag_matches(etag, candidates):
+    """
+    Check an ETag against an If-None-Match style list
+
+    Args:
+        etag (str): Current quoted ETag
+        candidates (str): Comma-separated ETags; quotes and W/ are optional
+
+    Returns:
+        bool: True if any candidate is the same tag
+    """
+    bare = etag.strip('"')
+    for candidate in candidates.split(','):
+        candidate = candidate.strip()
+        if candidate == '*' or candidate.removeprefix('W/').strip('"') == bare:
+            return True
+    return False
+
 class ReviewAPIView(APIView):
     """
     API endpoint for patients to submit and view reviews
@@ -115,7 +145,9 @@ class ReviewAPIView(APIView):
                 'message': 'Either doctor_id, patient_id, or appointment_id is required'
             }, status=status.HTTP_400_BAD_REQUEST)
             
-        serializer = ReviewSerializer(reviews, many=True)
+        if isinstance(reviews, models.QuerySet):
+            reviews = sparse_only(reviews.select_related('doctor'), ReviewSerializer, request)
+        serializer = ReviewSerializer(reviews, many=True, context={'request': request})
         return Response({
             'status': 'success',
             'average_rating': average_rating,
@@ -421,10 +453,18 @@ class PatientAppointmentAPIView(APIView):
             }, status=status.HTTP_401_UNAUTHORIZED)
             
         # Find all appointments for this patient
-        appointments = Appointment.objects.filter(patient_id=patient_id)
+        appointments = sparse_only(
+            Appointment.objects.filter(patient_id=patient_id).select_related('doctor'),
+            AppointmentSerializer, request
+        )
         
         # Serialize and return - ADD THE CONTEXT HERE
         serializer = AppointmentSerializer(appointments, many=True, context={'request': request})
+        if 'doctor_photo' in serializer.child.fields:
+            # One photo query for all the doctors instead of one per row
+            serializer.context['doctor_photos'] = doctor_photo_urls(
+                {appointment.doctor_id for appointment in appointments}, request
+            )
         return Response({
             'status': 'success',
             'appointments': serializer.data
@@ -608,10 +648,19 @@ class DoctorRegistrationAPIView(APIView):
             'errors': serializer.errors
         }, status=status.HTTP_400_BAD_REQUEST)
 
+def registration_status_validators(request, doctor_id, format=None):
+    """ETag of a registration status response: the status itself"""
+    row = Doctor.objects.filter(id=doctor_id).values_list('status', 'updated_at').first()
+    if row is None:
+        return None, None
+    doctor_status, updated_at = row
+    return make_etag(doctor_id, doctor_status), updated_at
+
 class DoctorRegistrationStatusAPIView(APIView):
     """
     API view to check the status of a doctor registration
     """
+    @conditional_get(registration_status_validators)
     def get(self, request, doctor_id, format=None):
         try:
             doctor = Doctor.objects.get(id=doctor_id)
@@ -786,10 +835,34 @@ class ChangePasswordAPIView(APIView):
                 'message': f'An error occurred: {str(e)}'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)            
 
+def profile_photo_versions():
+    """Aggregates over a Doctor queryset: count and latest upload of profile photos"""
+    photo_filter = Q(documents__document_type='profile_photo')
+    return {
+        'photo_count': Count('documents', filter=photo_filter),
+        'photo_uploaded_at': models.Max('documents__uploaded_at', filter=photo_filter),
+    }
+
+def doctor_profile_validators(request, format=None):
+    """ETag of the token holder's profile: the doctor row, profile photo and photo URL lifetime"""
+    auth_header = request.headers.get('Authorization', '')
+    doctor_id = verify_token(auth_header[7:]) if auth_header.startswith('Bearer ') else None
+    if not doctor_id:
+        return None, None
+    row = Doctor.objects.filter(id=doctor_id).aggregate(
+        updated_at=models.Max('updated_at'), **profile_photo_versions()
+    )
+    if row['updated_at'] is None:
+        return None, None
+    return make_etag(
+        doctor_id, row['updated_at'], row['photo_count'], row['photo_uploaded_at'], signed_url_epoch()
+    ), None
+
 class DoctorProfileAPIView(APIView):
     """
     API view to retrieve doctor profile information
     """
+    @conditional_get(doctor_profile_validators, private=True)
     def get(self, request, format=None):
         # Get token from authorization header
         auth_header = request.headers.get('Authorization')
@@ -1231,12 +1304,25 @@ class ZoomMeetingStatusAPIView(APIView):
                 'message': f'Error getting meeting status: {str(e)}'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
             
+def approved_doctors_validators(request, format=None):
+    """ETag of the doctor directory: approved doctors, their profile photos and photo URL lifetime"""
+    row = Doctor.objects.filter(status='approved').aggregate(
+        doctor_count=Count('id', distinct=True),
+        updated_at=models.Max('updated_at'),
+        **profile_photo_versions()
+    )
+    return make_etag(
+        row['doctor_count'], row['updated_at'], row['photo_count'], row['photo_uploaded_at'],
+        signed_url_epoch()
+    ), None
+
 class ApprovedDoctorsAPIView(APIView):
     """
     API view to list all approved doctors
     """
     permission_classes = [permissions.AllowAny]
     
+    @conditional_get(approved_doctors_validators)
     def get(self, request, format=None):
         doctors = Doctor.objects.filter(status='approved')
         
@@ -1271,12 +1357,28 @@ class ApprovedDoctorsAPIView(APIView):
             'doctors': formatted_doctors
         }, status=status.HTTP_200_OK)
 
+def weekly_schedule_validators(request, doctor_id, format=None):
+    """ETag of a weekly schedule: the doctor, availability rows and settings"""
+    row = Doctor.objects.filter(id=doctor_id).aggregate(
+        updated_at=models.Max('updated_at'),
+        availability_count=Count('availabilities'),
+        availability_updated_at=models.Max('availabilities__updated_at'),
+        settings_updated_at=models.Max('availability_settings__updated_at'),
+    )
+    if row['updated_at'] is None:
+        return None, None
+    return make_etag(
+        doctor_id, row['availability_count'], row['updated_at'],
+        row['availability_updated_at'], row['settings_updated_at']
+    ), None
+
 class DoctorWeeklyScheduleAPIView(APIView):
     """
     API view to get a doctor's weekly schedule without authentication
     """
     permission_classes = [permissions.AllowAny]  # Allow any user to see the schedule
     
+    @conditional_get(weekly_schedule_validators)
     def get(self, request, doctor_id, format=None):
         try:
             # Find doctor by ID
@@ -1380,43 +1482,39 @@ class DoctorDashboardStatsAPIView(APIView):
             # Get current date
             today = timezone.now().date()
             
-            # Total appointments for this doctor
-            total_appointments = Appointment.objects.filter(doctor_id=doctor_id).count()
-            
-            # Upcoming appointments (today or future, not cancelled/completed)
-            upcoming_appointments = Appointment.objects.filter(
-                doctor_id=doctor_id,
-                appointment_date__gte=today,
-                status__in=['pending', 'confirmed']
-            ).count()
-            
-            # Calculate total revenue from all completed or confirmed appointments
-            revenue_data = Appointment.objects.filter(
-                doctor_id=doctor_id,
-                status__in=['completed', 'confirmed']
-            ).aggregate(
-                total_revenue=Sum('amount')
+            # The ETag is the doctor's cache version, which every appointment
+            # rollup and review change bumps, so revalidating reads only the cache.
+            # Without a shared cache the version is short-lived (see settings)
+            namespace = dashboard_namespace(doctor_id)
+            version = get_version(namespace, settings.DOCTOR_DASHBOARD_VERSION_TTL)
+            etag = f'"{doctor_id}-{version}-{today.isoformat()}"'
+            
+            since = request.query_params.get('since') or request.headers.get('If-None-Match')
+            if since and etag_matches(etag, since):
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+                response['ETag'] = etag
+                return response
+            
+            stats = get_or_build(
+                namespace,
+                (today.isoformat(),),
+                lambda: build_dashboard_stats(doctor_id, today),
+                settings.DOCTOR_DASHBOARD_CACHE_TTL,
+                version_timeout=settings.DOCTOR_DASHBOARD_VERSION_TTL
             )
             
-            # Handle case where no revenue exists
-            total_revenue = revenue_data['total_revenue'] or 0
-            
-            # Get doctor's rating information
-            doctor = Doctor.objects.get(id=doctor_id)
-            average_rating = doctor.average_rating
-            total_reviews = doctor.total_reviews
-            
-            return Response({
+            response = Response({
                 'status': 'success',
-                'stats': {
-                    'total_appointments': total_appointments,
-                    'upcoming_appointments': upcoming_appointments,
-                    'total_revenue': float(total_revenue),
-                    'average_rating': average_rating,
-                    'total_reviews': total_reviews
-                }
+                'stats': stats
             })
+            response['ETag'] = etag
+            return response
             
+        except Doctor.DoesNotExist:
+            return Response({
+                'status': 'error',
+                'message': 'Doctor not found'
+            }, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
             return Response({
                 'status': 'error',
@@ -1453,14 +1551,14 @@ class DoctorRevenueChartAPIView(APIView):
             
             if chart_type == 'monthly':
                 # Monthly revenue for current year
-                monthly_revenue = Appointment.objects.filter(
+                monthly_revenue = DailyAppointmentStats.objects.filter(
                     doctor_id=doctor_id,
                     status__in=['completed', 'confirmed'],
-                    appointment_date__year=year
+                    date__year=year
                 ).annotate(
-                    month=TruncMonth('appointment_date')
+                    month=TruncMonth('date')
                 ).values('month').annotate(
-                    revenue=Sum('amount')
+                    revenue=Sum('total_amount')
                 ).order_by('month')
                 
                 # Format the data for chart.js
@@ -1497,12 +1595,12 @@ class DoctorRevenueChartAPIView(APIView):
                 
             elif chart_type == 'category':
                 # Revenue by appointment type
-                category_revenue = Appointment.objects.filter(
+                category_revenue = DailyAppointmentStats.objects.filter(
                     doctor_id=doctor_id,
                     status__in=['completed', 'confirmed'],
-                    appointment_date__year=year
+                    date__year=year
                 ).values('package_type').annotate(
-                    revenue=Sum('amount')
+                    revenue=Sum('total_amount')
                 ).order_by('package_type')
                 
                 # Format the data for chart.js
@@ -1541,9 +1639,13 @@ class DoctorRevenueChartAPIView(APIView):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-class DoctorRecentAppointmentsAPIView(APIView):
+class DoctorRevenueAnalyticsAPIView(APIView):
     """
-    API endpoint to get all appointments for a doctor with proper pagination support
+    API endpoint for a doctor's revenue series over any date range
+
+    Query parameters: start and end (YYYY-MM-DD, default the last 12 months)
+    and granularity (day, week or month, default month). Every series is
+    broken down by package type and status.
     """
     def get(self, request, format=None):
         # Get doctor ID from token
@@ -1565,33 +1667,206 @@ class DoctorRecentAppointmentsAPIView(APIView):
             }, status=status.HTTP_401_UNAUTHORIZED)
         
         try:
-            # Get limit parameter with a much higher default (1000 to ensure we get all appointments)
-            limit = int(request.query_params.get('limit', 1000))
+            today = timezone.now().date()
+            granularity = request.query_params.get('granularity', 'month')
+            try:
+                end = parse_date(request.query_params['end']) if 'end' in request.query_params else today
+                if 'start' in request.query_params:
+                    start = parse_date(request.query_params['start'])
+                elif end:
+                    # First day of the month eleven months before the end
+                    month_index = end.year * 12 + end.month - 12
+                    start = datetime.date(month_index // 12, month_index % 12 + 1, 1)
+                else:
+                    start = None
+            except ValueError:
+                start = end = None
+            if start is None or end is None or start > end:
+                return Response({
+                    'status': 'error',
+                    'message': 'start and end must be dates (YYYY-MM-DD) with start before end'
+                }, status=status.HTTP_400_BAD_REQUEST)
             
-            # Log total appointments in database for debugging
-            total_in_db = Appointment.objects.filter(doctor_id=doctor_id).count()
-            print(f"Total appointments in DB for doctor {doctor_id}: {total_in_db}")
-            print(f"Requesting up to {limit} appointments")
+            # Cached per (range, granularity) alongside the dashboard stats,
+            # so the same rollup changes invalidate it
+            try:
+                analytics = get_or_build(
+                    dashboard_namespace(doctor_id),
+                    ('revenue', start.isoformat(), end.isoformat(), granularity),
+                    lambda: build_revenue_series(doctor_id, start, end, granularity),
+                    settings.DOCTOR_DASHBOARD_CACHE_TTL,
+                    version_timeout=settings.DOCTOR_DASHBOARD_VERSION_TTL
+                )
+            except (ValueError, OverflowError) as e:
+                return Response({
+                    'status': 'error',
+                    'message': str(e)
+                }, status=status.HTTP_400_BAD_REQUEST)
             
-            # Get all appointments for this doctor, regardless of date or status
-            # We'll let the frontend handle filtering and pagination
-            all_appointments = Appointment.objects.filter(
-                doctor_id=doctor_id
-            ).order_by('-appointment_date', '-start_time')[:limit]
+            return Response({
+                'status': 'success',
+                'analytics': analytics
+            })
             
-            # Serialize the appointments
-            serializer = AppointmentSerializer(all_appointments, many=True)
+        except Exception as e:
+            return Response({
+                'status': 'error',
+                'message': str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class SyncAPIView(APIView):
+    """
+    Delta sync for the doctor and patient apps
+    
+    GET with ?token= from the previous response returns only what changed
+    since; without a token it returns everything (see doctors.sync).
+    """
+    def get(self, request, format=None):
+        auth_header = request.headers.get('Authorization', '')
+        if not auth_header.startswith('Bearer '):
+            return Response({
+                'status': 'error',
+                'message': 'Authentication token required'
+            }, status=status.HTTP_401_UNAUTHORIZED)
+        
+        try:
+            payload = jwt.decode(auth_header.split(' ')[1], JWT_SECRET, algorithms=[JWT_ALGORITHM])
+        except jwt.InvalidTokenError:
+            payload = {}
+        if payload.get('doctor_id'):
+            owner_type, owner_id = 'doctor', payload['doctor_id']
+        elif payload.get('patient_id'):
+            owner_type, owner_id = 'patient', payload['patient_id']
+        else:
+            return Response({
+                'status': 'error',
+                'message': 'Invalid or expired token'
+            }, status=status.HTTP_401_UNAUTHORIZED)
+        
+        try:
+            result = sync_changes(
+                owner_type, int(owner_id), request.query_params.get('token'), request
+            )
+        except InvalidSyncToken as e:
+            return Response({
+                'status': 'error',
+                'message': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.error(f"Error in SyncAPIView: {str(e)}")
+            return Response({
+                'status': 'error',
+                'message': str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        
+        return Response({'status': 'success', **result})
+
+RECENT_APPOINTMENTS_DEFAULT_LIMIT = 50
+RECENT_APPOINTMENTS_MAX_LIMIT = 200
+RECENT_APPOINTMENTS_QUERY_BUDGET = 3
+
+class DoctorRecentAppointmentsAPIView(APIView):
+    """
+    API endpoint to get all appointments for a doctor with proper pagination support
+    """
+    def get(self, request, format=None):
+        # Get doctor ID from token
+        auth_header = request.headers.get('Authorization')
+        
+        if not auth_header or not auth_header.startswith('Bearer '):
+            return Response({
+                'status': 'error',
+                'message': 'Authentication token required'
+            }, status=status.HTTP_401_UNAUTHORIZED)
             
-            print(f"Returning {len(serializer.data)} appointments")
+        token = auth_header.split(' ')[1]
+        doctor_id = verify_token(token)
+        
+        if not doctor_id:
+            return Response({
+                'status': 'error',
+                'message': 'Invalid or expired token'
+            }, status=status.HTTP_401_UNAUTHORIZED)
+        
+        try:
+            limit = int(request.query_params.get('limit', RECENT_APPOINTMENTS_DEFAULT_LIMIT))
+            if limit < 1:
+                raise ValueError
+            dates = {}
+            for name in ('date_from', 'date_to'):
+                if name in request.query_params:
+                    dates[name] = parse_date(request.query_params[name])
+                    if dates[name] is None:
+                        raise ValueError
+            date_from = dates.get('date_from')
+            date_to = dates.get('date_to')
+            cursor = request.query_params.get('cursor')
+            position = None
+            if cursor:
+                values = decode_cursor(cursor)
+                if len(values) != 3:
+                    raise ValueError
+                position = [parse_date(values[0]), parse_time(values[1]), int(values[2])]
+                if None in position:
+                    raise ValueError
+        except (ValueError, TypeError):
+            return Response({
+                'status': 'error',
+                'message': 'Invalid limit, date_from, date_to (YYYY-MM-DD) or cursor'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        limit = min(limit, RECENT_APPOINTMENTS_MAX_LIMIT)
+        
+        try:
+            # Total from the rollups, the photo once for the whole page, and the page
+            with query_budget(RECENT_APPOINTMENTS_QUERY_BUDGET, 'DoctorRecentAppointmentsAPIView'):
+                appointments = Appointment.objects.filter(doctor_id=doctor_id)
+                rollups = DailyAppointmentStats.objects.filter(doctor_id=doctor_id)
+                if date_from:
+                    appointments = appointments.filter(appointment_date__gte=date_from)
+                    rollups = rollups.filter(date__gte=date_from)
+                if date_to:
+                    appointments = appointments.filter(appointment_date__lte=date_to)
+                    rollups = rollups.filter(date__lte=date_to)
+                statuses = [value for value in request.query_params.get('status', '').split(',') if value]
+                if statuses:
+                    appointments = appointments.filter(status__in=statuses)
+                    rollups = rollups.filter(status__in=statuses)
+                
+                total_count = rollups.aggregate(total=Sum('appointment_count'))['total'] or 0
+                
+                ordering = ['-appointment_date', '-start_time', '-id']
+                appointments = sparse_only(
+                    appointments.select_related('doctor').order_by(*ordering),
+                    AppointmentSerializer, request,
+                    # Read below to build next_cursor
+                    required=('appointment_date', 'start_time', 'id')
+                )
+                if position:
+                    appointments = appointments.filter(keyset_filter(ordering, position))
+                
+                # One extra row tells whether there is a next page
+                page = list(appointments[:limit + 1])
+                next_cursor = None
+                if len(page) > limit:
+                    page = page[:limit]
+                    last = page[-1]
+                    next_cursor = encode_cursor([last.appointment_date, last.start_time, last.id])
+                
+                serializer = AppointmentSerializer(page, many=True, context={'request': request})
+                if page and 'doctor_photo' in serializer.child.fields:
+                    serializer.context['doctor_photos'] = {doctor_id: doctor_photo_url(doctor_id, request)}
+                appointment_data = serializer.data
             
             return Response({
                 'status': 'success',
-                'total_count': total_in_db,
-                'appointments': serializer.data
+                'total_count': total_count,
+                'appointments': appointment_data,
+                'next_cursor': next_cursor
             })
             
         except Exception as e:
-            print(f"Error in DoctorRecentAppointmentsAPIView: {str(e)}")
+            logger.error(f"Error in DoctorRecentAppointmentsAPIView: {str(e)}")
             return Response({
                 'status': 'error',
                 'message': str(e)
@@ -1808,8 +2083,11 @@ class SupportTicketAPIView(APIView):
         
         if doctor_id:
             # Doctor is authenticated, return their tickets
-            tickets = SupportTicket.objects.filter(doctor_id=doctor_id)
-            serializer = SupportTicketSerializer(tickets, many=True)
+            tickets = sparse_only(
+                SupportTicket.objects.filter(doctor_id=doctor_id).select_related('doctor'),
+                SupportTicketSerializer, request
+            )
+            serializer = SupportTicketSerializer(tickets, many=True, context={'request': request})
             return Response({
                 'status': 'success',
                 'tickets': serializer.data
@@ -1822,8 +2100,11 @@ class SupportTicketAPIView(APIView):
                 patient_id = payload.get('patient_id')
                 
                 if patient_id:
-                    tickets = SupportTicket.objects.filter(patient_id=patient_id)
-                    serializer = SupportTicketSerializer(tickets, many=True)
+                    tickets = sparse_only(
+                        SupportTicket.objects.filter(patient_id=patient_id).select_related('doctor'),
+                        SupportTicketSerializer, request
+                    )
+                    serializer = SupportTicketSerializer(tickets, many=True, context={'request': request})
                     return Response({
                         'status': 'success',
                         'tickets': serializer.data
@@ -1890,58 +2171,63 @@ class SupportTicketAPIView(APIView):
             }, status=status.HTTP_400_BAD_REQUEST)
 
 
+def faq_validators(request, format=None):
+    """ETag of the FAQ list: a digest of the current catalogue, no query needed"""
+    return get_faq_catalogue().etag, None
+
 class FAQAPIView(APIView):
     """
     API endpoint for retrieving FAQs
     """
     permission_classes = [permissions.AllowAny]  # Public access
     
+    @conditional_get(faq_validators)
     def get(self, request, format=None):
         """Get published FAQs, optionally filtered by category"""
         category = request.query_params.get('category')
-        
-        # Filter by published status and optionally by category
-        query = Q(is_published=True)
-        if category:
-            query &= Q(category=category)
-            
-        faqs = FAQ.objects.filter(query).order_by('order', 'category')
-        
-        # Group by category if requested
         grouped = request.query_params.get('grouped', 'false').lower() == 'true'
         
-        if grouped:
-            # Group FAQs by category
-            categories = {}
-            for faq in faqs:
-                category_name = faq.get_category_display()
-                if category_name not in categories:
-                    categories[category_name] = []
-                    
-                categories[category_name].append({
-                    'id': faq.id,
-                    'question': faq.question,
-                    'answer': faq.answer,
-                    'order': faq.order
-                })
-                
-            return Response({
-                'status': 'success',
-                'categories': categories
-            })
-        else:
-            # Return flat list of FAQs
-            serializer = FAQSerializer(faqs, many=True)
-            return Response({
-                'status': 'success',
-                'faqs': serializer.data
-            })            
+        # Served from the prebuilt catalogue (doctors.faq_catalogue)
+        body = get_faq_catalogue().render(category, grouped)
+        if request.accepted_renderer.format != 'json':
+            return Response(json.loads(body))
+        return HttpResponse(body, content_type='application/json')
 
 # Add this to your doctors/views.py file
 
+# Very simple gender detection from the first name
+# In a real app, you'd have this stored in your patient model
+COMMON_FEMALE_NAMES = frozenset({
+    'mary', 'patricia', 'jennifer', 'linda', 'elizabeth',
+    'barbara', 'susan', 'jessica', 'sarah', 'karen', 'nancy',
+    'margaret', 'lisa', 'betty', 'dorothy', 'sandra', 'ashley',
+    'kimberly', 'donna', 'emily', 'michelle', 'carol', 'amanda',
+    'melissa', 'deborah', 'stephanie', 'laura', 'olivia', 'emma',
+})
+
+def guess_gender(name):
+    """Guess 'Male' or 'Female' from a patient's first name"""
+    first_name = (name or '').partition(' ')[0].lower()
+    return 'Female' if first_name in COMMON_FEMALE_NAMES else 'Male'
+
+# ?sort= values of the patient roster; pk breaks ties so pages are stable
+PATIENT_ROSTER_SORTS = {
+    'last_visit': ('appointment_date', 'start_time', 'id'),
+    '-last_visit': ('-appointment_date', '-start_time', '-id'),
+    'name': ('patient_name', 'id'),
+    '-name': ('-patient_name', '-id'),
+    'appointment_count': ('appointment_count', 'id'),
+    '-appointment_count': ('-appointment_count', '-id'),
+}
+PATIENT_ROSTER_DEFAULT_PAGE_SIZE = 50
+PATIENT_ROSTER_MAX_PAGE_SIZE = 200
+
 class DoctorPatientsAPIView(APIView):
     """
     API endpoint to get all unique patients for a doctor
+    
+    Query parameters: search (patient name), sort (see PATIENT_ROSTER_SORTS,
+    default -last_visit), page and page_size.
     """
     def get(self, request, format=None):
         # Get doctor ID from token
@@ -1962,56 +2248,64 @@ class DoctorPatientsAPIView(APIView):
                 'message': 'Invalid or expired token'
             }, status=status.HTTP_401_UNAUTHORIZED)
         
+        sort = request.query_params.get('sort', '-last_visit')
+        if sort not in PATIENT_ROSTER_SORTS:
+            return Response({
+                'status': 'error',
+                'message': f"sort must be one of {', '.join(PATIENT_ROSTER_SORTS)}"
+            }, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            page = int(request.query_params.get('page', 1))
+            page_size = int(request.query_params.get('page_size', PATIENT_ROSTER_DEFAULT_PAGE_SIZE))
+            if page < 1 or page_size < 1:
+                raise ValueError
+        except ValueError:
+            return Response({
+                'status': 'error',
+                'message': 'page and page_size must be positive integers'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        page_size = min(page_size, PATIENT_ROSTER_MAX_PAGE_SIZE)
+        
         try:
-            # Get all appointments for this doctor
             appointments = Appointment.objects.filter(doctor_id=doctor_id)
             
-            # Get unique patient IDs
-            patient_ids = list(appointments.values_list('patient_id', flat=True).distinct())
+            search = request.query_params.get('search', '').strip()
+            if search:
+                # Whole patients, so their counts and latest visit stay complete
+                appointments = appointments.filter(
+                    patient_id__in=appointments.filter(
+                        patient_name__icontains=search
+                    ).values('patient_id')
+                )
+            
+            # Each patient's latest appointment and appointment count in one
+            # query: number the appointments per patient, newest first, and
+            # keep the first
+            roster = appointments.annotate(
+                visit_number=Window(
+                    RowNumber(),
+                    partition_by=[F('patient_id')],
+                    order_by=[F('appointment_date').desc(), F('start_time').desc(), F('id').desc()]
+                ),
+                appointment_count=Window(Count('id'), partition_by=[F('patient_id')]),
+            ).filter(visit_number=1).only(
+                'id', 'appointment_id', 'patient_id', 'patient_name', 'patient_email',
+                'patient_phone', 'appointment_date', 'start_time', 'problem_description', 'status'
+            ).order_by(*PATIENT_ROSTER_SORTS[sort])
+            
+            total_patients = appointments.values('patient_id').distinct().count()
+            offset = (page - 1) * page_size
             
-            # For each patient, gather their details and latest appointment
             patients_data = []
-            for patient_id in patient_ids:
-                # Get the latest appointment for this patient
-                latest_appointment = Appointment.objects.filter(
-                    doctor_id=doctor_id,
-                    patient_id=patient_id
-                ).order_by('-appointment_date', '-start_time').first()
-                
-                if not latest_appointment:
-                    continue
-                
-                # Get all appointments for this patient
-                all_appointments = Appointment.objects.filter(
-                    doctor_id=doctor_id,
-                    patient_id=patient_id
-                )
-                appointment_count = all_appointments.count()
-                
-                # Determine gender based on naming patterns (very basic approach)
-                # In a real app, you'd have this stored in your patient model
-                name = latest_appointment.patient_name
-                gender = 'Male'  # Default
-                
-                # Very simple gender detection
-                common_female_names = ['mary', 'patricia', 'jennifer', 'linda', 'elizabeth', 
-                                     'barbara', 'susan', 'jessica', 'sarah', 'karen', 'nancy', 
-                                     'margaret', 'lisa', 'betty', 'dorothy', 'sandra', 'ashley', 
-                                     'kimberly', 'donna', 'emily', 'michelle', 'carol', 'amanda', 
-                                     'melissa', 'deborah', 'stephanie', 'laura', 'olivia', 'emma']
-                
-                # Check first name against common female names
-                first_name = name.split(' ')[0].lower() if ' ' in name else name.lower()
-                if first_name in common_female_names:
-                    gender = 'Female'
-                
+            for latest_appointment in roster[offset:offset + page_size]:
+                patient_id = latest_appointment.patient_id
                 patients_data.append({
                     'id': patient_id,
                     'patient_id': f"P-{patient_id:06}",  # Format: P-000123
                     'name': latest_appointment.patient_name,
                     'email': latest_appointment.patient_email,
                     'phone': latest_appointment.patient_phone,
-                    'gender': gender,
+                    'gender': guess_gender(latest_appointment.patient_name),
                     'latest_appointment': {
                         'id': latest_appointment.id,
                         'appointment_id': latest_appointment.appointment_id,
@@ -2020,12 +2314,15 @@ class DoctorPatientsAPIView(APIView):
                         'reason': latest_appointment.problem_description,
                         'status': latest_appointment.status
                     },
-                    'appointment_count': appointment_count
+                    'appointment_count': latest_appointment.appointment_count
                 })
             
             return Response({
                 'status': 'success',
-                'total_patients': len(patients_data),
+                'total_patients': total_patients,
+                'page': page,
+                'page_size': page_size,
+                'total_pages': (total_patients + page_size - 1) // page_size,
                 'patients': patients_data
             })
             
@@ -2036,7 +2333,7 @@ class DoctorPatientsAPIView(APIView):
             return Response({
                 'status': 'error',
                 'message': str(e)
-            }, status=rest_framework.status.HTTP_500_INTERNAL_SERVER_ERROR)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 @api_view(['GET'])
 def patient_medical_history(request, patient_id):
@@ -0,0 +1,87 @@
+"""
+Versioned cache helpers
+
+Cached results are stored under keys that include a per-namespace version.
+Writes bump the version instead of hunting down every affected key, so all
+entries of a namespace become unreachable at once and expire on their own.
+
+Versions are kept forever by default. Per-object namespaces (one per user,
+say) should pass a version timeout so their version keys don't pile up; a
+version that expires is simply replaced, which only costs a cache miss.
+"""
+
+import logging
+import time
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+
+def _version_key(namespace):
+    return f"cache-version:{namespace}"
+
+
+def get_version(namespace, timeout=None):
+    """
+    Get the current version of a cache namespace
+
+    Args:
+        namespace (str): Namespace name, e.g. 'admin_dashboard'
+        timeout (int): Seconds to keep a newly created version, None for ever
+
+    Returns:
+        int: Current version
+    """
+    version = cache.get(_version_key(namespace))
+    if version is None:
+        version = time.time_ns()
+        # add() so concurrent first readers agree on one version
+        if not cache.add(_version_key(namespace), version, timeout):
+            version = cache.get(_version_key(namespace), version)
+    return version
+
+
+def bump_version(*namespaces, timeout=None):
+    """Invalidate everything cached under the given namespaces"""
+    for namespace in namespaces:
+        cache.set(_version_key(namespace), time.time_ns(), timeout)
+        logger.debug(f"Bumped cache version for {namespace}")
+
+
+def versioned_key(namespace, *parts, version_timeout=None):
+    """
+    Build a cache key that changes whenever the namespace is bumped
+
+    Args:
+        namespace (str): Namespace name
+        *parts: Values identifying the entry within the namespace
+        version_timeout (int): Passed to get_version()
+
+    Returns:
+        str: Cache key
+    """
+    suffix = ':'.join(str(part) for part in parts)
+    return f"{namespace}:{get_version(namespace, version_timeout)}:{suffix}"
+
+
+def get_or_build(namespace, parts, builder, timeout, version_timeout=None):
+    """
+    Return a cached value, computing and storing it on a miss
+
+    Args:
+        namespace (str): Namespace name
+        parts (tuple): Values identifying the entry within the namespace
+        builder (callable): Called without arguments to compute the value
+        timeout (int): Seconds to keep the value
+        version_timeout (int): Passed to get_version()
+
+    Returns:
+        The cached or freshly built value
+    """
+    key = versioned_key(namespace, *parts, version_timeout=version_timeout)
+    value = cache.get(key)
+    if value is None:
+        value = builder()
+        cache.set(key, value, timeout)
+    return value
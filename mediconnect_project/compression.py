@@ -0,0 +1,71 @@
+"""
+gzip and brotli codecs for CompressionMiddleware
+
+Brotli needs the optional brotli package (or its drop-in brotlicffi); without
+it only gzip is offered. Levels come from COMPRESSION_GZIP_LEVEL and
+COMPRESSION_BROTLI_QUALITY: API responses are compressed on every request, so
+the defaults favour speed over the last few percent of size.
+"""
+
+import zlib
+
+from django.conf import settings
+
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+# zlib window bits for a gzip header and trailer
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+
+def available_encodings():
+    """Content codings this process can produce, preferred first"""
+    if brotli is not None:
+        return ('br', 'gzip')
+    return ('gzip',)
+
+
+class _GzipCompressor:
+    def __init__(self, level):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, GZIP_WBITS)
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class _BrotliCompressor:
+    def __init__(self, quality):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+def stream_compressor(coding, level=None):
+    """
+    Incremental compressor with compress(chunk) and finish() methods
+
+    Args:
+        coding (str): 'br' or 'gzip'
+        level (int): Compression level, the setting for the coding by default
+    """
+    if coding == 'br':
+        return _BrotliCompressor(settings.COMPRESSION_BROTLI_QUALITY if level is None else level)
+    return _GzipCompressor(settings.COMPRESSION_GZIP_LEVEL if level is None else level)
+
+
+def compress_bytes(data, coding, level=None):
+    """Compress a whole body with the given coding"""
+    compressor = stream_compressor(coding, level)
+    return compressor.compress(data) + compressor.finish()
@@ -0,0 +1,103 @@
+"""
+Conditional GET for read-mostly API views
+
+A view's get() is decorated with conditional_get(validators), where
+validators(request, *args, **kwargs) cheaply works out the current ETag and
+Last-Modified of the resource, typically from one aggregate over max(updated_at)
+and a row count (the count catches deletions). If-None-Match and
+If-Modified-Since are checked against them before get() runs, so a client
+that is up to date gets a 304 without the payload being built or serialized.
+A deletion doesn't move max(updated_at) forward, so validators that rely on
+a count return no Last-Modified, only the ETag.
+
+Responses embedding signed storage URLs also put signed_url_epoch() in their
+ETag, so clients refetch them before the URLs they hold expire.
+
+Public resources are marked cacheable by shared caches for
+CONDITIONAL_GET_SHARED_MAX_AGE seconds while browsers always revalidate;
+per-user resources are private and always revalidated.
+"""
+
+import logging
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+logger = logging.getLogger(__name__)
+
+
+def make_etag(*parts):
+    """
+    Build an ETag value from the parts that identify a resource version
+
+    Returns:
+        str: Unquoted ETag, e.g. '12-1718000000.123456'
+    """
+    return '-'.join(
+        str(part.timestamp()) if hasattr(part, 'timestamp') else str(part)
+        for part in parts
+    )
+
+
+def signed_url_epoch():
+    """
+    Number of the current half-lifetime window of signed storage URLs
+
+    Changes every FIREBASE_URL_EXPIRATION / 2 seconds, so a response whose
+    ETag includes it is refetched while its URLs have at least half their
+    lifetime left.
+    """
+    return int(time.time() // (settings.FIREBASE_URL_EXPIRATION // 2))
+
+
+def conditional_get(validators, private=False, max_age=None):
+    """
+    Answer conditional GET/HEAD requests to an APIView method with 304
+
+    Args:
+        validators: Callable taking the view's (request, *args, **kwargs) and
+            returning (etag, last_modified); either may be None, and (None,
+            None) leaves the request to the view (e.g. to return a 404)
+        private (bool): Per-user response (Cache-Control: private, no-cache)
+        max_age (int): Seconds shared caches may reuse a public response,
+            CONDITIONAL_GET_SHARED_MAX_AGE by default
+
+    Returns:
+        Decorator for the view's get()
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(view, request, *args, **kwargs):
+            try:
+                etag, last_modified = validators(request, *args, **kwargs)
+            except Exception as e:
+                # Validators only save work, so a failure serves the full response
+                logger.error(f"Conditional GET validators failed for {view.__class__.__name__}: {str(e)}")
+                etag, last_modified = None, None
+
+            etag = quote_etag(etag) if etag else None
+            timestamp = int(last_modified.timestamp()) if last_modified else None
+
+            response = None
+            if etag or timestamp:
+                response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+            if response is None:
+                response = method(view, request, *args, **kwargs)
+
+            if response.status_code in (200, 304):
+                if etag and not response.has_header('ETag'):
+                    response['ETag'] = etag
+                if timestamp and not response.has_header('Last-Modified'):
+                    response['Last-Modified'] = http_date(timestamp)
+                if private:
+                    patch_cache_control(response, private=True, no_cache=True)
+                    patch_vary_headers(response, ('Authorization',))
+                else:
+                    shared_max_age = max_age if max_age is not None else settings.CONDITIONAL_GET_SHARED_MAX_AGE
+                    patch_cache_control(response, public=True, max_age=0, s_maxage=shared_max_age)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,244 @@
+"""
+Process-wide Firebase registry
+
+Chat, the storage backend and the direct uploader all need Firebase. They used
+to initialize it independently, and chat created a uniquely named app per
+client, each with its own credentials and gRPC channel. This registry lazily
+builds one app, one Firestore client and one bucket handle per process and
+hands the same objects to every caller.
+
+gRPC channels and HTTP connection pools must not be shared across fork(), so
+the clients are rebuilt in a forked child (e.g. gunicorn workers with
+--preload). The app itself only holds credentials and is kept.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+import traceback
+
+import firebase_admin
+from firebase_admin import credentials
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _load_credentials():
+    """
+    Build credentials from FIREBASE_SERVICE_ACCOUNT_JSON
+
+    The variable may hold the service account JSON itself or a path to it.
+
+    Returns:
+        credentials.Certificate: Credentials or None if not configured
+    """
+    service_account_json = os.environ.get('FIREBASE_SERVICE_ACCOUNT_JSON')
+    if not service_account_json:
+        logger.error("FIREBASE_SERVICE_ACCOUNT_JSON environment variable not set")
+        return None
+
+    try:
+        return credentials.Certificate(json.loads(service_account_json))
+    except json.JSONDecodeError:
+        if os.path.exists(service_account_json):
+            return credentials.Certificate(service_account_json)
+        logger.error("Service account JSON is neither valid JSON nor a valid file path")
+        return None
+
+
+class FirebaseRegistry:
+    """Lazily built, fork-aware holder of the Firebase app and its clients"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._app = None
+        self._reset_clients()
+        self._stats = {
+            'app_initializations': 0,
+            'app_init_seconds': 0.0,
+            'firestore_clients_created': 0,
+            'storage_clients_created': 0,
+            'forks_detected': 0,
+        }
+
+    def _reset_clients(self):
+        self._pid = os.getpid()
+        self._firestore_client = None
+        self._storage_client = None
+        self._bucket = None
+
+    def _after_fork(self):
+        """Drop clients inherited from the parent; they hold its sockets"""
+        # The lock may have been held by another thread at fork time
+        self._lock = threading.RLock()
+        self._reset_clients()
+        self._stats['forks_detected'] += 1
+
+    def _check_pid(self):
+        if self._pid != os.getpid():
+            self._after_fork()
+
+    def _bucket_name(self):
+        return getattr(settings, 'FIREBASE_STORAGE_BUCKET', '') or os.environ.get('FIREBASE_STORAGE_BUCKET', '')
+
+    def get_app(self):
+        """
+        Get the Firebase app, initializing it on first use
+
+        Returns:
+            firebase_admin.App: The default app or None if Firebase isn't configured
+        """
+        self._check_pid()
+        if self._app is not None:
+            return self._app
+
+        with self._lock:
+            if self._app is not None:
+                return self._app
+
+            try:
+                # Reuse an app initialized elsewhere (e.g. a management command)
+                self._app = firebase_admin.get_app()
+                logger.info("Using existing Firebase app")
+                return self._app
+            except ValueError:
+                pass
+
+            creds = _load_credentials()
+            if creds is None:
+                return None
+
+            start = time.perf_counter()
+            try:
+                options = {}
+                bucket_name = self._bucket_name()
+                if bucket_name:
+                    options['storageBucket'] = bucket_name
+                self._app = firebase_admin.initialize_app(creds, options)
+                logger.info("Firebase app initialized successfully")
+            except Exception as e:
+                logger.error(f"Error initializing Firebase app: {e}")
+                logger.error(traceback.format_exc())
+                return None
+            finally:
+                self._stats['app_initializations'] += 1
+                self._stats['app_init_seconds'] += time.perf_counter() - start
+
+            return self._app
+
+    def get_firestore(self):
+        """
+        Get the shared Firestore client
+
+        Returns:
+            google.cloud.firestore.Client: Client or None if Firebase isn't configured
+        """
+        self._check_pid()
+        if self._firestore_client is not None:
+            return self._firestore_client
+
+        with self._lock:
+            if self._firestore_client is not None:
+                return self._firestore_client
+
+            app = self.get_app()
+            if app is None:
+                return None
+
+            try:
+                # Built directly rather than through firestore.client(app), which
+                # caches the client on the app and would survive a fork
+                from google.cloud import firestore as gcloud_firestore
+
+                self._firestore_client = gcloud_firestore.Client(
+                    credentials=app.credential.get_credential(),
+                    project=app.project_id
+                )
+                self._stats['firestore_clients_created'] += 1
+                logger.info("Created Firestore client")
+            except Exception as e:
+                logger.error(f"Error creating Firestore client: {e}")
+                logger.error(traceback.format_exc())
+                return None
+
+            return self._firestore_client
+
+    def get_bucket(self):
+        """
+        Get the shared handle to the configured storage bucket
+
+        Returns:
+            google.cloud.storage.Bucket: Bucket or None if Firebase or the bucket isn't configured
+        """
+        self._check_pid()
+        if self._bucket is not None:
+            return self._bucket
+
+        with self._lock:
+            if self._bucket is not None:
+                return self._bucket
+
+            app = self.get_app()
+            if app is None:
+                return None
+
+            bucket_name = app.options.get('storageBucket') or self._bucket_name()
+            if not bucket_name:
+                logger.error("FIREBASE_STORAGE_BUCKET environment variable not set")
+                return None
+
+            try:
+                from google.cloud import storage as gcloud_storage
+
+                self._storage_client = gcloud_storage.Client(
+                    credentials=app.credential.get_credential(),
+                    project=app.project_id
+                )
+                self._stats['storage_clients_created'] += 1
+                self._bucket = self._storage_client.bucket(bucket_name)
+                logger.info(f"Firebase Storage initialized with bucket: {bucket_name}")
+            except Exception as e:
+                logger.error(f"Error creating storage bucket handle: {e}")
+                logger.error(traceback.format_exc())
+                return None
+
+            return self._bucket
+
+    def stats(self):
+        """
+        Report what this process holds
+
+        Returns:
+            dict: Initialization counters and live client/channel counts
+        """
+        self._check_pid()
+        stats = dict(self._stats)
+        stats['app_init_seconds'] = round(stats['app_init_seconds'], 3)
+
+        storage_pools = 0
+        if self._storage_client is not None:
+            http = getattr(self._storage_client, '_http_internal', None)
+            if http is not None and hasattr(http, 'adapters'):
+                storage_pools = sum(len(adapter.poolmanager.pools) for adapter in http.adapters.values()
+                                    if hasattr(adapter, 'poolmanager'))
+
+        stats.update({
+            'pid': os.getpid(),
+            'firebase_apps': len(firebase_admin._apps),
+            'app_initialized': self._app is not None,
+            'firestore_clients': 1 if self._firestore_client is not None else 0,
+            # A Firestore client opens one gRPC channel on first use
+            'grpc_channels': 1 if getattr(self._firestore_client, '_firestore_api_internal', None) is not None else 0,
+            'storage_clients': 1 if self._storage_client is not None else 0,
+            'storage_connection_pools': storage_pools,
+        })
+        return stats
+
+
+firebase_registry = FirebaseRegistry()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=firebase_registry._after_fork)
@@ -1,13 +1,10 @@
 import os
-import json
 import uuid
-import firebase_admin
-from firebase_admin import credentials, storage
 from django.core.files.storage import Storage
 from django.conf import settings
 import logging
+from mediconnect_project.firebase_registry import firebase_registry
 import traceback
-import time
 
 logger = logging.getLogger(__name__)
 
@@ -42,82 +39,15 @@ class FirebaseStorage(Storage):
             return False
             
         try:
-            # Get service account credentials from environment variable
-            service_account_json = os.environ.get('FIREBASE_SERVICE_ACCOUNT_JSON')
-            if not service_account_json:
-                logger.error("FIREBASE_SERVICE_ACCOUNT_JSON environment variable not set")
+            # The app, credentials and bucket handle are shared process-wide
+            self.bucket = firebase_registry.get_bucket()
+            if not self.bucket:
+                logger.error("Firebase Storage bucket is not available. Check FIREBASE_SERVICE_ACCOUNT_JSON and FIREBASE_STORAGE_BUCKET")
                 return False
             
-            # Log a small portion of the JSON to verify it's available (don't log credentials!)
-            logger.info(f"FIREBASE_SERVICE_ACCOUNT_JSON available: {len(service_account_json)} characters")
-            
-            # Parse the JSON string to a Python dictionary
-            try:
-                service_account_info = json.loads(service_account_json)
-                logger.info("Successfully parsed FIREBASE_SERVICE_ACCOUNT_JSON")
-                
-                # Print some safe parts of the credentials for verification
-                if 'project_id' in service_account_info:
-                    logger.info(f"Firebase project_id: {service_account_info['project_id']}")
-                if 'client_email' in service_account_info:
-                    client_email = service_account_info['client_email']
-                    # Only show the domain part of the email for security
-                    email_parts = client_email.split('@')
-                    if len(email_parts) > 1:
-                        logger.info(f"Firebase client_email domain: @{email_parts[1]}")
-                
-            except json.JSONDecodeError as e:
-                logger.error(f"Failed to parse FIREBASE_SERVICE_ACCOUNT_JSON: {str(e)}")
-                if len(service_account_json) > 100:
-                    # Show truncated beginning to help debug
-                    logger.error(f"First 100 chars: {service_account_json[:100]}...")
-                else:
-                    logger.error(f"Content: {service_account_json}")
-                return False
-            
-            # Get bucket name from environment variable
-            self.bucket_name = os.environ.get('FIREBASE_STORAGE_BUCKET')
-            if not self.bucket_name:
-                logger.error("FIREBASE_STORAGE_BUCKET environment variable not set")
-                return False
-            
-            logger.info(f"Initializing Firebase Storage with bucket: {self.bucket_name}")
-            
-            # Initialize Firebase Admin SDK if not already initialized
-            try:
-                # Check if Firebase is already initialized
-                try:
-                    self.app = firebase_admin.get_app()
-                    logger.info("Firebase app already initialized, reusing existing app")
-                except ValueError:
-                    # App doesn't exist yet, initialize it
-                    logger.info("Initializing new Firebase app")
-                    creds = credentials.Certificate(service_account_info)
-                    self.app = firebase_admin.initialize_app(creds, {
-                        'storageBucket': self.bucket_name
-                    })
-                
-                # Get a reference to the storage bucket
-                self.bucket = storage.bucket(app=self.app)
-                logger.info(f"Firebase Storage initialized with bucket: {self.bucket_name}")
-                
-                # Test the connection by listing blobs
-                try:
-                    blobs = list(self.bucket.list_blobs(max_results=1))
-                    logger.info(f"Successfully connected to bucket, found {len(blobs)} blobs")
-                except Exception as e:
-                    logger.error(f"Could connect to bucket but got error when listing blobs: {str(e)}")
-                    # Continue anyway as this might be an empty bucket
-                
-                self.initialized = True
-                return True
-            except Exception as e:
-                logger.error(f"Error initializing Firebase app: {str(e)}")
-                logger.error(traceback.format_exc())
-                
-                # Wait a bit before potentially retrying
-                time.sleep(1)
-                return False
+            self.bucket_name = self.bucket.name
+            self.initialized = True
+            return True
         except Exception as e:
             logger.error(f"Unexpected error in _init_firebase: {str(e)}")
             logger.error(traceback.format_exc())
@@ -345,10 +275,10 @@ class FirebaseStorage(Storage):
                 logger.warning(f"File {path} does not exist in Firebase Storage bucket")
                 return f"/media-not-available/{name}"
             
-            # Generate a signed URL that expires in 7 days (604800 seconds)
+            # Generate a signed URL that expires after FIREBASE_URL_EXPIRATION (7 days)
             logger.info(f"Generating signed URL for {path}")
             url = blob.generate_signed_url(
-                expiration=604800,  # 7 days
+                expiration=settings.FIREBASE_URL_EXPIRATION,
                 method='GET',
                 version='v4',  # Use v4 signing for better compatibility
             )
@@ -1,11 +1,8 @@
 import os
-import json
-import firebase_admin
-from firebase_admin import credentials, storage
 import uuid
 import logging
 import traceback
-from django.conf import settings
+from mediconnect_project.firebase_registry import firebase_registry
 
 logger = logging.getLogger(__name__)
 
@@ -19,30 +16,7 @@ class DirectFirebaseUploader:
     def get_bucket():
         """Get a reference to the Firebase Storage bucket."""
         try:
-            # Check if Firebase is already initialized
-            try:
-                app = firebase_admin.get_app()
-                logger.info("Using existing Firebase app")
-            except ValueError:
-                # Initialize Firebase
-                logger.info("Initializing new Firebase app")
-                service_account_json = os.environ.get('FIREBASE_SERVICE_ACCOUNT_JSON')
-                if not service_account_json:
-                    logger.error("FIREBASE_SERVICE_ACCOUNT_JSON environment variable not set")
-                    return None
-                
-                service_account_info = json.loads(service_account_json)
-                bucket_name = settings.FIREBASE_STORAGE_BUCKET
-                
-                creds = credentials.Certificate(service_account_info)
-                app = firebase_admin.initialize_app(creds, {
-                    'storageBucket': bucket_name
-                })
-            
-            # Get bucket reference
-            bucket = storage.bucket(app=app)
-            return bucket
-        
+            return firebase_registry.get_bucket()
         except Exception as e:
             logger.error(f"Error getting Firebase bucket: {str(e)}")
             logger.error(traceback.format_exc())
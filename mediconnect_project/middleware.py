@@ -1,5 +1,10 @@
 import logging
 
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+from .compression import available_encodings, compress_bytes, stream_compressor
+
 logger = logging.getLogger(__name__)
 
 class ForceFirebaseStorageMiddleware:
@@ -66,4 +71,125 @@ class ForceFirebaseStorageMiddleware:
         except Exception as e:
             logger.error(f"Middleware storage enforcement error: {e}")
             import traceback
-            logger.error(traceback.format_exc())
\ No newline at end of file
+            logger.error(traceback.format_exc())
+
+def accepted_encodings(header):
+    """
+    Content codings listed in an Accept-Encoding header
+
+    Returns:
+        dict: Coding -> q-value; 0 means refused
+    """
+    accepted = {}
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+
+class CompressionMiddleware:
+    """
+    Compress JSON, CSV and other text responses with brotli or gzip
+
+    Brotli is used when the brotli package is installed and the client accepts
+    it, otherwise gzip. Only responses whose content type is listed in
+    COMPRESSION_CONTENT_TYPES are compressed, and regular responses only from
+    COMPRESSION_MIN_SIZE bytes, where the saving outweighs the CPU time.
+    Streaming responses (exports) are compressed chunk by chunk as they are
+    sent, so they are never held in memory.
+
+    A compressed body is a different byte sequence, so strong ETags are made
+    weak, as Django's GZipMiddleware does; If-None-Match uses the weak
+    comparison, so the conditional GET views keep answering 304.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        return self.process_response(request, response)
+
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding') or request.method == 'HEAD':
+            return response
+
+        coding = self._choose_coding(request)
+        if response.status_code == 304:
+            if coding:
+                self._weaken_etag(response)
+            return response
+
+        if not self._is_compressible_type(response):
+            return response
+        if not response.streaming and len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+
+        # Whether the body is compressed depends on the request from here on
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if coding is None:
+            return response
+
+        if response.streaming:
+            if getattr(response, 'is_async', False):
+                response.streaming_content = self._compress_async_stream(response.streaming_content, coding)
+            else:
+                response.streaming_content = self._compress_stream(response.streaming_content, coding)
+            del response.headers['Content-Length']
+        else:
+            compressed = compress_bytes(response.content, coding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        self._weaken_etag(response)
+        response.headers['Content-Encoding'] = coding
+        return response
+
+    def _choose_coding(self, request):
+        accepted = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        qualities = {
+            coding: accepted.get(coding, accepted.get('*', 0)) for coding in available_encodings()
+        }
+        candidates = [coding for coding, quality in qualities.items() if quality > 0]
+        if not candidates:
+            return None
+        # Highest q-value first, brotli before gzip on a tie
+        return max(candidates, key=qualities.get)
+
+    def _is_compressible_type(self, response):
+        content_type = response.get('Content-Type', '').partition(';')[0].strip().lower()
+        return content_type in settings.COMPRESSION_CONTENT_TYPES
+
+    def _weaken_etag(self, response):
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+
+    def _compress_stream(self, chunks, coding):
+        compressor = stream_compressor(coding)
+        for chunk in chunks:
+            compressed = compressor.compress(chunk)
+            if compressed:
+                yield compressed
+        yield compressor.finish()
+
+    async def _compress_async_stream(self, chunks, coding):
+        compressor = stream_compressor(coding)
+        async for chunk in chunks:
+            compressed = compressor.compress(chunk)
+            if compressed:
+                yield compressed
+        yield compressor.finish()
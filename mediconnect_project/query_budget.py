@@ -0,0 +1,49 @@
+"""
+Query budgets for views that must not grow with the number of rows
+
+A view wraps its database work in query_budget(n) to declare that it runs at
+most n queries whatever the page size. Going over the budget is logged with
+the offending statements, or raised when QUERY_BUDGET_STRICT is on (tests and
+development), so an N+1 regression shows up as soon as it is introduced.
+"""
+
+import logging
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connections, DEFAULT_DB_ALIAS
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    """Raised in strict mode when a block runs more queries than its budget"""
+
+
+@contextmanager
+def query_budget(max_queries, label, using=DEFAULT_DB_ALIAS):
+    """
+    Count the queries run inside the block and enforce a maximum
+
+    Args:
+        max_queries (int): Queries the block may run
+        label (str): Name of the block for the log message
+        using (str): Database alias to watch
+
+    Yields:
+        list: SQL of the queries run so far
+    """
+    statements = []
+
+    def count_query(execute, sql, params, many, context):
+        statements.append(sql)
+        return execute(sql, params, many, context)
+
+    with connections[using].execute_wrapper(count_query):
+        yield statements
+
+    if len(statements) > max_queries:
+        message = f"{label} ran {len(statements)} queries, budget is {max_queries}"
+        if getattr(settings, 'QUERY_BUDGET_STRICT', False):
+            raise QueryBudgetExceeded(message)
+        logger.warning(f"{message}: " + '; '.join(statements))
@@ -0,0 +1,76 @@
+"""
+orjson-backed JSON renderer and parser for the DRF endpoints
+
+Output decodes to the same JSON as DRF's JSONRenderer with the default
+settings (compact, UTF-8): dates, times and datetimes are passed through to
+DRF's encoder so UTC datetimes keep their 'Z' suffix, raw Decimals still
+become floats (serializer DecimalFields already hand over strings) and UUIDs,
+lazy translations and querysets are handled the same way. Anything orjson
+can't encode on its own terms (integers over 64 bits, ?indent= requests)
+goes through DRF's renderer instead.
+
+The bytes differ in two accepted ways (pinned in admin_portal/tests.py):
+floats Python writes with an exponent come out as 1e16, 1e-7 or 0.000025
+instead of 1e+16, 1e-07 or 2.5e-05, and NaN and infinities render as null
+where DRF's strict mode refuses them.
+
+Without orjson installed both classes behave exactly like DRF's.
+"""
+
+from rest_framework import renderers, parsers
+from rest_framework.exceptions import ParseError
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+LINE_SEPARATOR = '\u2028'.encode()
+PARAGRAPH_SEPARATOR = '\u2029'.encode()
+
+ORJSON_OPTIONS = 0
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+
+class ORJSONRenderer(renderers.JSONRenderer):
+    """JSONRenderer that encodes with orjson when it is available"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        renderer_context = renderer_context or {}
+        if (self.get_indent(accepted_media_type or '', renderer_context)
+                or self.ensure_ascii or not self.compact
+                or self.encoder_class is not encoders.JSONEncoder):
+            # Indented, ASCII-only, spaced or custom-encoder output is left to DRF
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Escaped like DRF does, so the output stays a strict JavaScript subset
+        return ret.replace(LINE_SEPARATOR, b'\\u2028').replace(PARAGRAPH_SEPARATOR, b'\\u2029')
+
+
+class ORJSONParser(parsers.JSONParser):
+    """JSONParser that decodes with orjson when it is available"""
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', 'utf-8')
+        try:
+            body = stream.read() if stream is not None else b''
+            if encoding.lower().replace('_', '-') not in ('utf-8', 'utf8'):
+                body = body.decode(encoding)
+            return orjson.loads(body)
+        except (orjson.JSONDecodeError, UnicodeDecodeError, LookupError) as exc:
+            raise ParseError(f'JSON parse error - {exc}')
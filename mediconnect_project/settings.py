@@ -59,6 +59,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # Added for static files
+    'mediconnect_project.middleware.CompressionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -172,6 +173,59 @@ LOGGING = {
     },
 }
 
+# REST framework
+# orjson renders and parses JSON (same output as DRF's JSONRenderer, see
+# mediconnect_project/renderers.py); the browsable API and form parsers stay
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'mediconnect_project.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'mediconnect_project.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+}
+
+# Cache
+# Per-process memory cache by default; set REDIS_URL to share cached data
+# (dashboard statistics, chat message versions) between workers
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ.get('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'mediconnect',
+        }
+    }
+
+# Seconds the admin dashboard statistics are cached (invalidated on writes)
+ADMIN_DASHBOARD_CACHE_TTL = 60
+
+# Seconds a user's admin detail panel is cached (invalidated on writes), and
+# how long its per-user cache version is kept once the user goes quiet. The
+# invalidation only reaches every worker when the cache is shared (REDIS_URL);
+# with the per-process cache both are kept short, as for the doctor dashboard.
+if os.environ.get('REDIS_URL'):
+    ADMIN_USER_DETAIL_CACHE_TTL = int(os.environ.get('ADMIN_USER_DETAIL_CACHE_TTL', '300'))
+    ADMIN_USER_DETAIL_VERSION_TTL = 24 * 60 * 60
+else:
+    ADMIN_USER_DETAIL_CACHE_TTL = int(os.environ.get('ADMIN_USER_DETAIL_CACHE_TTL', '10'))
+    ADMIN_USER_DETAIL_VERSION_TTL = 10
+
+# Seconds an admin list total is reused when ?count=approximate
+ADMIN_APPROXIMATE_COUNT_TTL = int(os.environ.get('ADMIN_APPROXIMATE_COUNT_TTL', '300'))
+
+# Rows fetched per database round trip by the streaming admin exports
+ADMIN_EXPORT_CHUNK_SIZE = int(os.environ.get('ADMIN_EXPORT_CHUNK_SIZE', '2000'))
+
 # Media files for uploads
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
@@ -227,6 +281,58 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Email settings
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'  # Change to console to see email output directly
 
+# Outgoing email is sent by a background queue over one persistent connection
+MAIL_QUEUE_IDLE_SECONDS = 30  # Close the connection after this long without mail
+MAIL_QUEUE_MAX_BATCH = 50
+
+# Threads hashing generated passwords during bulk doctor approval
+DOCTOR_APPROVAL_HASH_WORKERS = int(os.environ.get('DOCTOR_APPROVAL_HASH_WORKERS', '4'))
+
+# Seconds a doctor's dashboard stats are cached (invalidated on writes), and how
+# long the per-doctor cache version behind the dashboard ETag is kept. The ETag
+# only changes in every worker when the cache is shared (REDIS_URL); with the
+# per-process cache a write bumps only its own worker's version, so both are
+# kept short to bound how long other workers answer 304 for stale stats.
+if os.environ.get('REDIS_URL'):
+    DOCTOR_DASHBOARD_CACHE_TTL = int(os.environ.get('DOCTOR_DASHBOARD_CACHE_TTL', '300'))
+    DOCTOR_DASHBOARD_VERSION_TTL = 24 * 60 * 60
+else:
+    DOCTOR_DASHBOARD_CACHE_TTL = int(os.environ.get('DOCTOR_DASHBOARD_CACHE_TTL', '10'))
+    DOCTOR_DASHBOARD_VERSION_TTL = 10
+
+# Seconds shared caches may serve public read-mostly responses (FAQs, doctor
+# directory, schedules) before revalidating; browsers always revalidate
+CONDITIONAL_GET_SHARED_MAX_AGE = int(os.environ.get('CONDITIONAL_GET_SHARED_MAX_AGE', '60'))
+
+# Seconds a worker serves its prebuilt FAQ catalogue before re-checking the
+# database; edits invalidate it at once through the cache version
+FAQ_CATALOGUE_TTL = int(os.environ.get('FAQ_CATALOGUE_TTL', '300'))
+
+# Response compression (mediconnect_project.middleware.CompressionMiddleware):
+# smallest body worth compressing, content types compressed, and levels
+# (brotli is used only when the brotli package is installed)
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', '1024'))
+COMPRESSION_CONTENT_TYPES = (
+    'application/json',
+    'application/x-ndjson',
+    'text/csv',
+    'text/html',
+    'text/plain',
+)
+COMPRESSION_GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', '6'))
+COMPRESSION_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', '5'))
+
+# Delta sync (doctors/sync.py): rows per kind per response, how far behind
+# now positions stay so late commits are re-sent, and how long deletions are
+# remembered (older sync tokens get a full resync)
+SYNC_PAGE_SIZE = 500
+SYNC_OVERLAP_SECONDS = 60
+SYNC_TOMBSTONE_RETENTION_DAYS = int(os.environ.get('SYNC_TOMBSTONE_RETENTION_DAYS', '30'))
+
+# Raise instead of logging when a view runs more queries than its
+# query_budget() allows (see mediconnect_project/query_budget.py)
+QUERY_BUDGET_STRICT = os.environ.get('QUERY_BUDGET_STRICT', str(DEBUG)).lower() == 'true'
+
 # JWT settings
 JWT_SECRET = SECRET_KEY
 
@@ -241,6 +347,44 @@ ZOOM_CLIENT_SECRET = os.environ.get('ZOOM_CLIENT_SECRET', '')
 ZOOM_ACCOUNT_ID = os.environ.get('ZOOM_ACCOUNT_ID', '')  # Your Zoom account ID
 ZOOM_WEBHOOK_SECRET_TOKEN = os.environ.get('ZOOM_WEBHOOK_SECRET_TOKEN', '')
 
+# =============================================
+# CHAT CONFIGURATION
+# =============================================
+
+# Message store backend: 'firestore', 'sql', 'memory' or a dotted path to a
+# chat.message_store.MessageStore subclass
+CHAT_MESSAGE_STORE = os.environ.get('CHAT_MESSAGE_STORE', 'firestore')
+
+# Recent-message cache in front of the message store (see chat/message_cache.py).
+# Each worker only sees the others' new messages through the shared cache
+# version, so the cache is on by default only when REDIS_URL is set
+CHAT_MESSAGE_CACHE_ENABLED = os.environ.get(
+    'CHAT_MESSAGE_CACHE_ENABLED', 'true' if os.environ.get('REDIS_URL') else 'false'
+).lower() == 'true'
+CHAT_MESSAGE_CACHE_MAX_MESSAGES = 50  # Newest messages kept per chat
+CHAT_MESSAGE_CACHE_MAX_BYTES = 16 * 1024 * 1024  # Budget across all chats, LRU evicted
+CHAT_MESSAGE_CACHE_TTL = 300  # Seconds; bounds staleness when CACHES is not shared between workers
+
+# Chat provisioning outbox (see chat/provisioning.py). With drain-on-commit a
+# background thread per process drains the outbox and waits for pending
+# retries; disable it to run `manage.py process_chat_outbox --loop` instead.
+CHAT_OUTBOX_DRAIN_ON_COMMIT = os.environ.get('CHAT_OUTBOX_DRAIN_ON_COMMIT', 'true').lower() == 'true'
+CHAT_OUTBOX_WORKERS = int(os.environ.get('CHAT_OUTBOX_WORKERS', '4'))
+CHAT_OUTBOX_MAX_ATTEMPTS = 8
+CHAT_OUTBOX_RETRY_BASE_SECONDS = 5  # Doubled after every failed attempt
+CHAT_OUTBOX_RETRY_MAX_SECONDS = 60 * 60
+CHAT_OUTBOX_LEASE_SECONDS = 5 * 60  # Claimed rows older than this are retried
+
+# Chat message notifications sent to the main server (see chat/notifications.py)
+DOCTOMORIS_API_KEY = os.environ.get('DOCTOMORIS_API_KEY', '')
+CHAT_NOTIFICATION_URL = os.environ.get(
+    'CHAT_NOTIFICATION_URL',
+    'https://doctomoris.onrender.com/api/notifications/chat-message/'
+)
+CHAT_NOTIFICATION_COALESCE_SECONDS = 3  # One notification per chat within this window
+CHAT_NOTIFICATION_MAX_ATTEMPTS = 4
+CHAT_NOTIFICATION_POOL_SIZE = 4  # Keep-alive connections to the notification server
+
 # =============================================
 # FIREBASE STORAGE CONFIGURATION
 # =============================================
@@ -0,0 +1,135 @@
+"""
+Sparse fieldsets for read endpoints
+
+?fields=id,appointment_date,status returns only those fields and
+?omit=doctor_photo drops fields from the full set. Fields that are left out
+are never evaluated, so an omitted SerializerMethodField doesn't run its
+queries, and sparse_only() narrows the SELECT to the columns the remaining
+fields read.
+
+Only the top-level serializer (or each item of a top-level list) is narrowed,
+and only for GET/HEAD, so nested serializers and writes behave as before.
+"""
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+FIELDS_PARAM = 'fields'
+OMIT_PARAM = 'omit'
+
+
+def _names(value):
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+def requested_fieldset(request):
+    """
+    Read ?fields= and ?omit= from a request
+
+    Returns:
+        tuple: (set of field names or None for all, set of names to omit)
+    """
+    if request is None or request.method not in ('GET', 'HEAD'):
+        return None, set()
+    params = getattr(request, 'query_params', request.GET)
+    fields = _names(params[FIELDS_PARAM]) if params.get(FIELDS_PARAM) else None
+    return fields, _names(params.get(OMIT_PARAM, ''))
+
+
+class SparseFieldsetsMixin:
+    """
+    Serializer mixin honouring ?fields= and ?omit= from context['request']
+
+    Fields whose values don't come from a model column of the same name (method
+    fields, dotted sources, properties) declare the columns they read in
+    Meta.sparse_columns, e.g. {'doctor_name': ('doctor__first_name', ...)},
+    for sparse_only(). Unknown names in ?fields= are ignored.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if not self._is_sparse_root():
+            return fields
+        requested, omitted = requested_fieldset(self.context.get('request'))
+        if requested is None and not omitted:
+            return fields
+        return {
+            name: field for name, field in fields.items()
+            if (requested is None or name in requested) and name not in omitted
+        }
+
+    def _is_sparse_root(self):
+        parent = self.parent
+        if parent is None:
+            return True
+        return isinstance(parent, serializers.ListSerializer) and parent.parent is None
+
+
+def _is_column_path(model, path):
+    """Whether 'field' or 'relation__field' names a concrete column"""
+    names = path.split('__')
+    for position, name in enumerate(names):
+        try:
+            model_field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return False
+        if not model_field.concrete:
+            return False
+        if position < len(names) - 1:
+            if not model_field.is_relation:
+                return False
+            model = model_field.related_model
+    return True
+
+
+def sparse_only(queryset, serializer_class, request, required=()):
+    """
+    Load only the columns the requested fields of serializer_class read
+
+    Leaves the queryset alone when every field is wanted or when a field's
+    columns can't be worked out. Otherwise the joins are replaced by the ones
+    the remaining columns go through, so an omitted doctor_name also drops
+    the doctor join.
+
+    Args:
+        queryset (QuerySet): Queryset about to be serialized
+        serializer_class: Serializer using SparseFieldsetsMixin
+        request: Request carrying ?fields= / ?omit=
+        required (iterable): Columns the view itself reads from the rows (e.g.
+            its keyset cursor), loaded whatever fields are requested
+
+    Returns:
+        QuerySet: Queryset with an only() projection, or unchanged
+    """
+    requested, omitted = requested_fieldset(request)
+    if requested is None and not omitted:
+        return queryset
+
+    model = queryset.model
+    declared = getattr(serializer_class.Meta, 'sparse_columns', {})
+    columns = {model._meta.pk.name, *required}
+
+    for name, field in serializer_class(context={'request': request}).fields.items():
+        if name in declared:
+            columns.update(declared[name])
+            continue
+        if field.source == '*':
+            return queryset
+        path = field.source.replace('.', '__')
+        if not _is_column_path(model, path):
+            return queryset
+        columns.add(path)
+
+    # Every relation a column goes through, e.g. 'appointment' and
+    # 'appointment__doctor' for 'appointment__doctor__title'
+    joins = set()
+    for column in columns:
+        names = column.split('__')
+        joins.update('__'.join(names[:end]) for end in range(1, len(names)))
+
+    queryset = queryset.select_related(None)
+    if joins:
+        # A joined relation's foreign key can't be deferred
+        queryset = queryset.select_related(*joins)
+        columns |= joins
+    return queryset.only(*columns)